@@ -0,0 +1,472 @@
+import asyncio
+import time
+from contextlib import aclosing
+from itertools import islice
+from typing import List, Dict, Any, Iterable, AsyncIterator, Sequence, Callable, Optional, Tuple
+
+from .Searcher import (Searcher, PluginReport, KeywordReport, DEFAULT_PLUGINS, DEFAULT_BATCH_WORKERS,
+                       CATALOG_BATCH_SIZE)
+from .component.Anime import Anime
+from .component.cache import HTTPCache
+from .component.catalog import Catalog
+from .component.dedup import Deduplicator
+from .component.metrics import SearchStats, MetricsRegistry, aiter_collected, collect, notify
+from .component.ResultSet import ResultSet
+from .component.singleflight import SingleFlight
+from .component.watch import WatchState
+from .component.webget import AsyncRequestSession
+
+
+class AsyncSearcher(Searcher):
+    def __init__(self, plugin_name: str = 'dmhy',
+                 parser: Optional[str] = None,
+                 verify: Optional[bool] = None,
+                 timefmt: Optional[str] = None,
+                 no_search_errors: bool = False,
+                 session: Optional[AsyncRequestSession] = None,
+                 prefetch: Optional[int] = None,
+                 cache: Optional[HTTPCache] = None,
+                 cache_ttl: Optional[float] = None,
+                 catalog: Optional[Catalog] = None,
+                 backend: Optional[str] = None,
+                 watch_state: Optional[WatchState] = None,
+                 metrics: Optional[MetricsRegistry] = None,
+                 on_stats: Optional[Callable[[SearchStats], None]] = None,
+                 log_level: Optional[int] = None,
+                 singleflight: Optional[SingleFlight] = None,
+                 deduplicator: Optional[Deduplicator] = None) -> None:
+        """
+        Initialize AsyncSearcher object, the asyncio counterpart of Searcher.
+
+        Args:
+            plugin_name: Name of the plugin, default is 'dmhy'
+            parser: Name of the parser
+            verify: Whether to verify
+            timefmt: Time format
+            no_search_errors: If True, search errors will be suppressed
+            session: Pooled async HTTP session owned by this searcher, the shared
+                session of the running event loop is used if omitted
+            prefetch: Number of result pages kept in flight while paginating
+            cache: Persistent HTTP cache for the pages requested by the plugin
+            cache_ttl: Seconds a cached result page stays fresh, the plugin default if omitted
+            catalog: Local catalog keeping every anime found
+            backend: HTML parsing backend of the plugin, 'soup' or 'lxml' (the default)
+            watch_state: High-water marks of the keywords polled with watch
+            metrics: Registry accumulating the stats of every search, for Prometheus export
+            on_stats: Function called with the stats of every finished search, see last_stats
+            log_level: Logging level of this searcher and its plugins, the level of the global logger if omitted
+            singleflight: Shared by the searchers of a service, identical searches running at the
+                same time then share a single crawl, see SingleFlight
+            deduplicator: Engine merging the results of search_all, DEFAULT_DEDUPLICATOR if omitted
+
+        Raises:
+            ValueError: If time format is invalid
+            PluginImportError: If plugin is not found
+        """
+        self.async_session: Optional[AsyncRequestSession] = session
+        super().__init__(plugin_name, parser, verify, timefmt, no_search_errors,
+                         prefetch=prefetch, cache=cache, cache_ttl=cache_ttl,
+                         catalog=catalog, backend=backend, watch_state=watch_state, metrics=metrics, on_stats=on_stats,
+                         log_level=log_level, singleflight=singleflight, deduplicator=deduplicator)
+
+    def _load_plugin(self, plugin_name: str,
+                     parser: Optional[str],
+                     verify: Optional[bool],
+                     timefmt: Optional[str]) -> Any:
+        """Load and configure the search plugin."""
+        plugin = super()._load_plugin(plugin_name, parser, verify, timefmt)
+        plugin.async_session = self.async_session
+        return plugin
+
+    async def search(self, keyword: str,
+                     collected: Optional[bool] = None,
+                     proxies: Optional[dict] = None,
+                     system_proxy: Optional[bool] = None,
+                     limit: Optional[int] = None,
+                     max_pages: Optional[int] = None,
+                     source: str = "remote",
+                     **extra_options) -> ResultSet | None:
+        """
+        Search for anime using the given keyword without blocking the event loop, see Searcher.search.
+
+        Args:
+            keyword: Search keyword
+            collected: Whether to collect results
+            proxies: Proxy settings
+            system_proxy: Whether to use system proxy
+            limit: Maximum number of results, unlimited if omitted
+            max_pages: Maximum number of pages to request, unlimited if omitted
+            source: 'remote' to search the site, 'local' to query the catalog instead
+            **extra_options: Additional search options (as param strings), or the
+                filters of Catalog.search for a local search
+
+        Returns:
+            Result set of found animes or None if search fails
+
+        Raises:
+            ValueError: If a local search is requested without a catalog
+            SearchRequestError: If search request fails
+            SearchParseError: If search result parsing fails
+        """
+        self.animes = None
+
+        if source == "local":
+            if self.catalog is None:
+                raise ValueError("Local search requires a catalog.")
+
+            self.animes = await asyncio.to_thread(self.catalog.search, keyword, plugin=self.plugin_name, limit=limit,
+                                                  time_format=self.time_format, **extra_options)
+            self.logger.info("Local search completed successfully: %s", keyword)
+            return self.animes
+
+        if limit is not None:
+            async with aclosing(self.iter_search(keyword, collected, proxies, system_proxy,
+                                                 limit=limit, max_pages=max_pages, **extra_options)) as results:
+                self.animes = [anime async for anime in results]
+            return self.animes
+
+        kwargs = self._search_kwargs(keyword, collected, proxies, system_proxy, extra_options)
+        if max_pages is not None:
+            kwargs['max_pages'] = max_pages
+
+        stats = None
+        try:
+            with collect(self.plugin_name, keyword) as stats:
+                self.animes = self._tag(await self._ashared(self.plugin_name, self.plugin.asearch, kwargs), self.plugin_name)
+        except Exception as e:
+            self.logger.error("Search failed for '%s': %r", keyword, e)
+            raise
+        else:
+            self.logger.info("Search completed successfully: %s", keyword)
+        finally:
+            self._record_stats(stats)
+
+        await asyncio.to_thread(self._catalog, self.animes, self.plugin)
+        return self.animes
+
+    async def iter_search(self, keyword: str,
+                          collected: Optional[bool] = None,
+                          proxies: Optional[dict] = None,
+                          system_proxy: Optional[bool] = None,
+                          limit: Optional[int] = None,
+                          max_pages: Optional[int] = None,
+                          slow_start: Optional[bool] = None,
+                          **extra_options) -> AsyncIterator[Anime]:
+        """
+        Asynchronous counterpart of Searcher.iter_search, iterated with ``async for``.
+
+        The pages are walked by the aiter_search of the plugin over the async
+        session. Closing the generator stops requesting further pages.
+
+        Args:
+            keyword: Search keyword
+            collected: Whether to collect results
+            proxies: Proxy settings
+            system_proxy: Whether to use system proxy
+            limit: Maximum number of results, unlimited if omitted
+            max_pages: Maximum number of pages to request, unlimited if omitted
+            slow_start: Request a single page at first, the plugin default if omitted
+            **extra_options: Additional search options (as param strings)
+
+        Yields:
+            Found animes, in result order
+
+        Raises:
+            SearchRequestError: If search request fails
+            SearchParseError: If search result parsing fails
+        """
+        if limit is not None and limit <= 0:
+            return
+
+        kwargs = self._search_kwargs(keyword, collected, proxies, system_proxy, extra_options)
+        if max_pages is not None:
+            kwargs['max_pages'] = max_pages
+        if slow_start is not None:
+            kwargs['slow_start'] = slow_start
+
+        batch: List[Anime] = []
+        stats = SearchStats(self.plugin_name, keyword)
+        count = 0
+
+        try:
+            async with aclosing(aiter_collected(self.plugin.aiter_search(**kwargs), stats)) as animes:
+                async for anime in animes:
+                    if anime.plugin is None:
+                        anime.plugin = self.plugin_name
+
+                    if self.catalog is not None:
+                        batch.append(anime)
+                        if len(batch) >= CATALOG_BATCH_SIZE:
+                            await asyncio.to_thread(self._catalog, batch, self.plugin)
+                            batch = []
+
+                    yield anime
+                    count += 1
+                    if count == limit:
+                        break
+        except Exception as e:
+            self.logger.error("Search failed for '%s': %r", keyword, e)
+            raise
+        else:
+            self.logger.info("Search completed successfully: %s", keyword)
+        finally:
+            if batch:
+                await asyncio.to_thread(self._catalog, batch, self.plugin)
+            self._record_stats(stats)
+
+    async def watch(self, keyword: str,
+                    collected: Optional[bool] = None,
+                    proxies: Optional[dict] = None,
+                    system_proxy: Optional[bool] = None,
+                    max_pages: Optional[int] = None,
+                    **extra_options) -> ResultSet:
+        """
+        Search for the releases published since the last watch of the keyword, see Searcher.watch.
+
+        Args:
+            keyword: Search keyword
+            collected: Whether to collect results
+            proxies: Proxy settings
+            system_proxy: Whether to use system proxy
+            max_pages: Maximum number of pages to request, unlimited if omitted
+            **extra_options: Additional search options (as param strings)
+
+        Returns:
+            Result set of the new releases, newest first
+
+        Raises:
+            ValueError: If the searcher has no watch state
+            SearchRequestError: If search request fails
+            SearchParseError: If search result parsing fails
+        """
+        if self.watch_state is None:
+            raise ValueError("Watch mode requires a watch state.")
+
+        self.animes = None
+        mark = await asyncio.to_thread(self.watch_state.get, self.plugin_name, keyword)
+        animes: List[Anime] = []
+
+        async with aclosing(self.iter_search(keyword, collected, proxies, system_proxy, max_pages=max_pages,
+                                             slow_start=True if mark is not None else None, **extra_options)) as results:
+            async for anime in results:
+                if mark is not None and mark.seen(anime):
+                    break
+                animes.append(anime)
+
+        await asyncio.to_thread(self.watch_state.update, self.plugin_name, keyword, animes)
+        self.logger.info("Watch found %d new releases: %s", len(animes), keyword)
+
+        self.animes = animes
+        return self.animes
+
+    async def search_many(self, keywords: Iterable[str],
+                          collected: Optional[bool] = None,
+                          proxies: Optional[dict] = None,
+                          system_proxy: Optional[bool] = None,
+                          max_pages: Optional[int] = None,
+                          workers: int = DEFAULT_BATCH_WORKERS,
+                          **extra_options) -> Dict[str, KeywordReport]:
+        """
+        Search many keywords as concurrent tasks, see Searcher.search_many.
+
+        Args:
+            keywords: Search keywords, duplicates are searched once
+            collected: Whether to collect results
+            proxies: Proxy settings
+            system_proxy: Whether to use system proxy
+            max_pages: Maximum number of pages to request per keyword, unlimited if omitted
+            workers: Maximum number of keywords searched at once
+            **extra_options: Additional search options (as param strings)
+
+        Returns:
+            The report of every keyword, with its results or its error, in the order of ``keywords``
+        """
+        keywords = list(dict.fromkeys(keywords))
+        async with aclosing(self._arun_many(keywords, collected, proxies, system_proxy, max_pages, workers,
+                                            extra_options)) as runs:
+            reports = {report.keyword: report async for report in runs}
+
+        self.keyword_reports = {keyword: reports[keyword] for keyword in keywords}
+        self.logger.info("Batch search completed for %d/%d keywords",
+                         sum(report.ok for report in reports.values()), len(keywords))
+        return self.keyword_reports
+
+    async def iter_search_many(self, keywords: Iterable[str],
+                               collected: Optional[bool] = None,
+                               proxies: Optional[dict] = None,
+                               system_proxy: Optional[bool] = None,
+                               max_pages: Optional[int] = None,
+                               workers: int = DEFAULT_BATCH_WORKERS,
+                               **extra_options) -> AsyncIterator[Tuple[str, Anime]]:
+        """
+        Asynchronous counterpart of Searcher.iter_search_many, iterated with ``async for``.
+
+        Args:
+            keywords: Search keywords, duplicates are searched once
+            collected: Whether to collect results
+            proxies: Proxy settings
+            system_proxy: Whether to use system proxy
+            max_pages: Maximum number of pages to request per keyword, unlimited if omitted
+            workers: Maximum number of keywords searched at once
+            **extra_options: Additional search options (as param strings)
+
+        Yields:
+            (keyword, anime) pairs, keyword by keyword in completion order
+        """
+        keywords = list(dict.fromkeys(keywords))
+        self.keyword_reports = {}
+
+        async with aclosing(self._arun_many(keywords, collected, proxies, system_proxy, max_pages, workers,
+                                            extra_options)) as runs:
+            async for report in runs:
+                animes, report.animes = report.animes, None
+                self.keyword_reports[report.keyword] = report
+                for anime in animes or ():
+                    yield report.keyword, anime
+
+    async def _arun_many(self, keywords: Sequence[str],
+                         collected: Optional[bool],
+                         proxies: Optional[dict],
+                         system_proxy: Optional[bool],
+                         max_pages: Optional[int],
+                         workers: int,
+                         extra_options: Dict[str, Any]) -> AsyncIterator[KeywordReport]:
+        """Search keywords as tasks, yielding their reports in completion order."""
+        options = {**extra_options, **({} if max_pages is None else {'max_pages': max_pages})}
+
+        async def run(keyword: str) -> KeywordReport:
+            report = KeywordReport(keyword)
+            kwargs = self._search_kwargs(keyword, collected, proxies, system_proxy, options)
+            start = time.perf_counter()
+            try:
+                with collect(self.plugin_name, keyword) as report.stats:
+                    animes = self._tag(await self._ashared(self.plugin_name, self.plugin.asearch, kwargs) or [],
+                                       self.plugin_name)
+                report.animes = ResultSet(animes)
+                await asyncio.to_thread(self._catalog, animes, self.plugin)
+            except Exception as e:
+                report.error = e
+                self.logger.error("Search failed for '%s': %r", keyword, e)
+            finally:
+                report.elapsed = time.perf_counter() - start
+                if report.stats is not None:
+                    notify(report.stats, self.metrics, self.on_stats)
+            return report
+
+        remaining = iter(keywords)
+        finished: List[SearchStats] = []
+        # Only keep ``workers`` keywords in flight, so results wait for the consumer in bounded number
+        pending = {asyncio.ensure_future(run(keyword)) for keyword in islice(remaining, max(1, workers))}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    report = task.result()
+                    if report.stats is not None:
+                        finished.append(report.stats)
+                    keyword = next(remaining, None)
+                    if keyword is not None:
+                        pending.add(asyncio.ensure_future(run(keyword)))
+                    yield report
+        finally:
+            for task in pending:
+                task.cancel()
+            self.last_stats = SearchStats.merge(self.plugin_name, f"{len(finished)} keywords", finished)
+
+    async def _ashared(self, plugin_name: str, search: Callable[..., Any],
+                       kwargs: Dict[str, Any]) -> List[Anime] | None:
+        """Run an asynchronous plugin search, through the single-flight layer when the searcher has one."""
+        if self.singleflight is None:
+            return await search(**kwargs)
+
+        ran = []
+
+        async def lead(**options) -> List[Anime] | None:
+            ran.append(True)
+            return await search(**options)
+
+        animes = await self.singleflight.ado(self._flight_key(plugin_name, kwargs), lead, **kwargs)
+        return self._own(animes, not ran)
+
+    async def search_all(self, keyword: str,
+                         plugins: Sequence[str] = DEFAULT_PLUGINS,
+                         collected: Optional[bool] = None,
+                         proxies: Optional[dict] = None,
+                         system_proxy: Optional[bool] = None,
+                         timeout: Optional[float] = None,
+                         **extra_options) -> ResultSet:
+        """
+        Search several plugins concurrently and merge their results, see Searcher.search_all.
+
+        Args:
+            keyword: Search keyword
+            plugins: Names of the plugins to search, duplicates are searched once,
+                defaults to all bundled plugins
+            collected: Whether to collect results
+            proxies: Proxy settings
+            system_proxy: Whether to use system proxy
+            timeout: Seconds to wait for each plugin, unlimited if omitted
+            **extra_options: Additional search options (as param strings)
+
+        Returns:
+            Merged result set of found animes
+        """
+        plugins = list(dict.fromkeys(plugins))
+        self.animes = None
+        self.plugin_reports = {name: PluginReport(name) for name in plugins}
+
+        kwargs = self._search_kwargs(keyword, collected, proxies, system_proxy, extra_options)
+
+        def load() -> Dict[str, Any]:
+            # One after the other, as loading a plugin sets the time format of the searcher
+            loaded = {}
+            for name in plugins:
+                try:
+                    loaded[name] = self._fanout_plugin(name)
+                except Exception as e:
+                    self.plugin_reports[name].error = e
+                    self.logger.error("Search failed for '%s' on %s: %r", keyword, name, e)
+            return loaded
+
+        # Importing the plugins is blocking, so it runs on a worker thread
+        loaded = await asyncio.to_thread(load)
+
+        async def run(name: str) -> List[Anime]:
+            report = self.plugin_reports[name]
+            start = time.perf_counter()
+            try:
+                with collect(name, keyword) as report.stats:
+                    plugin = loaded[name]
+                    animes = self._tag(await asyncio.wait_for(self._ashared(name, plugin.asearch, kwargs), timeout) or [], name)
+                    await asyncio.to_thread(self._catalog, animes, plugin)
+            except asyncio.TimeoutError:
+                report.error = TimeoutError(f"Plugin {name} did not finish within {timeout} seconds")
+            except Exception as e:
+                report.error = e
+            else:
+                report.count = len(animes)
+                return animes
+            finally:
+                report.elapsed = time.perf_counter() - start
+
+            self.logger.error("Search failed for '%s' on %s: %r", keyword, name, report.error)
+            return []
+
+        results = await asyncio.gather(*(run(name) for name in plugins if name in loaded))
+        self._record_fanout_stats(keyword, plugins, list(loaded))
+        self.animes = self._merge(results)
+        self.logger.info("Search completed on %d/%d plugins: %s",
+                         sum(report.ok for report in self.plugin_reports.values()), len(plugins), keyword)
+
+        return self.animes
+
+    async def aclose(self) -> None:
+        """Close the async HTTP session owned by this searcher, if any."""
+        if self.async_session is not None:
+            await self.async_session.close()
+
+    async def __aenter__(self) -> "AsyncSearcher":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
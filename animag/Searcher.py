@@ -1,10 +1,61 @@
-import copy
 import csv
+import threading
 import time
-from typing import List, Dict, Any
-
-from . import *
-from . import plugins
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import closing
+from contextvars import copy_context
+from dataclasses import dataclass
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, Sequence, Callable, Optional, Tuple
+
+from . import plugins, get_logger, no_errors, ExportError, SaveCSVError, TimeFormatError
+from .component.cache import HTTPCache
+from .component.catalog import Catalog
+from .component.dedup import Deduplicator, DEFAULT_DEDUPLICATOR
+from .component.export import export, FIELDS
+from .component.metrics import SearchStats, MetricsRegistry, collect, current_stats, iter_collected, notify
+from .component.Anime import Anime, TimeFormat
+from .component.ResultSet import ResultSet
+from .component.singleflight import SingleFlight
+from .component.watch import WatchState
+from .component.webget import RequestSession
+
+DEFAULT_PLUGINS = ('dmhy', 'nyaa', 'tokyotosho', 'acgrip', '_miobt')
+CATALOG_BATCH_SIZE = 100
+DEFAULT_BATCH_WORKERS = 8
+CSV_FIELDS = ('time', 'title', 'size', 'magnet')
+
+
+@dataclass
+class PluginReport:
+    """Outcome of one plugin in a fan-out search."""
+    plugin: str
+    elapsed: float = 0.0
+    count: int = 0
+    error: Optional[BaseException] = None
+    stats: Optional[SearchStats] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class KeywordReport:
+    """Outcome of one keyword of a batch search."""
+    keyword: str
+    animes: Optional[ResultSet] = None
+    elapsed: float = 0.0
+    error: Optional[BaseException] = None
+    stats: Optional[SearchStats] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def count(self) -> int:
+        return len(self.animes) if self.animes is not None else 0
 
 
 class Searcher:
@@ -12,7 +63,19 @@ class Searcher:
                  parser: Optional[str] = None,
                  verify: Optional[bool] = None,
                  timefmt: Optional[str] = None,
-                 no_search_errors: bool = False) -> None:
+                 no_search_errors: bool = False,
+                 session: Optional[RequestSession] = None,
+                 prefetch: Optional[int] = None,
+                 cache: Optional[HTTPCache] = None,
+                 cache_ttl: Optional[float] = None,
+                 catalog: Optional[Catalog] = None,
+                 backend: Optional[str] = None,
+                 watch_state: Optional[WatchState] = None,
+                 metrics: Optional[MetricsRegistry] = None,
+                 on_stats: Optional[Callable[[SearchStats], None]] = None,
+                 log_level: Optional[int] = None,
+                 singleflight: Optional[SingleFlight] = None,
+                 deduplicator: Optional[Deduplicator] = None) -> None:
         """
         Initialize Searcher object.
 
@@ -22,21 +85,58 @@ class Searcher:
             verify: Whether to verify
             timefmt: Time format
             no_search_errors: If True, search errors will be suppressed
+            session: Pooled HTTP session owned by this searcher, the process-wide
+                shared session is used if omitted
+            prefetch: Number of result pages kept in flight while paginating
+            cache: Persistent HTTP cache for the pages requested by the plugin
+            cache_ttl: Seconds a cached result page stays fresh, the plugin default if omitted
+            catalog: Local catalog keeping every anime found, which also answers local searches
+            backend: HTML parsing backend of the plugin, 'soup' or 'lxml' (the default)
+            watch_state: High-water marks of the keywords polled with watch
+            metrics: Registry accumulating the stats of every search, for Prometheus export
+            on_stats: Function called with the stats of every finished search, see last_stats
+            log_level: Logging level of this searcher and its plugins, like logging.INFO to skip
+                the debug records of every parsed row, the level of the global logger if omitted
+            singleflight: Shared by the searchers of a service, identical searches running at the
+                same time then share a single crawl, see SingleFlight
+            deduplicator: Engine merging the results of search_all, DEFAULT_DEDUPLICATOR if omitted
 
         Raises:
             ValueError: If time format is invalid
             PluginImportError: If plugin is not found
         """
-        self.timefmt: Optional[str] = None
-        self.animes: List[Anime] | None = None
+        self.time_format: Optional[TimeFormat] = None
+        self._animes: ResultSet | None = None
         self.anime: Anime | None = None
+        self.session: Optional[RequestSession] = session
+        self.plugin_name = plugin_name
+        self.plugin_reports: Dict[str, PluginReport] = {}
+        self.keyword_reports: Dict[str, KeywordReport] = {}
+        self._parser = parser
+        self._verify = verify
+        self._prefetch = prefetch
+        self.cache: Optional[HTTPCache] = cache
+        self._cache_ttl = cache_ttl
+        self.catalog: Optional[Catalog] = catalog
+        self._backend = backend
+        self.watch_state: Optional[WatchState] = watch_state
+        self.metrics: Optional[MetricsRegistry] = metrics
+        self.on_stats: Optional[Callable[[SearchStats], None]] = on_stats
+        self.last_stats: Optional[SearchStats] = None
+        self.logger = get_logger(log_level)
+        self.singleflight: Optional[SingleFlight] = singleflight
+        self.deduplicator: Deduplicator = deduplicator or DEFAULT_DEDUPLICATOR
 
         if no_search_errors:
-            log.warning("Search errors will not be raised.")
+            self.logger.warning("Search errors will not be raised.")
             self.search = no_errors(self.search)
+            self.search_all = no_errors(self.search_all)
+            self.watch = no_errors(self.watch)
 
         self.plugin = self._load_plugin(plugin_name, parser, verify, timefmt)
-        log.debug("New searcher object created.")
+        # Plugins of the fan-out searches, loaded once
+        self._plugins: Dict[str, Any] = {plugin_name: self.plugin}
+        self.logger.debug("New searcher object created.")
 
     def _load_plugin(self, plugin_name: str,
                      parser: Optional[str],
@@ -54,14 +154,64 @@ class Searcher:
             kwargs['timefmt'] = self.timefmt
 
         plugin = plugins.get_plugin(plugin_name)(**kwargs)
+        if self.time_format is None:
+            self.time_format = plugin.time_format
+        else:
+            plugin.time_format = self.time_format
+        plugin.session = self.session
+        plugin.logger = self.logger
+        if self._prefetch is not None:
+            plugin.prefetch = self._prefetch
+        plugin.cache = self.cache
+        if self._backend is not None:
+            if self._backend not in plugins.BACKENDS:
+                raise ValueError(f"Invalid parsing backend {self._backend}, expected one of {plugins.BACKENDS}")
+            plugin.backend = self._backend
+        if self._cache_ttl is not None:
+            plugin.cache_ttl = self._cache_ttl
+
+        self.logger.info("Successfully loaded plugin: %s", plugin_name)
+        return plugin
 
-        log.info(f"Successfully loaded plugin: {plugin_name}")
+    def _fanout_plugin(self, plugin_name: str) -> Any:
+        """Get the plugin of a fan-out search, loading it on first use with the settings of the searcher."""
+        plugin = self._plugins.get(plugin_name)
+        if plugin is None:
+            plugin = self._plugins[plugin_name] = self._load_plugin(plugin_name, self._parser, self._verify, None)
         return plugin
 
+    @property
+    def animes(self) -> ResultSet | None:
+        """Results of the last search, None if there are none."""
+        return self._animes
+
+    @animes.setter
+    def animes(self, animes: Iterable[Anime] | None) -> None:
+        self._animes = animes if animes is None or isinstance(animes, ResultSet) else ResultSet(animes)
+
+    def close(self) -> None:
+        """Close the HTTP session owned by this searcher, if any."""
+        if self.session is not None:
+            self.session.close()
+
+    def __enter__(self) -> "Searcher":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @property
+    def timefmt(self) -> Optional[str]:
+        """Format of the release times of the results."""
+        return None if self.time_format is None else self.time_format.fmt
+
     def settimefmt(self, timefmt: str) -> None:
         """
         Set and validate the time format.
 
+        The results share the time format of the searcher and format their release
+        time when it is read, so the change applies to them at once.
+
         Args:
             timefmt: Time format string
 
@@ -73,17 +223,19 @@ class Searcher:
         except Exception as e:
             raise TimeFormatError(f"Invalid time format {timefmt} : {e!r}")
 
-        self.timefmt = timefmt
-
-        if self.animes is not None:
-            for anime in self.animes:
-                anime.set_timefmt(timefmt)
+        if self.time_format is None:
+            self.time_format = TimeFormat(timefmt)
+        else:
+            self.time_format.fmt = timefmt
 
     def search(self, keyword: str,
                collected: Optional[bool] = None,
                proxies: Optional[dict] = None,
                system_proxy: Optional[bool] = None,
-               **extra_options) -> List[Anime] | None:
+               limit: Optional[int] = None,
+               max_pages: Optional[int] = None,
+               source: str = "remote",
+               **extra_options) -> ResultSet | None:
         """
         Search for anime using the given keyword.
 
@@ -92,18 +244,421 @@ class Searcher:
             collected: Whether to collect results
             proxies: Proxy settings
             system_proxy: Whether to use system proxy
+            limit: Maximum number of results, unlimited if omitted
+            max_pages: Maximum number of pages to request, unlimited if omitted
+            source: 'remote' to search the site, 'local' to query the catalog instead
+            **extra_options: Additional search options (as param strings), or the
+                filters of Catalog.search for a local search
+
+        Returns:
+            Result set of found animes or None if search fails
+
+        Raises:
+            ValueError: If a local search is requested without a catalog
+            SearchRequestError: If search request fails
+            SearchParseError: If search result parsing fails
+        """
+        self.animes = None
+
+        if source == "local":
+            if self.catalog is None:
+                raise ValueError("Local search requires a catalog.")
+
+            self.animes = self.catalog.search(keyword, plugin=self.plugin_name, limit=limit,
+                                              time_format=self.time_format, **extra_options)
+            self.logger.info("Local search completed successfully: %s", keyword)
+            return self.animes
+
+        if limit is not None:
+            self.animes = list(self.iter_search(keyword, collected, proxies, system_proxy,
+                                                limit=limit, max_pages=max_pages, **extra_options))
+            return self.animes
+
+        kwargs = self._search_kwargs(keyword, collected, proxies, system_proxy, extra_options)
+        if max_pages is not None:
+            kwargs['max_pages'] = max_pages
+
+        stats = None
+        try:
+            with collect(self.plugin_name, keyword) as stats:
+                self.animes = self._tag(self._shared(self.plugin_name, self.plugin.search, kwargs), self.plugin_name)
+        except Exception as e:
+            self.logger.error("Search failed for '%s': %r", keyword, e)
+            raise
+        else:
+            self.logger.info("Search completed successfully: %s", keyword)
+        finally:
+            self._record_stats(stats)
+
+        self._catalog(self.animes, self.plugin)
+        return self.animes
+
+    def iter_search(self, keyword: str,
+                    collected: Optional[bool] = None,
+                    proxies: Optional[dict] = None,
+                    system_proxy: Optional[bool] = None,
+                    limit: Optional[int] = None,
+                    max_pages: Optional[int] = None,
+                    slow_start: Optional[bool] = None,
+                    **extra_options) -> Iterator[Anime]:
+        """
+        Search for anime using the given keyword, yielding results as each page is parsed.
+
+        No further pages are requested once ``limit`` results have been yielded or the
+        generator is closed. The results are not stored in ``self.animes``.
+
+        Args:
+            keyword: Search keyword
+            collected: Whether to collect results
+            proxies: Proxy settings
+            system_proxy: Whether to use system proxy
+            limit: Maximum number of results, unlimited if omitted
+            max_pages: Maximum number of pages to request, unlimited if omitted
+            slow_start: Request a single page at first, doubling the pages in flight after
+                each full page, for searches likely to stop early. The plugin default if omitted
+            **extra_options: Additional search options (as param strings)
+
+        Yields:
+            Found animes, in result order
+
+        Raises:
+            SearchRequestError: If search request fails
+            SearchParseError: If search result parsing fails
+        """
+        kwargs = self._search_kwargs(keyword, collected, proxies, system_proxy, extra_options)
+        if max_pages is not None:
+            kwargs['max_pages'] = max_pages
+        if slow_start is not None:
+            kwargs['slow_start'] = slow_start
+
+        batch: List[Anime] = []
+        stats = SearchStats(self.plugin_name, keyword)
+
+        try:
+            with closing(iter_collected(self.plugin.iter_search(**kwargs), stats)) as animes:
+                for anime in islice(animes, limit):
+                    if anime.plugin is None:
+                        anime.plugin = self.plugin_name
+
+                    if self.catalog is not None:
+                        batch.append(anime)
+                        if len(batch) >= CATALOG_BATCH_SIZE:
+                            self._catalog(batch, self.plugin)
+                            batch = []
+
+                    yield anime
+        except Exception as e:
+            self.logger.error("Search failed for '%s': %r", keyword, e)
+            raise
+        else:
+            self.logger.info("Search completed successfully: %s", keyword)
+        finally:
+            self._catalog(batch, self.plugin)
+            self._record_stats(stats)
+
+    def watch(self, keyword: str,
+              collected: Optional[bool] = None,
+              proxies: Optional[dict] = None,
+              system_proxy: Optional[bool] = None,
+              max_pages: Optional[int] = None,
+              **extra_options) -> ResultSet:
+        """
+        Search for the releases published since the last watch of the keyword.
+
+        Result pages are walked newest first, starting with a single request, and
+        the walk stops at the first release returned by a previous watch, so a poll
+        without new releases costs one request. The first watch of a keyword returns
+        every result. The high-water mark in ``self.watch_state`` only moves once
+        the search succeeds.
+
+        Args:
+            keyword: Search keyword
+            collected: Whether to collect results
+            proxies: Proxy settings
+            system_proxy: Whether to use system proxy
+            max_pages: Maximum number of pages to request, unlimited if omitted
             **extra_options: Additional search options (as param strings)
 
         Returns:
-            List of found animes or None if search fails
+            Result set of the new releases, newest first
 
         Raises:
+            ValueError: If the searcher has no watch state
             SearchRequestError: If search request fails
             SearchParseError: If search result parsing fails
         """
+        if self.watch_state is None:
+            raise ValueError("Watch mode requires a watch state.")
+
         self.animes = None
+        mark = self.watch_state.get(self.plugin_name, keyword)
+        animes: List[Anime] = []
+
+        with closing(self.iter_search(keyword, collected, proxies, system_proxy, max_pages=max_pages,
+                                      slow_start=True if mark is not None else None, **extra_options)) as results:
+            for anime in results:
+                if mark is not None and mark.seen(anime):
+                    break
+                animes.append(anime)
+
+        self.watch_state.update(self.plugin_name, keyword, animes)
+        self.logger.info("Watch found %d new releases: %s", len(animes), keyword)
+
+        self.animes = animes
+        return self.animes
+
+    def search_all(self, keyword: str,
+                   plugins: Sequence[str] = DEFAULT_PLUGINS,
+                   collected: Optional[bool] = None,
+                   proxies: Optional[dict] = None,
+                   system_proxy: Optional[bool] = None,
+                   timeout: Optional[float] = None,
+                   **extra_options) -> ResultSet:
+        """
+        Search several plugins concurrently and merge their results.
+
+        Results of the same release are deduplicated with ``self.deduplicator``, by
+        magnet hash, or by link for results without one, and also by title and size
+        when the searcher was given ``Deduplicator(fuzzy=True)``, keeping the first
+        occurrence in the order of ``plugins``. A plugin that fails or exceeds ``timeout``
+        does not affect the others, and the results of a plugin which exceeds it are
+        neither returned nor stored in the catalog; the outcome of each plugin is
+        stored in ``self.plugin_reports``. The plugins are loaded once per searcher.
 
-        kwargs = {
+        Args:
+            keyword: Search keyword
+            plugins: Names of the plugins to search, duplicates are searched once,
+                defaults to all bundled plugins
+            collected: Whether to collect results
+            proxies: Proxy settings
+            system_proxy: Whether to use system proxy
+            timeout: Seconds to wait for the slowest plugin, unlimited if omitted
+            **extra_options: Additional search options (as param strings)
+
+        Returns:
+            Merged result set of found animes
+        """
+        plugins = list(dict.fromkeys(plugins))
+        self.animes = None
+        self.plugin_reports = {name: PluginReport(name) for name in plugins}
+
+        kwargs = self._search_kwargs(keyword, collected, proxies, system_proxy, extra_options)
+        # Reports filled by the workers, only kept once they are done
+        reports = {name: PluginReport(name) for name in plugins}
+        # Set once search_all gave up on the plugins still running, which must then leave the catalog alone
+        abandoned = threading.Event()
+
+        def run(plugin: Any, report: PluginReport) -> List[Anime]:
+            start = time.perf_counter()
+            try:
+                with collect(report.plugin, keyword) as report.stats:
+                    animes = self._tag(self._shared(report.plugin, plugin.search, kwargs) or [], report.plugin)
+                    if not abandoned.is_set():
+                        self._catalog(animes, plugin)
+                return animes
+            finally:
+                report.elapsed = time.perf_counter() - start
+
+        futures = {}
+        executor = ThreadPoolExecutor(max_workers=max(1, len(plugins)), thread_name_prefix="search-all")
+        try:
+            for name in plugins:
+                # Plugins are loaded here rather than by the workers, which would share the time format
+                # of the searcher while it is being set
+                try:
+                    plugin = self._fanout_plugin(name)
+                except Exception as e:
+                    self.plugin_reports[name].error = e
+                    continue
+                futures[name] = executor.submit(copy_context().run, run, plugin, reports[name])
+            wait(futures.values(), timeout=timeout)
+        finally:
+            abandoned.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        results: Dict[str, List[Anime]] = {}
+        finished: List[str] = []
+        for name in plugins:
+            report = self.plugin_reports[name]
+            future = futures.get(name)
+            if future is not None and not future.done():
+                # The worker may still be running, it keeps its own report
+                report.elapsed = timeout
+                report.error = TimeoutError(f"Plugin {name} did not finish within {timeout} seconds")
+            elif future is not None:
+                report = self.plugin_reports[name] = reports[name]
+                finished.append(name)
+                if future.exception() is not None:
+                    report.error = future.exception()
+                else:
+                    results[name] = future.result()
+                    report.count = len(results[name])
+
+            if report.error is not None:
+                self.logger.error("Search failed for '%s' on %s: %r", keyword, name, report.error)
+
+        self._record_fanout_stats(keyword, plugins, finished)
+        self.animes = self._merge(results[name] for name in plugins if name in results)
+        self.logger.info("Search completed on %d/%d plugins: %s", len(results), len(plugins), keyword)
+
+        return self.animes
+
+    def search_many(self, keywords: Iterable[str],
+                    collected: Optional[bool] = None,
+                    proxies: Optional[dict] = None,
+                    system_proxy: Optional[bool] = None,
+                    max_pages: Optional[int] = None,
+                    workers: int = DEFAULT_BATCH_WORKERS,
+                    **extra_options) -> Dict[str, KeywordReport]:
+        """
+        Search many keywords with the plugin of the searcher, several at a time.
+
+        Up to ``workers`` keywords are searched at once over the HTTP session of
+        the searcher, and the requests of all of them share the per-host budgets
+        of its rate limiter (see RateLimiter), which bound the load on each site.
+        A keyword that fails does not abort the batch. ``self.animes`` is left
+        untouched, the outcome of every keyword is also stored in ``self.keyword_reports``.
+
+        Args:
+            keywords: Search keywords, duplicates are searched once
+            collected: Whether to collect results
+            proxies: Proxy settings
+            system_proxy: Whether to use system proxy
+            max_pages: Maximum number of pages to request per keyword, unlimited if omitted
+            workers: Maximum number of keywords searched at once
+            **extra_options: Additional search options (as param strings)
+
+        Returns:
+            The report of every keyword, with its results or its error, in the order of ``keywords``
+        """
+        keywords = list(dict.fromkeys(keywords))
+        reports = {report.keyword: report for report in
+                   self._run_many(keywords, collected, proxies, system_proxy, max_pages, workers, extra_options)}
+
+        self.keyword_reports = {keyword: reports[keyword] for keyword in keywords}
+        self.logger.info("Batch search completed for %d/%d keywords",
+                         sum(report.ok for report in reports.values()), len(keywords))
+        return self.keyword_reports
+
+    def iter_search_many(self, keywords: Iterable[str],
+                         collected: Optional[bool] = None,
+                         proxies: Optional[dict] = None,
+                         system_proxy: Optional[bool] = None,
+                         max_pages: Optional[int] = None,
+                         workers: int = DEFAULT_BATCH_WORKERS,
+                         **extra_options) -> Iterator[Tuple[str, Anime]]:
+        """
+        Search many keywords like search_many, yielding the results of each keyword as soon as it is done.
+
+        At most ``workers`` keywords are searched ahead of the consumer, so a batch
+        of any size is streamed in bounded memory. Failed keywords yield nothing,
+        their errors are stored in ``self.keyword_reports`` along with the other
+        outcomes, without their results.
+
+        Args:
+            keywords: Search keywords, duplicates are searched once
+            collected: Whether to collect results
+            proxies: Proxy settings
+            system_proxy: Whether to use system proxy
+            max_pages: Maximum number of pages to request per keyword, unlimited if omitted
+            workers: Maximum number of keywords searched at once
+            **extra_options: Additional search options (as param strings)
+
+        Yields:
+            (keyword, anime) pairs, keyword by keyword in completion order
+        """
+        keywords = list(dict.fromkeys(keywords))
+        self.keyword_reports = {}
+
+        for report in self._run_many(keywords, collected, proxies, system_proxy, max_pages, workers, extra_options):
+            animes, report.animes = report.animes, None
+            self.keyword_reports[report.keyword] = report
+            for anime in animes or ():
+                yield report.keyword, anime
+
+    def _run_many(self, keywords: Sequence[str],
+                  collected: Optional[bool],
+                  proxies: Optional[dict],
+                  system_proxy: Optional[bool],
+                  max_pages: Optional[int],
+                  workers: int,
+                  extra_options: Dict[str, Any]) -> Iterator[KeywordReport]:
+        """Search keywords on a pool of workers, yielding their reports in completion order."""
+        options = {**extra_options, **({} if max_pages is None else {'max_pages': max_pages})}
+
+        def run(keyword: str) -> KeywordReport:
+            report = KeywordReport(keyword)
+            kwargs = self._search_kwargs(keyword, collected, proxies, system_proxy, options)
+            start = time.perf_counter()
+            try:
+                with collect(self.plugin_name, keyword) as report.stats:
+                    animes = self._tag(self._shared(self.plugin_name, self.plugin.search, kwargs) or [],
+                                       self.plugin_name)
+                report.animes = ResultSet(animes)
+                self._catalog(animes, self.plugin)
+            except Exception as e:
+                report.error = e
+                self.logger.error("Search failed for '%s': %r", keyword, e)
+            finally:
+                report.elapsed = time.perf_counter() - start
+                if report.stats is not None:
+                    notify(report.stats, self.metrics, self.on_stats)
+            return report
+
+        remaining = iter(keywords)
+        finished: List[SearchStats] = []
+        executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="search-many")
+        try:
+            # Only keep ``workers`` keywords in flight, so results wait for the consumer in bounded number
+            pending = {executor.submit(copy_context().run, run, keyword) for keyword in islice(remaining, workers)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    report = future.result()
+                    if report.stats is not None:
+                        finished.append(report.stats)
+                    keyword = next(remaining, None)
+                    if keyword is not None:
+                        pending.add(executor.submit(copy_context().run, run, keyword))
+                    yield report
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.last_stats = SearchStats.merge(self.plugin_name, f"{len(finished)} keywords", finished)
+
+    def _record_stats(self, stats: Optional[SearchStats]) -> None:
+        """Keep the stats of a finished search and hand them to the metrics registry and the callback."""
+        if stats is None:
+            return
+
+        self.last_stats = stats
+        notify(stats, self.metrics, self.on_stats)
+
+    def _record_fanout_stats(self, keyword: str, plugins: Sequence[str], finished: Sequence[str]) -> None:
+        """Hand the stats of the finished plugins of a fan-out search over, keeping their combination."""
+        stats = [self.plugin_reports[name].stats for name in finished if self.plugin_reports[name].stats]
+        for item in stats:
+            notify(item, self.metrics, self.on_stats)
+
+        self.last_stats = SearchStats.merge("+".join(plugins), keyword, stats)
+
+    def _catalog(self, animes: List[Anime] | None, plugin: Any) -> None:
+        """Store search results in the catalog, if there is one."""
+        if self.catalog is None or not animes:
+            return
+
+        try:
+            self.catalog.upsert(animes, plugin.timefmt)
+        except Exception as e:
+            self.logger.error("Failed to store results in the catalog: %r", e)
+
+    @staticmethod
+    def _search_kwargs(keyword: str,
+                       collected: Optional[bool],
+                       proxies: Optional[dict],
+                       system_proxy: Optional[bool],
+                       extra_options: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the keyword arguments of a plugin search, leaving out unset options."""
+        return {
             'keyword': keyword,
             **({} if collected is None else {'collected': collected}),
             **({} if not proxies else {'proxies': proxies}),
@@ -111,38 +666,110 @@ class Searcher:
             **extra_options
         }
 
-        try:
-            self.animes = self.plugin.search(**kwargs)
-        except Exception as e:
-            log.error(f"Search failed for '{keyword}': {e!r}")
-            raise
-        else:
-            log.info(f"Search completed successfully: {keyword}")
+    @staticmethod
+    def _flight_key(plugin_name: str, kwargs: Dict[str, Any]) -> tuple:
+        """Key of the plugin searches giving the same results, proxies aside."""
+        options = sorted((name, repr(value)) for name, value in kwargs.items()
+                         if name not in ('proxies', 'system_proxy'))
+        return plugin_name, tuple(options)
 
-        return self.animes
+    def _shared(self, plugin_name: str, search: Callable[..., List[Anime] | None],
+                kwargs: Dict[str, Any]) -> List[Anime] | None:
+        """Run a plugin search, through the single-flight layer when the searcher has one."""
+        if self.singleflight is None:
+            return search(**kwargs)
+
+        ran = []
+
+        def lead(**options) -> List[Anime] | None:
+            ran.append(True)
+            return search(**options)
+
+        animes = self.singleflight.do(self._flight_key(plugin_name, kwargs), lead, **kwargs)
+        return self._own(animes, not ran)
+
+    def _own(self, animes: List[Anime] | None, shared: bool) -> List[Anime] | None:
+        """
+        Copy the results handed out by the single-flight layer, marking the current search as shared.
+
+        Every caller, the one which ran the search included, gets its own copies of
+        the results, bound to the time format of its searcher, so that formatting
+        them does not change the results of the other callers.
+        """
+        stats = current_stats()
+        if shared and stats is not None:
+            stats.shared = True
+        return None if animes is None else [anime.copy(self.time_format) for anime in animes]
+
+    @staticmethod
+    def _tag(animes: List[Anime] | None, plugin_name: str) -> List[Anime] | None:
+        """Record the plugin name on results that do not carry one yet."""
+        for anime in animes or ():
+            if anime.plugin is None:
+                anime.plugin = plugin_name
+        return animes
+
+    def _merge(self, results: Iterable[List[Anime]]) -> List[Anime]:
+        """Merge result lists, dropping later duplicates of the same release."""
+        return self.deduplicator.dedupe(anime for animes in results for anime in animes)
 
     def size_format_all(self, unit: str = 'MB') -> None:
         """
         Convert the size of all anime in the search results to the specified unit.
 
+        The results are replaced with formatted copies, see ResultSet.size_format.
+
         Args:
             unit: Target size unit, default is 'MB'
 
         Raises:
             ValueError: If no search results exist
-            SizeFormatError: If size format fails
+            SizeFormatError: If size format fails, the results are then left unchanged
         """
         if self.animes is None:
             raise ValueError("No search results available.")
 
+        self.animes.size_format(unit)
+
+    def export(self, filename: str,
+               animes: Optional[Iterable[Anime]] = None,
+               fmt: Optional[str] = None,
+               compression: Optional[str] = None,
+               append: bool = False,
+               fields: Sequence[str] = FIELDS) -> int:
+        """
+        Stream search results to a CSV or JSON Lines file, compressed if its name ends with .gz or .zst.
+
+        Pass the generator of iter_search as ``animes`` to export a search while it
+        runs, without holding its results in memory.
+
+        Args:
+            filename: Name of the file
+            animes: Results to export, the results of the last search if omitted
+            fmt: 'csv' or 'jsonl', guessed from the file name if omitted
+            compression: 'gzip' or 'zstd', guessed from the file name if omitted
+            append: Add to the file instead of overwriting it
+            fields: Fields to write, all of them if omitted
+
+        Returns:
+            Number of exported animes
+
+        Raises:
+            ValueError: If no search results exist, or an option is invalid
+            ExportError: If writing the file fails
+        """
+        if animes is None:
+            if self.animes is None:
+                raise ValueError("No search results available.")
+            animes = self.animes
+
         try:
-            formatted_animes = copy.deepcopy(self.animes)
-            for anime in formatted_animes:
-                anime.size_format(unit)
-        except:
-            raise
-        else:
-            self.animes = formatted_animes
+            count = export(animes, filename, fmt=fmt, compression=compression, append=append, fields=fields)
+        except (OSError, csv.Error) as e:
+            raise ExportError(f"Failed to export to '{filename}': {e!r}")
+
+        self.logger.info("Exported %d animes to %s", count, filename)
+        return count
 
     def save_csv(self, filename: str) -> None:
         """
@@ -158,21 +785,8 @@ class Searcher:
         if self.animes is None:
             raise ValueError("No search results available.")
 
-        fieldnames = ["time", "title", "size", "magnet"]
-
         try:
-            with open(filename, mode='w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-
-                for anime in self.animes:
-                    writer.writerow({
-                        "time": anime.time,
-                        "title": anime.title,
-                        "size": anime.size,
-                        "magnet": anime.magnet
-                    })
-
+            export(self.animes, filename, fmt='csv', fields=CSV_FIELDS)
         except Exception as e:
             raise SaveCSVError(f"Failed to save CSV file '{filename}': {e!r}")
 
@@ -1,32 +1,154 @@
+import importlib
 import logging
+import sys
+import types
+from typing import Optional
 
 LOG_FORMAT = "%(asctime)s %(levelname)s %(message)s"
 LOG_FILE = "animag.log"
 
 
-def setup_logger(name: str = "global", level: int = logging.DEBUG) -> logging.Logger:
+def setup_logger(name: str = "global", level: int = logging.DEBUG,
+                 log_file: Optional[str] = LOG_FILE, background: bool = False) -> logging.Logger:
+    """
+    Attach the file and console handlers of the command line to a logger.
+
+    The library itself only logs to a NullHandler, applications call this (or
+    configure logging themselves) to see the messages.
+
+    Args:
+        name: Name of the logger
+        level: Level of the logger, records below it are discarded before being formatted
+        log_file: Path of the debug log, None for no log file
+        background: Write the records from a background thread through a queue,
+            so that searches never wait for the disk or the console
+
+    Returns:
+        logging.Logger: The logger
+    """
+    global _listener
+
     logger = logging.getLogger(name)
-    if not logger.handlers:
+    if not any(not isinstance(handler, logging.NullHandler) for handler in logger.handlers):
         logger.setLevel(level)
+        handlers = []
 
-        try:
-            file_handler = logging.FileHandler(LOG_FILE, mode='w')
-            file_handler.setLevel(logging.DEBUG)
-            file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
-            logger.addHandler(file_handler)
-        except Exception as e:
-            print(f"Failed to set up file handler: {e!r}")
+        if log_file:
+            try:
+                file_handler = logging.FileHandler(log_file, mode='w')
+                file_handler.setLevel(logging.DEBUG)
+                file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+                handlers.append(file_handler)
+            except Exception as e:
+                print(f"Failed to set up file handler: {e!r}")
 
         stream_handler = logging.StreamHandler()
         stream_handler.setLevel(logging.INFO)
-        logger.addHandler(stream_handler)
+        handlers.append(stream_handler)
+
+        if background:
+            import atexit
+            import queue
+            from logging.handlers import QueueHandler, QueueListener
+
+            records = queue.SimpleQueue()
+            logger.addHandler(QueueHandler(records))
+            _listener = QueueListener(records, *handlers, respect_handler_level=True)
+            _listener.start()
+            # Flush the queued records before the interpreter exits
+            atexit.register(_stop_listener)
+        else:
+            for handler in handlers:
+                logger.addHandler(handler)
+
+    return logger
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(level: Optional[int] = None) -> logging.Logger:
+    """
+    Get the logger of a searcher and its plugins.
+
+    Args:
+        level: Level of the searcher, None to share the level of the global logger
 
+    Returns:
+        logging.Logger: The global logger, or a private child of it with its own
+            level, whose records still go through the handlers of the global logger
+    """
+    if level is None:
+        return log
+
+    # Not registered in the logging manager, so it is freed along with its searcher
+    logger = logging.Logger(f"{log.name}.searcher", level)
+    logger.parent = log
     return logger
 
 
-log = setup_logger()
+log = logging.getLogger("global")
+log.addHandler(logging.NullHandler())
+_listener = None
 
 from .component.errors import *
-from .component.webget import get_html
-from .component.Anime import Anime
-from .Searcher import Searcher
+
+# Public names, imported from their module on first access so that importing
+# animag stays cheap: requests, bs4 and the plugins are only loaded when needed
+_LAZY = {
+    'Searcher': '.Searcher',
+    'AsyncSearcher': '.AsyncSearcher',
+    'Anime': '.component.Anime',
+    'HTTPCache': '.component.cache',
+    'IMMUTABLE': '.component.cache',
+    'Catalog': '.component.catalog',
+    'Deduplicator': '.component.dedup',
+    'Exporter': '.component.export',
+    'ResultSet': '.component.ResultSet',
+    'WatchState': '.component.watch',
+    'RateLimiter': '.component.ratelimit',
+    'SearchStats': '.component.metrics',
+    'MetricsRegistry': '.component.metrics',
+    'SingleFlight': '.component.singleflight',
+    'TitleInfo': '.component.title',
+    'parse_title': '.component.title',
+    'get_html': '.component.webget',
+    'aget_html': '.component.webget',
+    'RequestSession': '.component.webget',
+    'AsyncRequestSession': '.component.webget',
+}
+
+__all__ = ['log', 'setup_logger', 'get_logger', *(name for name in dir() if name.endswith('Error')), *_LAZY]
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+class _Package(types.ModuleType):
+    """
+    Importing the animag.Searcher module binds it on the package, shadowing the
+    Searcher class of the same name: keep the class on the package instead.
+    """
+
+    def __setattr__(self, name, value):
+        if isinstance(value, types.ModuleType) and _LAZY.get(name) == '.' + name:
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
@@ -1,15 +1,29 @@
 import argparse
-from typing import Dict, Any
+import logging
+import sys
+import time
+from functools import lru_cache
+from typing import Dict, Any, TYPE_CHECKING
 
-from rich.console import Console
-from rich.table import Table
+from . import setup_logger
+from .component.watch import DEFAULT_WATCH_FILE
 
-from .Searcher import Searcher
+if TYPE_CHECKING:
+    from rich.console import Console
+    from .Searcher import Searcher
 
-console = Console()
 
+@lru_cache(maxsize=None)
+def get_console() -> "Console":
+    """The rich console of the command line, created on first output."""
+    from rich.console import Console
+    return Console()
 
-def print_results(searcher: Searcher) -> None:
+
+def print_results(searcher: "Searcher") -> None:
+    from rich.table import Table
+
+    console = get_console()
     if not searcher.animes:
         console.print("[bold yellow]搜索结果为空[/bold yellow]")
         return
@@ -18,14 +32,43 @@ def print_results(searcher: Searcher) -> None:
     table.add_column("序号", style="dim", justify="right", width=4)
     table.add_column("标题", style="dim", width=60, overflow="fold")
     table.add_column("大小", style="cyan", justify="right", width=10)
+    if searcher.plugin_reports:
+        table.add_column("来源", style="green", width=10)
 
     for idx, anime in enumerate(searcher.animes, start=1):
-        table.add_row(str(idx), anime.title, anime.size)
+        row = [str(idx), anime.title, anime.size]
+        if searcher.plugin_reports:
+            row.append(anime.plugin)
+        table.add_row(*row)
 
     console.print(table)
 
 
+def print_reports(searcher: "Searcher") -> None:
+    console = get_console()
+    for report in searcher.plugin_reports.values():
+        if report.ok:
+            console.print(f"[dim]{report.plugin}: {report.count} 条结果, 用时 {report.elapsed:.2f}s[/dim]")
+        else:
+            console.print(f"[bold red]{report.plugin}: 搜索失败 ({report.error!r})[/bold red]")
+
+
+def watch(searcher: "Searcher", interval: float, search_params: Dict[str, Any]) -> None:
+    console = get_console()
+    console.print(f"[bold green]每 {interval:g} 秒检查一次新资源, 按 Ctrl+C 退出[/bold green]")
+    try:
+        while True:
+            animes = searcher.watch(**search_params)
+            for anime in animes or ():
+                console.print(f"[cyan]{anime.time}[/cyan] {anime.title} [dim]{anime.size}[/dim]")
+                console.print(f"  [yellow]{anime.magnet}[/yellow]")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        console.print("[bold yellow]已停止监视[/bold yellow]")
+
+
 def get_user_selection(max_index: int) -> int:
+    console = get_console()
     while True:
         try:
             index = int(input("选择一个并输入其序号 (输入 0 退出): "))
@@ -37,25 +80,58 @@ def get_user_selection(max_index: int) -> int:
 
 
 def main() -> None:
-    parser = argparse.ArgumentParser(description="动漫磁力搜索工具:")
+    if sys.argv[1:2] == ['serve']:
+        from .server import main as serve
+        serve(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(description="动漫磁力搜索工具 (animag serve 启动本地 HTTP 搜索服务):")
 
     parser.add_argument('-p', '--plugin', type=str, help='搜索使用的插件', default='dmhy')
     parser.add_argument('-s', '--search', type=str, help='搜索关键词', required=True)
     parser.add_argument('-c', '--collected', action='store_true', help='是否启用季度全集搜索')
+    parser.add_argument('-a', '--all', nargs='?', const=True, metavar='PLUGINS',
+                        help='同时使用多个插件搜索并合并结果 (逗号分隔, 默认为全部插件)')
+    parser.add_argument('-w', '--watch', nargs='?', type=float, const=300, metavar='SECONDS',
+                        help='持续监视关键词, 只输出新发布的资源 (默认每 300 秒检查一次)')
+    parser.add_argument('--watch-state', type=str, default=DEFAULT_WATCH_FILE, metavar='FILE',
+                        help=f'监视进度的保存文件, 默认为 {DEFAULT_WATCH_FILE}')
+    parser.add_argument('--log-level', type=str.upper, default='DEBUG',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='日志级别, 默认为 DEBUG (INFO 及以上可省去逐条结果的调试日志)')
 
     args = parser.parse_args()
+    setup_logger(level=getattr(logging, args.log_level), background=True)
+
+    from .Searcher import Searcher, DEFAULT_PLUGINS
+    from .component.watch import WatchState
+
+    console = get_console()
     search_params: Dict[str, Any] = {'keyword': args.search, 'collected': args.collected}
 
+    if args.watch is not None:
+        if args.all:
+            parser.error("--watch 不能与 --all 同时使用")
+
+        with WatchState(args.watch_state) as state:
+            watch(Searcher(plugin_name=args.plugin, no_search_errors=True, watch_state=state),
+                  args.watch, search_params)
+        return
+
     searcher = Searcher(plugin_name=args.plugin, no_search_errors=True)
-    animes = searcher.search(**search_params)
+    if args.all:
+        animes = searcher.search_all(plugins=DEFAULT_PLUGINS if args.all is True else args.all.split(','), **search_params)
+        print_reports(searcher)
+    else:
+        animes = searcher.search(**search_params)
 
     if animes:
         print_results(searcher)
         selection = get_user_selection(len(searcher.animes))
 
         if selection > 0:
-            anime = animes[selection]
-            console.print(f"[bold green]已选择 {searcher.anime.title}[/bold green]")
+            anime = animes[selection - 1]
+            console.print(f"[bold green]已选择 {anime.title}[/bold green]")
             console.print(f"[bold green]其磁链为: [/bold green][bold yellow]{anime.magnet}[/bold yellow]")
         else:
             console.print("[bold yellow]已退出选择[/bold yellow]")
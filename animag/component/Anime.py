@@ -1,13 +1,16 @@
+import base64
+import copy
 import re
-from dataclasses import dataclass
 import time
+from dataclasses import dataclass, MISSING
 from functools import lru_cache
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Union, Dict
 
+from .title import TitleInfo, parse_title
 from .. import log, SizeFormatError, TimeFormatError
 
 size_pattern = re.compile(r'^(\d+(?:\.\d+)?)\s*(\w+)$')
-magnet_hash_pattern = re.compile(r'btih:([a-fA-F0-9]+)')
+magnet_hash_pattern = re.compile(r'btih:([a-zA-Z0-9]+)')
 
 conversion_factors = {
     'B': 1,
@@ -21,14 +24,197 @@ conversion_factors = {
     'TIB': 1 << 40
 }
 
+DEFAULT_TIMEFMT = r'%Y/%m/%d %H:%M'
+TIME_CACHE_SIZE = 1 << 16
 
-@dataclass
+
+class TimeFormat:
+    """
+    Display format of release times, shared by every anime of a searcher.
+
+    Animes keep their release time as a timestamp and format it through their
+    TimeFormat when ``time`` is read, so changing the format of a whole result
+    set is a single assignment. Formatted times are cached until the format changes.
+    """
+    __slots__ = ('_fmt', '_cache')
+
+    def __init__(self, fmt: Optional[str] = None) -> None:
+        """
+        Initialize TimeFormat object.
+
+        Args:
+            fmt: strftime format, DEFAULT_TIMEFMT if omitted
+        """
+        self._fmt = fmt or DEFAULT_TIMEFMT
+        self._cache: Dict[float, str] = {}
+
+    @property
+    def fmt(self) -> str:
+        return self._fmt
+
+    @fmt.setter
+    def fmt(self, fmt: str) -> None:
+        self._fmt = fmt
+        self._cache = {}
+
+    def format(self, timestamp: float) -> str:
+        """
+        Format a timestamp in local time.
+
+        Args:
+            timestamp: Epoch timestamp
+
+        Returns:
+            str: The formatted time
+        """
+        try:
+            return self._cache[timestamp]
+        except KeyError:
+            if len(self._cache) >= TIME_CACHE_SIZE:
+                self._cache = {}
+            formatted = self._cache[timestamp] = time.strftime(self._fmt, time.localtime(timestamp))
+            return formatted
+
+
+DEFAULT_TIME_FORMAT = TimeFormat()
+
+
+@lru_cache(maxsize=4096)
+def split_size(size: str) -> Optional[Tuple[float, str]]:
+    """
+    Split a size string like '1.5GB' into its value and unit, without logging failures.
+
+    Args:
+        size (str): The size string.
+
+    Returns:
+        Optional[Tuple[float, str]]: The value and unit, or None if the string is not a size.
+    """
+    match = size_pattern.match(size.strip())
+    return (float(match.group(1)), match.group(2)) if match else None
+
+
+class _FieldProperty(property):
+    """
+    Property presenting a dataclass field.
+
+    Read on the class, it gives MISSING like the slot of a field does, so that
+    dataclasses.fields does not report the property as the default of the field.
+    """
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return MISSING
+        return super().__get__(instance, owner)
+
+
+@dataclass(init=False, repr=False, eq=False)
 class Anime:
-    time: str
+    """
+    A search result.
+
+    The magnet hash, the size in bytes and the release timestamp are parsed once
+    at construction, so comparisons, hashing and sorting never re-run a regex.
+    ``size`` is a view over ``size_bytes``: the original string until another
+    unit is selected with size_format. ``time`` is a view over ``timestamp``,
+    formatted with a TimeFormat shared by all the results of a search, unless
+    an explicit time string was given.
+
+    Animes remain dataclasses, whose fields are the arguments of the constructor,
+    so dataclasses.fields, asdict and replace keep working. ``time`` and ``size``
+    are read as displayed, so replace gives a copy whose time is no longer
+    formatted lazily; copy keeps it lazy.
+    """
+    __slots__ = ('_time', '_time_format', 'title', 'torrent', 'plugin', 'timestamp',
+                 '_magnet', 'btih', '_size', 'size_bytes', '_size_unit')
+
+    time: Optional[str]
     title: str
-    size: str
-    magnet: str
-    torrent: Optional[str] = None
+    size: Optional[str]
+    magnet: Optional[str]
+    torrent: Optional[str]
+    plugin: Optional[str]
+    timestamp: Optional[float]
+    time_format: Optional[TimeFormat]
+
+    def __init__(self, time: Optional[str],
+                 title: str,
+                 size: Optional[str],
+                 magnet: Optional[str],
+                 torrent: Optional[str] = None,
+                 plugin: Optional[str] = None,
+                 timestamp: Optional[float] = None,
+                 time_format: Optional[TimeFormat] = None) -> None:
+        """
+        Initialize Anime object.
+
+        Args:
+            time: Formatted release time, None to format the timestamp when it is read
+            title: Title of the release
+            size: Size string, like '1.5GB'
+            magnet: Magnet link, or the torrent link for sites without magnets
+            torrent: Torrent download link
+            plugin: Name of the plugin which found the release
+            timestamp: Release time as an epoch timestamp
+            time_format: Format of the release time, DEFAULT_TIME_FORMAT if omitted
+        """
+        self._time = time
+        self._time_format = time_format
+        self.title = title
+        self.torrent = torrent
+        self.plugin = plugin
+        self.timestamp = timestamp
+        self.magnet = magnet
+        self.size = size
+
+    @_FieldProperty
+    def time(self) -> Optional[str]:
+        if self._time is not None or self.timestamp is None:
+            return self._time
+
+        return (self._time_format or DEFAULT_TIME_FORMAT).format(self.timestamp)
+
+    @time.setter
+    def time(self, time: Optional[str]) -> None:
+        self._time = time
+
+    @_FieldProperty
+    def time_format(self) -> Optional[TimeFormat]:
+        return self._time_format
+
+    @time_format.setter
+    def time_format(self, time_format: Optional[TimeFormat]) -> None:
+        self._time_format = time_format
+
+    @property
+    def info(self) -> TitleInfo:
+        """Metadata parsed from the title, like the release group, episode and resolution."""
+        return parse_title(self.title)
+
+    @_FieldProperty
+    def magnet(self) -> Optional[str]:
+        return self._magnet
+
+    @magnet.setter
+    def magnet(self, magnet: Optional[str]) -> None:
+        self._magnet = magnet
+        try:
+            self.btih = self._get_hash(magnet)
+        except (AttributeError, TypeError):
+            self.btih = None
+
+    @_FieldProperty
+    def size(self) -> Optional[str]:
+        if self._size_unit is None:
+            return self._size
+
+        return f"{round(self.size_bytes / conversion_factors[self._size_unit.upper()], 2)}{self._size_unit}"
+
+    @size.setter
+    def size(self, size: Optional[str]) -> None:
+        self._size = size
+        self._size_unit = None
+        self.size_bytes = self.parse_size(size)
 
     def size_format(self, unit: str = 'MB') -> None:
         """
@@ -40,39 +226,72 @@ class Anime:
         Raises:
             SizeFormatError: When size formatting fails.
         """
-        result = self.extract_value_and_unit(self.size)
-        if not result:
+        if self.size_bytes is None:
             raise SizeFormatError(f"Failed to format size of the anime: {self.title}")
 
-        value, pre_unit = result
-        if pre_unit.upper() == unit.upper():
+        if unit.upper() not in conversion_factors:
+            log.error("Convert: invalid storage unit '%s'", unit)
+            raise SizeFormatError(f"Failed to format size of the anime: {self.title}")
+
+        current_unit = self._size_unit or split_size(self._size)[1]
+        if current_unit.upper() == unit.upper():
             return
 
-        converted_value = self.convert_byte(value, pre_unit, unit)
-        if converted_value is None:
-            raise SizeFormatError(f"Failed to format size of the anime: {self.title}")
+        self._size_unit = unit
 
-        self.size = f"{value}{unit}"
+    def set_timefmt(self, timefmt: Union[str, TimeFormat]) -> None:
+        """
+        Display the release time with another format.
 
-    def set_timefmt(self, from_timefmt: str, to_timefmt: str):
+        Args:
+            timefmt (Union[str, TimeFormat]): The format, or a TimeFormat to share.
+
+        Raises:
+            TimeFormatError: When the anime has no release timestamp.
+        """
+        if self.timestamp is None:
+            raise TimeFormatError(f"The anime has no release timestamp: {self.title}")
+
+        self._time_format = timefmt if isinstance(timefmt, TimeFormat) else TimeFormat(timefmt)
+        self._time = None
+
+    def copy(self, time_format: Optional[TimeFormat] = None) -> "Anime":
         """
-        Convert the time string from one format to another.
+        Copy the anime, so that formatting the copy leaves the original unchanged.
 
         Args:
-            from_timefmt (str): The original time format.
-            to_timefmt (str): The target time format
+            time_format (Optional[TimeFormat]): Format of the release time of the copy,
+                the format of the original if omitted.
 
         Returns:
-            str: The converted time string.
+            Anime: The copy.
+        """
+        anime = copy.copy(self)
+        if time_format is not None:
+            anime._time_format = time_format
+        return anime
 
-        Raises:
-            TimeFormatError: When time formatting fails.
+    @staticmethod
+    def parse_size(size: Optional[str]) -> Optional[int]:
         """
-        try:
-            return time.strftime(to_timefmt, time.strptime(self.time, from_timefmt))
-        except Exception as e:
-            raise TimeFormatError(f"Invalid time format: {e.args[0]}")
+        Convert a size string like '1.5GB' to a number of bytes.
+
+        Args:
+            size (Optional[str]): The size string.
+
+        Returns:
+            Optional[int]: The number of bytes, or None if the size cannot be parsed.
+        """
+        if not size:
+            return None
 
+        result = split_size(size)
+        if result is None:
+            return None
+
+        value, unit = result
+        factor = conversion_factors.get(unit.upper())
+        return None if factor is None else int(value * factor)
 
     @staticmethod
     @lru_cache(maxsize=128)
@@ -127,7 +346,7 @@ class Anime:
 
     def __eq__(self, other: object) -> bool:
         """
-        Compare two Anime objects based on their magnet hash.
+        Compare two Anime objects based on their magnet hash, or their links when they have none.
 
         Args:
             other (object): The object to compare with.
@@ -138,11 +357,10 @@ class Anime:
         if not isinstance(other, Anime):
             return NotImplemented
 
-        try:
-            return self._get_hash(self.magnet) == self._get_hash(other.magnet)
-        except AttributeError:
-            log.error("Magnet hash extraction failed.")
-            return False
+        if self.btih is None or other.btih is None:
+            return self.btih is other.btih and self._magnet == other._magnet
+
+        return self.btih == other.btih
 
     def __hash__(self) -> int:
         """
@@ -151,10 +369,7 @@ class Anime:
         Returns:
             int: Hash value based on the magnet hash.
         """
-        try:
-            return hash(self._get_hash(self.magnet))
-        except AttributeError:
-            return hash(self.magnet)
+        return hash(self.btih if self.btih is not None else self._magnet)
 
     def __str__(self) -> str:
         """
@@ -163,25 +378,32 @@ class Anime:
         Returns:
             str: The string representation.
         """
-        try:
-            hash_value = self._get_hash(self.magnet)
-        except AttributeError:
-            hash_value = "unknown"
-        return f"Anime '{self.title}' with hash {hash_value}"
+        return f"Anime '{self.title}' with hash {self.btih or 'unknown'}"
 
-    @lru_cache(maxsize=1)
-    def _get_hash(self, magnet: str) -> str:
+    def __repr__(self) -> str:
+        return (f"Anime(time={self.time!r}, title={self.title!r}, size={self.size!r}, magnet={self._magnet!r}, "
+                f"torrent={self.torrent!r}, plugin={self.plugin!r})")
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _get_hash(magnet: str) -> str:
         """
-        Extract and return the hash from the magnet link.
+        Extract and return the hash from the magnet link, base32 hashes are converted to hex.
 
         Args:
             magnet (str): The magnet link.
 
         Returns:
-            str: The lowercase hash value.
+            str: The lowercase hex hash value.
 
         Raises:
             AttributeError: If hash extraction fails.
         """
-        match = magnet_hash_pattern.search(magnet)
-        return match.group(1).lower()
+        value = magnet_hash_pattern.search(magnet).group(1)
+        if len(value) == 32:
+            try:
+                return base64.b32decode(value.upper()).hex()
+            except ValueError:
+                pass
+
+        return value.lower()
@@ -0,0 +1,308 @@
+import heapq
+import math
+from array import array
+from operator import itemgetter
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Union, overload
+
+from .Anime import Anime, conversion_factors
+from .dedup import Deduplicator, DEFAULT_DEDUPLICATOR
+from .title import TitleInfo, parse_titles
+from .. import log, SizeFormatError
+
+MISSING_SIZE = -1
+SORT_KEYS = ('time', 'size', 'title', 'episode', 'resolution')
+
+
+def _picker(indices: List[int]) -> Callable[[Sequence], tuple]:
+    """Build a function picking the items at the given indices of a column, always as a tuple."""
+    if len(indices) == 1:
+        index = indices[0]
+        return lambda column: (column[index],)
+    return itemgetter(*indices) if indices else lambda column: ()
+
+
+class ResultSet(Sequence[Anime]):
+    """
+    Read-only sequence of search results, with columns for bulk post-processing.
+
+    The size in bytes, release timestamp, magnet hash and title of every result
+    are kept in columns (arrays for the numbers), so sorting, filtering and top-k
+    work on plain values instead of the Anime objects, and return new result
+    sets sharing the same Anime objects, which size_format copies before
+    changing them. Unknown sizes are stored as -1 and
+    unknown timestamps as NaN. The metadata parsed from the titles is another
+    column, only computed once it is first needed.
+    """
+    __slots__ = ('_animes', 'sizes', 'timestamps', 'btihs', 'titles', '_infos')
+
+    def __init__(self, animes: Iterable[Anime] = ()) -> None:
+        """
+        Initialize ResultSet object.
+
+        Args:
+            animes: The search results
+        """
+        self._animes: List[Anime] = list(animes)
+        self.sizes = array('q', [MISSING_SIZE if anime.size_bytes is None else anime.size_bytes
+                                 for anime in self._animes])
+        self.timestamps = array('d', [math.nan if anime.timestamp is None else anime.timestamp
+                                      for anime in self._animes])
+        self.btihs: List[Optional[str]] = [anime.btih for anime in self._animes]
+        self.titles: List[str] = [anime.title for anime in self._animes]
+        self._infos: Optional[List[TitleInfo]] = None
+
+    @property
+    def infos(self) -> List[TitleInfo]:
+        """Metadata parsed from the title of every result, see parse_title."""
+        if self._infos is None:
+            self._infos = parse_titles(self.titles)
+        return self._infos
+
+    def _take(self, indices: Iterable[int]) -> "ResultSet":
+        """Build the result set of the rows at the given indices, without recomputing the columns."""
+        get = _picker(list(indices))
+        result = ResultSet.__new__(ResultSet)
+        result._animes = list(get(self._animes))
+        result.sizes = array('q', get(self.sizes))
+        result.timestamps = array('d', get(self.timestamps))
+        result.btihs = list(get(self.btihs))
+        result.titles = list(get(self.titles))
+        result._infos = None if self._infos is None else list(get(self._infos))
+        return result
+
+    def _keys(self, by: str, missing: float) -> list:
+        """Get the sort keys of a column, replacing unknown values with ``missing``."""
+        if by == 'time':
+            return [missing if timestamp != timestamp else timestamp for timestamp in self.timestamps]
+        if by == 'size':
+            return [missing if size == MISSING_SIZE else size for size in self.sizes]
+        if by == 'title':
+            return [title or '' for title in self.titles]
+        if by == 'episode':
+            return [missing if info.episode is None else info.episode for info in self.infos]
+        if by == 'resolution':
+            return [missing if info.resolution is None else info.resolution for info in self.infos]
+
+        raise ValueError(f"Invalid sort key {by}, expected one of {SORT_KEYS}")
+
+    def sort_by(self, by: str = 'time', reverse: bool = False) -> "ResultSet":
+        """
+        Sort the results, results with an unknown value come last.
+
+        Args:
+            by: 'time', 'size', 'title', 'episode' or 'resolution'
+            reverse: Sort in descending order
+
+        Returns:
+            ResultSet: The sorted results
+
+        Raises:
+            ValueError: If the sort key is invalid
+        """
+        keys = self._keys(by, -math.inf if reverse else math.inf)
+        return self._take(sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse))
+
+    def top(self, k: int, by: str = 'time') -> "ResultSet":
+        """
+        Get the k results with the highest value of a column, in descending order.
+
+        Args:
+            k: Number of results
+            by: 'time', 'size', 'title', 'episode' or 'resolution'
+
+        Returns:
+            ResultSet: The top results
+
+        Raises:
+            ValueError: If the sort key is invalid
+        """
+        keys = self._keys(by, -math.inf)
+        return self._take(heapq.nlargest(k, range(len(keys)), key=keys.__getitem__))
+
+    def filter(self, min_size: Union[int, float, str, None] = None,
+               max_size: Union[int, float, str, None] = None,
+               since: Optional[float] = None,
+               until: Optional[float] = None) -> "ResultSet":
+        """
+        Keep the results within a size and release time range.
+
+        Results whose size or time is unknown are dropped when the matching bound is given.
+
+        Args:
+            min_size: Minimum size, in bytes or as a size string like '500MB'
+            max_size: Maximum size, in bytes or as a size string like '2GB'
+            since: Only keep results released at or after this timestamp
+            until: Only keep results released before this timestamp
+
+        Returns:
+            ResultSet: The matching results
+
+        Raises:
+            SizeFormatError: If a size bound cannot be parsed
+        """
+        min_size, max_size = self._size_bound(min_size), self._size_bound(max_size)
+        sizes, timestamps = self.sizes, self.timestamps
+
+        indices = range(len(self._animes))
+        if min_size is not None:
+            indices = [i for i in indices if sizes[i] >= min_size]
+        if max_size is not None:
+            indices = [i for i in indices if MISSING_SIZE < sizes[i] <= max_size]
+        if since is not None:
+            indices = [i for i in indices if timestamps[i] >= since]
+        if until is not None:
+            indices = [i for i in indices if timestamps[i] < until]
+
+        return self._take(indices)
+
+    def filter_title(self, group: Optional[str] = None,
+                     episode: Optional[float] = None,
+                     min_resolution: Optional[int] = None,
+                     codec: Optional[str] = None,
+                     language: Optional[str] = None,
+                     source: Optional[str] = None,
+                     batch: Optional[bool] = None) -> "ResultSet":
+        """
+        Keep the results whose title matches the given metadata, see parse_title.
+
+        Results whose title does not tell the matching field are dropped when it is given.
+
+        Args:
+            group: Release group, case insensitive
+            episode: Episode number, batches containing it match too
+            min_resolution: Minimum vertical resolution, like 1080
+            codec: 'HEVC', 'AVC' or 'AV1'
+            language: 'CHS', 'CHT', 'JPN' or 'ENG'
+            source: 'WEB-DL', 'WEBRip', 'BDRip', 'BD', 'DVD' or 'TV'
+            batch: Only keep batches if True, single episodes if False
+
+        Returns:
+            ResultSet: The matching results
+        """
+        infos = self.infos
+        indices = range(len(infos))
+        if group is not None:
+            group = group.casefold()
+            indices = [i for i in indices if infos[i].group is not None and infos[i].group.casefold() == group]
+        if episode is not None:
+            indices = [i for i in indices
+                       if infos[i].episode is not None and infos[i].episode <= episode <= infos[i].episode_end]
+        if min_resolution is not None:
+            indices = [i for i in indices if (infos[i].resolution or 0) >= min_resolution]
+        if codec is not None:
+            codec = codec.upper()
+            indices = [i for i in indices if infos[i].codec == codec]
+        if language is not None:
+            language = language.upper()
+            indices = [i for i in indices if language in infos[i].languages]
+        if source is not None:
+            source = source.upper()
+            indices = [i for i in indices if infos[i].source is not None and infos[i].source.upper() == source]
+        if batch is not None:
+            indices = [i for i in indices if infos[i].batch is batch]
+
+        return self._take(indices)
+
+    def dedupe(self, deduplicator: Optional[Deduplicator] = None) -> "ResultSet":
+        """
+        Keep the first result of every release, see Deduplicator.
+
+        Args:
+            deduplicator: Engine telling which results are the same release, DEFAULT_DEDUPLICATOR if omitted
+
+        Returns:
+            ResultSet: The deduplicated results
+        """
+        labels = (deduplicator or DEFAULT_DEDUPLICATOR).cluster(self._animes)
+        return self._take([i for i, label in enumerate(labels) if label == i])
+
+    @staticmethod
+    def _size_bound(size: Union[int, float, str, None]) -> Optional[int]:
+        if size is None:
+            return None
+        if isinstance(size, (int, float)):
+            return int(size)
+
+        size_bytes = Anime.parse_size(size)
+        if size_bytes is None:
+            raise SizeFormatError(f"Invalid size bound: {size}")
+        return size_bytes
+
+    def sizes_in(self, unit: str = 'MB') -> array:
+        """
+        Get the sizes of all results converted to a unit, NaN for unknown sizes.
+
+        Args:
+            unit: The target unit
+
+        Returns:
+            array: The sizes, as an array of floats
+
+        Raises:
+            SizeFormatError: If the unit is invalid
+        """
+        factor = self._factor(unit)
+        return array('d', [math.nan if size == MISSING_SIZE else size / factor for size in self.sizes])
+
+    def size_format(self, unit: str = 'MB') -> None:
+        """
+        Format the size of every result to a unit.
+
+        The result set formats copies of its results, so the result sets sharing
+        them, like the ones sort_by or filter returned, keep their sizes. Every
+        size is checked first, so the results are left unchanged if one of them
+        cannot be formatted.
+
+        Args:
+            unit: The target unit
+
+        Raises:
+            SizeFormatError: If the unit is invalid or a size is unknown
+        """
+        self._factor(unit)
+
+        if MISSING_SIZE in self.sizes:
+            title = self.titles[self.sizes.index(MISSING_SIZE)]
+            raise SizeFormatError(f"Failed to format size of the anime: {title}")
+
+        animes = [anime.copy() for anime in self._animes]
+        for anime in animes:
+            anime.size_format(unit)
+        self._animes = animes
+
+    @staticmethod
+    def _factor(unit: str) -> int:
+        try:
+            return conversion_factors[unit.upper()]
+        except KeyError:
+            log.error("Convert: invalid storage unit '%s'", unit)
+            raise SizeFormatError(f"Invalid storage unit: {unit}")
+
+    @overload
+    def __getitem__(self, index: int) -> Anime: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "ResultSet": ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._take(range(*index.indices(len(self._animes))))
+        return self._animes[index]
+
+    def __len__(self) -> int:
+        return len(self._animes)
+
+    def __iter__(self) -> Iterator[Anime]:
+        return iter(self._animes)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ResultSet):
+            return self._animes == other._animes
+        if isinstance(other, Sequence):
+            return self._animes == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"ResultSet({self._animes!r})"
@@ -0,0 +1,175 @@
+import sqlite3
+import threading
+import time
+from typing import Optional, NamedTuple, Dict
+
+from .. import log
+
+DEFAULT_CACHE_FILE = "animag_cache.sqlite"
+DEFAULT_TTL = 300
+DEFAULT_MAX_SIZE = 64 << 20
+IMMUTABLE = float('inf')
+
+
+class CacheEntry(NamedTuple):
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    expires_at: Optional[float]
+
+    @property
+    def fresh(self) -> bool:
+        """Whether the entry can be used without revalidation."""
+        return self.expires_at is None or self.expires_at > time.time()
+
+    def validators(self) -> Dict[str, str]:
+        """
+        Build the conditional request headers used to revalidate the entry.
+
+        Returns:
+            Dict[str, str]: If-None-Match / If-Modified-Since headers
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class HTTPCache:
+    """
+    Persistent HTTP response cache backed by SQLite, keyed by URL.
+
+    Entries expire after their TTL and are then revalidated with ETag /
+    Last-Modified when the site provides them. Entries stored with the
+    IMMUTABLE TTL never expire. Once the cache grows over ``max_size`` bytes
+    the least recently used entries are evicted. A cache can be shared
+    between threads.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_FILE,
+                 default_ttl: float = DEFAULT_TTL,
+                 max_size: int = DEFAULT_MAX_SIZE):
+        """
+        Initialize HTTPCache object.
+
+        Args:
+            path: Path of the SQLite database, ':memory:' keeps the cache in memory
+            default_ttl: Seconds an entry stays fresh when no TTL is given
+            max_size: Maximum total size of the cached bodies in bytes
+        """
+        self.path = path
+        self.default_ttl = default_ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, last_modified TEXT, "
+            "expires_at REAL, accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """
+        Get the cached response of a URL, fresh or not.
+
+        Args:
+            url: URL of the request
+
+        Returns:
+            Optional[CacheEntry]: The cached entry, or None on a miss
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, expires_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+
+        return CacheEntry(*row)
+
+    def put(self, url: str, body: bytes,
+            etag: Optional[str] = None,
+            last_modified: Optional[str] = None,
+            ttl: Optional[float] = None) -> None:
+        """
+        Store the response of a URL.
+
+        Args:
+            url: URL of the request
+            body: Response content
+            etag: ETag header of the response
+            last_modified: Last-Modified header of the response
+            ttl: Seconds the entry stays fresh, IMMUTABLE to never expire, default_ttl if omitted
+        """
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, body, etag, last_modified, self._expires_at(ttl, now), now, len(body))
+            )
+            self._size += len(body) - (old[0] if old else 0)
+
+            if self._size > self.max_size:
+                self._evict()
+
+    def refresh(self, url: str, ttl: Optional[float] = None) -> None:
+        """
+        Mark a cached response as fresh again after a successful revalidation.
+
+        Args:
+            url: URL of the request
+            ttl: Seconds the entry stays fresh, IMMUTABLE to never expire, default_ttl if omitted
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET expires_at = ?, accessed_at = ? WHERE url = ?",
+                (self._expires_at(ttl, now), now, url)
+            )
+
+    def _expires_at(self, ttl: Optional[float], now: float) -> Optional[float]:
+        ttl = self.default_ttl if ttl is None else ttl
+        return None if ttl == IMMUTABLE else now + ttl
+
+    def _evict(self) -> None:
+        """Delete the least recently used entries until the cache fits in max_size."""
+        target = self.max_size * 0.9
+        evicted = 0
+        for url, size in self._conn.execute(
+                "SELECT url, size FROM responses ORDER BY accessed_at").fetchall():
+            if self._size <= target:
+                break
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self._size -= size
+            evicted += 1
+
+        log.debug("Evicted %d entries from the HTTP cache", evicted)
+
+    def clear(self) -> None:
+        """Delete all cached responses."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._size = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "HTTPCache":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
@@ -0,0 +1,238 @@
+import sqlite3
+import threading
+import time
+from typing import Optional, List, Iterable, Tuple
+
+from .Anime import Anime, TimeFormat
+from .. import log
+
+DEFAULT_CATALOG_FILE = "animag_catalog.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS animes (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    plugin TEXT,
+    title TEXT NOT NULL,
+    time TEXT,
+    timestamp REAL,
+    size TEXT,
+    size_bytes INTEGER,
+    magnet TEXT,
+    torrent TEXT,
+    seen_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS animes_timestamp ON animes (timestamp);
+CREATE INDEX IF NOT EXISTS animes_size_bytes ON animes (size_bytes);
+CREATE VIRTUAL TABLE IF NOT EXISTS animes_fts USING fts5(
+    title, content='animes', content_rowid='id', tokenize='{tokenizer}'
+);
+CREATE TRIGGER IF NOT EXISTS animes_ai AFTER INSERT ON animes BEGIN
+    INSERT INTO animes_fts (rowid, title) VALUES (new.id, new.title);
+END;
+CREATE TRIGGER IF NOT EXISTS animes_ad AFTER DELETE ON animes BEGIN
+    INSERT INTO animes_fts (animes_fts, rowid, title) VALUES ('delete', old.id, old.title);
+END;
+CREATE TRIGGER IF NOT EXISTS animes_au AFTER UPDATE OF title ON animes BEGIN
+    INSERT INTO animes_fts (animes_fts, rowid, title) VALUES ('delete', old.id, old.title);
+    INSERT INTO animes_fts (rowid, title) VALUES (new.id, new.title);
+END;
+"""
+
+# Trigram tokens match any substring of three characters or more, which suits CJK titles without word breaks
+MIN_TRIGRAM_TERM = 3
+
+
+def anime_key(anime: Anime) -> str:
+    """
+    Get the catalog key of an anime: its magnet hash, or its link when no hash can be extracted.
+
+    Args:
+        anime: The anime
+
+    Returns:
+        str: The key
+    """
+    return anime.btih or anime.magnet or anime.torrent or anime.title
+
+
+def timestamp(release_time: Optional[str], timefmt: Optional[str]) -> Optional[float]:
+    """
+    Convert a formatted release time to an epoch timestamp.
+
+    Args:
+        release_time: The formatted time
+        timefmt: The format of the time
+
+    Returns:
+        Optional[float]: The timestamp, or None if the time cannot be parsed
+    """
+    if not release_time or not timefmt:
+        return None
+
+    try:
+        return time.mktime(time.strptime(release_time, timefmt))
+    except ValueError:
+        return None
+
+
+def like_escape(term: str) -> str:
+    """
+    Escape the wildcards of a term, so that LIKE ... ESCAPE '\\' matches it literally.
+
+    Args:
+        term: The term
+
+    Returns:
+        str: The escaped term
+    """
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class Catalog:
+    """
+    Local catalog of every anime seen by the searchers, backed by SQLite with a full-text title index.
+
+    Records are keyed by magnet hash, so the same release found again, or found
+    by another plugin, updates a single record. A catalog can be shared between threads.
+    """
+
+    def __init__(self, path: str = DEFAULT_CATALOG_FILE):
+        """
+        Initialize Catalog object.
+
+        Args:
+            path: Path of the SQLite database, ':memory:' keeps the catalog in memory
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+        try:
+            self._conn.executescript(_SCHEMA.format(tokenizer='trigram'))
+            self._trigram = True
+        except sqlite3.OperationalError:
+            log.warning("SQLite has no trigram tokenizer, falling back to word tokens for the catalog.")
+            self._conn.executescript(_SCHEMA.format(tokenizer='unicode61'))
+            self._trigram = False
+
+    def upsert(self, animes: Iterable[Anime], timefmt: Optional[str] = None) -> int:
+        """
+        Insert new animes into the catalog and update the ones already there.
+
+        Args:
+            animes: Animes to store, tagged with their plugin
+            timefmt: Format of their release time, used to index it as a timestamp
+
+        Returns:
+            int: Number of animes stored
+        """
+        now = time.time()
+        rows = [
+            (anime_key(anime), anime.plugin, anime.title, anime.time,
+             anime.timestamp if anime.timestamp is not None else timestamp(anime.time, timefmt),
+             anime.size, anime.size_bytes, anime.magnet, anime.torrent, now)
+            for anime in animes if anime.title
+        ]
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO animes (key, plugin, title, time, timestamp, size, size_bytes, magnet, torrent, seen_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET "
+                "plugin = excluded.plugin, title = excluded.title, time = excluded.time, "
+                "timestamp = COALESCE(excluded.timestamp, timestamp), size = excluded.size, "
+                "size_bytes = excluded.size_bytes, magnet = excluded.magnet, "
+                "torrent = COALESCE(excluded.torrent, torrent), seen_at = excluded.seen_at",
+                rows
+            )
+
+        log.debug("Stored %d animes in the catalog", len(rows))
+        return len(rows)
+
+    def search(self, query: Optional[str] = None,
+               plugin: Optional[str] = None,
+               since: Optional[float] = None,
+               until: Optional[float] = None,
+               min_size: Optional[int] = None,
+               max_size: Optional[int] = None,
+               limit: Optional[int] = None,
+               time_format: Optional[TimeFormat] = None) -> List[Anime]:
+        """
+        Query the catalog, newest releases first.
+
+        Args:
+            query: Words that must all appear in the title
+            plugin: Only return animes found by this plugin
+            since: Only return animes released at or after this timestamp
+            until: Only return animes released before this timestamp
+            min_size: Only return animes of at least this many bytes
+            max_size: Only return animes of at most this many bytes
+            limit: Maximum number of results, unlimited if omitted
+            time_format: Format the release times of the results with it, instead of the stored strings
+
+        Returns:
+            List[Anime]: The matching animes
+        """
+        conditions, params = self._title_conditions(query)
+
+        for condition, value in (("animes.plugin = ?", plugin),
+                                 ("animes.timestamp >= ?", since),
+                                 ("animes.timestamp < ?", until),
+                                 ("animes.size_bytes >= ?", min_size),
+                                 ("animes.size_bytes <= ?", max_size)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+
+        sql = "SELECT time, title, size, magnet, torrent, plugin, timestamp FROM animes"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY timestamp DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        if time_format is None:
+            return [Anime(*row) for row in rows]
+
+        return [Anime(None if row[6] is not None else row[0], *row[1:], time_format=time_format) for row in rows]
+
+    def _title_conditions(self, query: Optional[str]) -> Tuple[List[str], List]:
+        """Translate the words of a query into full-text conditions, or LIKE for words too short to index."""
+        conditions, params = [], []
+        if not query:
+            return conditions, params
+
+        matches = []
+        for term in query.split():
+            if self._trigram and len(term) < MIN_TRIGRAM_TERM:
+                conditions.append("animes.title LIKE ? ESCAPE '\\'")
+                params.append("%" + like_escape(term) + "%")
+            else:
+                matches.append('"' + term.replace('"', '""') + '"')
+
+        if matches:
+            conditions.insert(0, "animes.id IN (SELECT rowid FROM animes_fts WHERE animes_fts MATCH ?)")
+            params.insert(0, " AND ".join(matches))
+
+        return conditions, params
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM animes").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "Catalog":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
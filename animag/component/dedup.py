@@ -0,0 +1,249 @@
+import hashlib
+import random
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .Anime import Anime
+from .title import TITLE_CACHE_SIZE, parse_title
+
+DEFAULT_THRESHOLD = 0.7
+# Sites round the displayed sizes, '1.3GiB' on one is '1.34GB' on another
+DEFAULT_SIZE_TOLERANCE = 0.05
+
+# MinHash signatures of BANDS * ROWS values, split into BANDS bands for the LSH buckets.
+# Titles with a Jaccard similarity s share a bucket with probability 1 - (1 - s ** ROWS) ** BANDS,
+# which is 0.89 for 0.7, 0.98 for 0.8 and 0.06 for 0.3
+BANDS = 8
+ROWS = 4
+# Every value of a signature is the minimum of the token hashes xored with a random mask. It is a cheap
+# family of permutations, good enough to pick candidate pairs as their similarity is then computed exactly
+_MASKS = [random.Random(0x616e696d + i).getrandbits(64) for i in range(BANDS * ROWS)]
+SHINGLE_CACHE_SIZE = 1 << 16
+
+CJK = r'\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+# CJK runs are split into bigrams, as they have no spaces between words
+SHINGLE_PATTERN = re.compile(rf'(?P<cjk>[{CJK}]+)|[^\W_{CJK}]+')
+# Parsed metadata which must not differ between the titles of the same release, when both titles tell it
+COMPARED_FIELDS = ('season', 'episode', 'episode_end', 'resolution', 'codec', 'source')
+
+
+class _Sketch:
+    """Parsed metadata, normalized title, token set and MinHash signature of a title."""
+    __slots__ = ('info', 'key', 'shingles', 'signature')
+
+    def __init__(self, title: str) -> None:
+        self.info = parse_title(title)
+        self.key = unicodedata.normalize('NFKC', title).casefold()
+        # Tags like '1080p' or 'AAC' are shared by the titles of every series, only the group and the
+        # name tell a release from another, when they can be parsed. The group is a single token, so
+        # that a long group name does not make every title of the group alike
+        shingles: Set[str] = set()
+        text = self.key
+        if self.info.name is not None:
+            text = unicodedata.normalize('NFKC', self.info.name).casefold()
+            if self.info.group is not None:
+                shingles.add(unicodedata.normalize('NFKC', self.info.group).casefold())
+
+        for match in SHINGLE_PATTERN.finditer(text):
+            run = match.group()
+            if match.lastgroup == 'cjk' and len(run) > 1:
+                shingles.update(run[i:i + 2] for i in range(len(run) - 1))
+            else:
+                shingles.add(run)
+
+        self.shingles: FrozenSet[str] = frozenset(shingles)
+        hashes = [_shingle_hash(shingle) for shingle in self.shingles] or [0]
+        self.signature = tuple([min(map(mask.__xor__, hashes)) for mask in _MASKS])
+
+    def compatible(self, other: "_Sketch") -> bool:
+        """Whether the metadata of two titles does not differ."""
+        for field in COMPARED_FIELDS:
+            a, b = getattr(self.info, field), getattr(other.info, field)
+            if a is not None and b is not None and a != b:
+                return False
+        return not (self.info.languages and other.info.languages and self.info.languages != other.info.languages)
+
+
+@lru_cache(maxsize=SHINGLE_CACHE_SIZE)
+def _shingle_hash(shingle: str) -> int:
+    """64-bit hash of a token, the same in every process unlike hash(), which is salted by PYTHONHASHSEED."""
+    return int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'little')
+
+
+@lru_cache(maxsize=TITLE_CACHE_SIZE)
+def _sketch(title: str) -> _Sketch:
+    return _Sketch(title)
+
+
+class Deduplicator:
+    """
+    Cluster the results of several plugins which are the same release.
+
+    Results are the same release when they have the same magnet hash, or, for
+    results without one, the same link. With ``fuzzy``, results without a
+    magnet hash, like the torrent links of acgrip or the rows of tokyotosho
+    without a magnet, are also matched by their title and size: titles are
+    compared as sets of tokens, the size must be the same within
+    ``size_tolerance``, and the episodes and resolution parsed from the titles
+    must not differ. Results with two different magnet hashes are never the
+    same release.
+
+    Candidate pairs come from MinHash/LSH buckets over the title tokens, and
+    within a bucket only results of close sizes are compared, so large merged
+    result sets are clustered in about linear time instead of comparing every
+    pair.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD,
+                 size_tolerance: float = DEFAULT_SIZE_TOLERANCE,
+                 fuzzy: bool = False) -> None:
+        """
+        Initialize Deduplicator object.
+
+        Args:
+            threshold: Minimum Jaccard similarity of the title tokens of the same release
+            size_tolerance: Maximum relative difference between the sizes of the same release
+            fuzzy: Also match results by title and size, not only by magnet hash and link
+        """
+        self.threshold = threshold
+        self.size_tolerance = size_tolerance
+        self.fuzzy = fuzzy
+
+    def cluster(self, animes: Sequence[Anime]) -> List[int]:
+        """
+        Cluster results which are the same release.
+
+        Args:
+            animes: The results, usually the merged results of several plugins
+
+        Returns:
+            List[int]: The label of every result, the index of the first result of its cluster
+        """
+        parent = list(range(len(animes)))
+        # Magnet hash of every cluster, kept by its root
+        btihs = [anime.btih for anime in animes]
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def union(i: int, j: int) -> None:
+            i, j = find(i), find(j)
+            if i == j or (btihs[i] is not None and btihs[j] is not None and btihs[i] != btihs[j]):
+                return
+            if j < i:
+                i, j = j, i
+            parent[j] = i
+            btihs[i] = btihs[i] or btihs[j]
+
+        first: Dict[str, int] = {}
+        for i, anime in enumerate(animes):
+            key = anime.btih or anime.magnet
+            if key is not None:
+                union(first.setdefault(key, i), i)
+
+        if self.fuzzy:
+            self._link_similar(animes, find, union)
+
+        return [find(i) for i in range(len(animes))]
+
+    def _link_similar(self, animes: Sequence[Anime],
+                      find: Callable[[int], int],
+                      union: Callable[[int, int], None]) -> None:
+        """Union the results whose titles and sizes match, see the class docstring."""
+        sketches: Dict[int, _Sketch] = {}
+        sizes: Dict[int, int] = {}
+        same_title: Dict[str, List[int]] = {}
+        # Rows of every LSH bucket by episodes, None for the titles which tell no episode
+        buckets: Dict[Tuple[int, Tuple[int, ...]], Dict[Optional[Tuple[float, float]], List[int]]] = {}
+
+        for i, anime in enumerate(animes):
+            if not anime.title:
+                continue
+            sketch = sketches[i] = _sketch(anime.title)
+            same_title.setdefault(sketch.key, []).append(i)
+            if anime.size_bytes is None:
+                continue
+
+            sizes[i] = anime.size_bytes
+            episodes = None if sketch.info.episode is None else (sketch.info.episode, sketch.info.episode_end)
+            for band in range(BANDS):
+                bucket = buckets.setdefault((band, sketch.signature[band * ROWS:(band + 1) * ROWS]), {})
+                bucket.setdefault(episodes, []).append(i)
+
+        # The same title is the same release, unless the sizes tell otherwise
+        for rows in same_title.values():
+            if len(rows) > 1:
+                self._link_window([i for i in rows if i in sizes], sizes, find, union, None)
+                for i in rows:
+                    if i not in sizes:
+                        union(rows[0], i)
+
+        checked: Set[Tuple[int, int]] = set()
+
+        def similar(i: int, j: int) -> bool:
+            return self._similar(sketches[i], sketches[j], checked, i, j)
+
+        # Different episodes are never the same release, so only titles of the same episodes,
+        # or telling no episode, are compared. Similar titles often share the rows of every band,
+        # which are only walked once
+        walked: Set[Tuple[int, ...]] = set()
+        for bucket in buckets.values():
+            unknown = bucket.get(None, [])
+            for episodes, rows in bucket.items():
+                if episodes is not None:
+                    rows = rows + unknown
+                if len(rows) > 1:
+                    key = tuple(rows)
+                    if key not in walked:
+                        walked.add(key)
+                        self._link_window(rows, sizes, find, union, similar)
+
+    def _link_window(self, rows: List[int],
+                     sizes: Dict[int, int],
+                     find: Callable[[int], int],
+                     union: Callable[[int, int], None],
+                     similar: Optional[Callable[[int, int], bool]]) -> None:
+        """Union the rows of close sizes which are similar, walking them by increasing size."""
+        rows = sorted(rows, key=sizes.__getitem__)
+        for position, i in enumerate(rows):
+            bound = sizes[i] * (1 + self.size_tolerance)
+            for k in range(position + 1, len(rows)):
+                j = rows[k]
+                if sizes[j] > bound:
+                    break
+                if find(i) != find(j) and (similar is None or similar(i, j)):
+                    union(i, j)
+
+    def _similar(self, a: _Sketch, b: _Sketch, checked: Set[Tuple[int, int]], i: int, j: int) -> bool:
+        """Whether two titles are the same release, each pair is only compared once."""
+        pair = (i, j) if i < j else (j, i)
+        if pair in checked:
+            return False
+        checked.add(pair)
+
+        if len(a.shingles & b.shingles) < self.threshold * len(a.shingles | b.shingles):
+            return False
+        # Titles of two episodes of a series only differ by a few tokens, the parsed metadata tells them apart
+        return a.compatible(b)
+
+    def dedupe(self, animes: Iterable[Anime]) -> List[Anime]:
+        """
+        Drop the results which are the same release as an earlier result.
+
+        Args:
+            animes: The results
+
+        Returns:
+            List[Anime]: The first result of every release, in order
+        """
+        animes = list(animes)
+        return [anime for i, (anime, label) in enumerate(zip(animes, self.cluster(animes))) if label == i]
+
+
+# Only merges results by magnet hash and link, pass Deduplicator(fuzzy=True) to match them by title and size
+DEFAULT_DEDUPLICATOR = Deduplicator()
@@ -1,4 +1,5 @@
 import functools
+import inspect
 from typing import Optional
 
 from .. import log
@@ -18,7 +19,11 @@ class SearchParserError(SearchError):
     pass
 
 
-class SaveCSVError(SearchError):
+class ExportError(SearchError):
+    pass
+
+
+class SaveCSVError(ExportError):
     pass
 
 
@@ -35,6 +40,16 @@ class TimeFormatError(SearchError):
 
 
 def no_errors(func):
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                print(f"Caught error: {e!r}")
+
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         try:
@@ -0,0 +1,169 @@
+import csv
+import gzip
+import io
+import json
+import os
+from itertools import islice
+from operator import attrgetter
+from typing import Iterable, Optional, Sequence, Tuple, BinaryIO
+
+from .Anime import Anime
+from .. import log
+
+FORMATS = ('csv', 'jsonl')
+COMPRESSIONS = ('gzip', 'zstd')
+FIELDS = ('time', 'title', 'size', 'magnet', 'torrent', 'plugin', 'btih', 'size_bytes', 'timestamp')
+DEFAULT_CHUNK_SIZE = 1000
+BUFFER_SIZE = 1 << 20
+GZIP_LEVEL = 6
+
+_FORMAT_SUFFIXES = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+_COMPRESSION_SUFFIXES = {'.gz': 'gzip', '.zst': 'zstd'}
+
+
+def detect_format(path: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Guess the export format and compression from a file name, like 'results.jsonl.gz'.
+
+    Args:
+        path: The file name
+
+    Returns:
+        Tuple[Optional[str], Optional[str]]: The format and the compression, None when unknown
+    """
+    root, suffix = os.path.splitext(path.lower())
+    compression = _COMPRESSION_SUFFIXES.get(suffix)
+    if compression is not None:
+        root, suffix = os.path.splitext(root)
+
+    return _FORMAT_SUFFIXES.get(suffix), compression
+
+
+class Exporter:
+    """
+    Streaming writer of search results to CSV or JSON Lines, optionally compressed with gzip or zstd.
+
+    Results are consumed from any iterable, like the generator of
+    Searcher.iter_search, and written in chunks, so an export never holds more
+    than ``chunk_size`` rows in memory. In append mode the rows are added to an
+    existing file: a CSV header is only written to a new file, and compressed
+    files get a new compressed member, which readers concatenate transparently.
+    """
+
+    def __init__(self, path: str,
+                 fmt: Optional[str] = None,
+                 compression: Optional[str] = None,
+                 append: bool = False,
+                 fields: Sequence[str] = FIELDS,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        """
+        Initialize Exporter object and open the file.
+
+        Args:
+            path: Path of the file
+            fmt: 'csv' or 'jsonl', guessed from the file name if omitted
+            compression: 'gzip' or 'zstd', guessed from the file name (.gz, .zst) if omitted
+            append: Add to the file instead of overwriting it
+            fields: Fields of the results to write, all of them if omitted
+            chunk_size: Number of rows written at once
+
+        Raises:
+            ValueError: If the format, the compression or a field is invalid
+            ImportError: If zstd compression is requested without the zstandard package
+        """
+        detected_fmt, detected_compression = detect_format(path)
+        self.path = path
+        self.fmt = fmt or detected_fmt or 'csv'
+        self.compression = compression or detected_compression
+        self.fields = tuple(fields)
+        self.chunk_size = chunk_size
+        self.count = 0
+
+        if self.fmt not in FORMATS:
+            raise ValueError(f"Invalid export format {self.fmt}, expected one of {FORMATS}")
+        if self.compression is not None and self.compression not in COMPRESSIONS:
+            raise ValueError(f"Invalid compression {self.compression}, expected one of {COMPRESSIONS}")
+        unknown = set(self.fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Invalid fields {sorted(unknown)}, expected some of {FIELDS}")
+
+        getter = attrgetter(*self.fields)
+        self._row = getter if len(self.fields) > 1 else lambda anime: (getter(anime),)
+
+        new_file = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        self._stream = io.TextIOWrapper(self._open_binary('ab' if append else 'wb'), encoding='utf-8', newline='')
+        self._writer = csv.writer(self._stream) if self.fmt == 'csv' else None
+
+        if self._writer is not None and new_file:
+            self._writer.writerow(self.fields)
+
+    def _open_binary(self, mode: str) -> BinaryIO:
+        """Open the file for binary writing, through the compressor if any."""
+        if self.compression == 'gzip':
+            return gzip.open(self.path, mode, compresslevel=GZIP_LEVEL)
+
+        if self.compression == 'zstd':
+            try:
+                import zstandard
+            except ImportError:
+                raise ImportError("zstd compression requires zstandard, install it with 'pip install animag[zstd]'.")
+
+            return io.BufferedWriter(zstandard.ZstdCompressor().stream_writer(open(self.path, mode)), BUFFER_SIZE)
+
+        return open(self.path, mode, buffering=BUFFER_SIZE)
+
+    def write(self, animes: Iterable[Anime]) -> int:
+        """
+        Write results to the file, consuming them chunk by chunk.
+
+        Args:
+            animes: The results, a sequence or a generator
+
+        Returns:
+            int: Number of results written
+        """
+        iterator = iter(animes)
+        written = 0
+
+        while True:
+            chunk = [self._row(anime) for anime in islice(iterator, self.chunk_size)]
+            if not chunk:
+                break
+
+            if self._writer is not None:
+                self._writer.writerows(chunk)
+            else:
+                self._stream.write("".join(
+                    json.dumps(dict(zip(self.fields, row)), ensure_ascii=False) + "\n" for row in chunk
+                ))
+            written += len(chunk)
+
+        self.count += written
+        log.debug("Exported %d animes to %s", written, self.path)
+        return written
+
+    def close(self) -> None:
+        """Flush and close the file, finishing the compressed stream."""
+        self._stream.close()
+
+    def __enter__(self) -> "Exporter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+def export(animes: Iterable[Anime], path: str, **options) -> int:
+    """
+    Write results to a file in one call, see Exporter for the options.
+
+    Args:
+        animes: The results, a sequence or a generator
+        path: Path of the file
+        **options: fmt, compression, append, fields and chunk_size of Exporter
+
+    Returns:
+        int: Number of results written
+    """
+    with Exporter(path, **options) as exporter:
+        return exporter.write(animes)
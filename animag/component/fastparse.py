@@ -0,0 +1,95 @@
+import re
+from typing import Optional
+
+import lxml.html
+
+# Same declarations and search windows as bs4's EncodingDetector, without importing bs4
+XML_ENCODING_PATTERN = re.compile(rb'^\s*<\?.*encoding=[\'"](.*?)[\'"].*\?>', re.I)
+HTML_META_PATTERN = re.compile(rb'<\s*meta[^>]+charset\s*=\s*["\']?([^>]*?)[ /;\'">]', re.I)
+XML_ENCODING_WINDOW = 1024
+HTML_META_WINDOW = 2048
+
+
+def find_declared_encoding(html: bytes) -> Optional[str]:
+    """
+    Find the encoding declared by an XML declaration or a charset meta tag near the start of a page.
+
+    Args:
+        html: Content of the page
+
+    Returns:
+        Optional[str]: The lowercase encoding name, None if the page declares none
+    """
+    match = XML_ENCODING_PATTERN.search(html, 0, XML_ENCODING_WINDOW) or \
+        HTML_META_PATTERN.search(html, 0, max(HTML_META_WINDOW, len(html) // 20))
+    if match is None or not match.group(1):
+        return None
+    return match.group(1).decode('ascii', 'replace').lower()
+
+
+def parse_html(html: bytes) -> lxml.html.HtmlElement:
+    """
+    Parse an HTML document with lxml directly, without building a BeautifulSoup tree.
+
+    The page is decoded with the encoding it declares, or UTF-8, as lxml would
+    otherwise fall back to latin-1 for pages without a charset meta tag.
+
+    Args:
+        html: Content of the page
+
+    Returns:
+        HtmlElement: The root element
+    """
+    encoding = find_declared_encoding(html) or 'utf-8'
+    try:
+        text = html.decode(encoding, errors='replace')
+    except LookupError:
+        text = html.decode('utf-8', errors='replace')
+    return lxml.html.fromstring(text)
+
+
+def class_xpath(name: str) -> str:
+    """
+    Build the XPath predicate matching elements with a CSS class, like BeautifulSoup's class_.
+
+    Args:
+        name: The class name
+
+    Returns:
+        str: The predicate, without brackets
+    """
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def get_text(element: lxml.html.HtmlElement) -> str:
+    """
+    Equivalent of BeautifulSoup's get_text(strip=True): every text fragment stripped and joined.
+
+    Args:
+        element: The element
+
+    Returns:
+        str: The text
+    """
+    return "".join(text.strip() for text in element.itertext())
+
+
+def get_string(element: lxml.html.HtmlElement) -> Optional[str]:
+    """
+    Equivalent of BeautifulSoup's .string: the text of an element with a single child string.
+
+    Args:
+        element: The element
+
+    Returns:
+        Optional[str]: The text, or None if the element has several or no children
+    """
+    children = list(element)
+    if not children:
+        return element.text
+
+    if len(children) == 1 and not element.text and not children[0].tail:
+        return get_string(children[0])
+
+    return None
+
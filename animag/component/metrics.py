@@ -0,0 +1,368 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Tuple, Iterator, Iterable, Callable, AsyncIterator
+
+from .. import log
+
+_current_stats: ContextVar[Optional["SearchStats"]] = ContextVar("animag_search_stats", default=None)
+
+
+@dataclass
+class RequestStats:
+    """One HTTP request of a search, cached when answered by the HTTP cache."""
+    url: str
+    status: Optional[int]
+    elapsed: float
+    size: int
+    cached: bool = False
+
+
+@dataclass
+class PageStats:
+    """One parsed result page of a search."""
+    page: int
+    rows: int
+    parse_time: float
+
+
+@dataclass
+class RetryStats:
+    """One retried request attempt, status is None for connection errors."""
+    url: str
+    status: Optional[int]
+
+
+@dataclass
+class SearchStats:
+    """
+    Metrics collected along a search: every request, retry and parsed page.
+
+    Records are appended by the threads and tasks working for the search, which
+    find the stats through a context variable, see collect. A search answered by
+    an identical search of another caller, see SingleFlight, records nothing and
+    is marked as shared.
+    """
+    plugin: str
+    keyword: str
+    started: float = field(default_factory=time.time)
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    requests: List[RequestStats] = field(default_factory=list)
+    retries: List[RetryStats] = field(default_factory=list)
+    pages: List[PageStats] = field(default_factory=list)
+    shared: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def http_time(self) -> float:
+        """Seconds spent in network requests, summed over concurrent requests."""
+        return sum(request.elapsed for request in self.requests if not request.cached)
+
+    @property
+    def bytes(self) -> int:
+        """Bytes downloaded, cache hits excluded."""
+        return sum(request.size for request in self.requests if not request.cached)
+
+    @property
+    def cache_hits(self) -> int:
+        return sum(request.cached for request in self.requests)
+
+    @property
+    def rows(self) -> int:
+        return sum(page.rows for page in self.pages)
+
+    @property
+    def parse_time(self) -> float:
+        return sum(page.parse_time for page in self.pages)
+
+    def summary(self) -> Dict[str, object]:
+        """
+        Summarize the stats in a flat dictionary, for logging or JSON output.
+
+        Returns:
+            Dict[str, object]: The totals of the search
+        """
+        return {
+            'plugin': self.plugin,
+            'keyword': self.keyword,
+            'ok': self.ok,
+            'shared': self.shared,
+            'elapsed': round(self.elapsed, 4),
+            'requests': len(self.requests),
+            'cache_hits': self.cache_hits,
+            'retries': len(self.retries),
+            'bytes': self.bytes,
+            'http_time': round(self.http_time, 4),
+            'pages': len(self.pages),
+            'rows': self.rows,
+            'parse_time': round(self.parse_time, 4),
+        }
+
+    @classmethod
+    def merge(cls, plugin: str, keyword: str, stats: Iterable["SearchStats"]) -> "SearchStats":
+        """
+        Combine the stats of concurrent searches, like the plugins of a fan-out search.
+
+        Args:
+            plugin: Name of the combined search
+            keyword: Search keyword
+            stats: Stats of each search
+
+        Returns:
+            SearchStats: The combined stats, lasting as long as the slowest search
+        """
+        merged = cls(plugin, keyword)
+        for item in stats:
+            merged.started = min(merged.started, item.started)
+            merged.elapsed = max(merged.elapsed, item.elapsed)
+            merged.requests.extend(item.requests)
+            merged.retries.extend(item.retries)
+            merged.pages.extend(item.pages)
+            if item.error is not None:
+                merged.error = item.error if merged.error is None else f"{merged.error}; {item.error}"
+        return merged
+
+
+def current_stats() -> Optional[SearchStats]:
+    """Get the stats of the search running in the current context, if any."""
+    return _current_stats.get()
+
+
+@contextmanager
+def collect(plugin: str, keyword: str) -> Iterator[SearchStats]:
+    """
+    Collect the metrics of a search running in the current context.
+
+    Thread pools working for the search must submit their work with
+    ``contextvars.copy_context().run`` to be accounted; asyncio tasks inherit
+    the context by themselves.
+
+    Args:
+        plugin: Name of the plugin
+        keyword: Search keyword
+
+    Yields:
+        SearchStats: The stats, complete once the block exits
+    """
+    stats = SearchStats(plugin, keyword)
+    token = _current_stats.set(stats)
+    start = time.perf_counter()
+    try:
+        yield stats
+    except BaseException as e:
+        stats.error = repr(e)
+        raise
+    finally:
+        stats.elapsed = time.perf_counter() - start
+        _current_stats.reset(token)
+
+
+def iter_collected(iterator: Iterator, stats: SearchStats) -> Iterator:
+    """
+    Run a generator inside its own context collecting into stats, one step at a time.
+
+    A context variable set inside a suspended generator would leak into the
+    consumer, so the generator is resumed through a private context instead.
+
+    Args:
+        iterator: The generator, like the iter_search of a plugin
+        stats: The stats to collect into
+
+    Yields:
+        The items of the generator
+    """
+    context = copy_context()
+    context.run(_current_stats.set, stats)
+    start = time.perf_counter()
+    done = object()
+
+    try:
+        while (item := context.run(next, iterator, done)) is not done:
+            yield item
+    except BaseException as e:
+        if not isinstance(e, GeneratorExit):
+            stats.error = repr(e)
+        raise
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            context.run(close)
+        stats.elapsed = time.perf_counter() - start
+
+
+async def aiter_collected(iterator: AsyncIterator, stats: SearchStats) -> AsyncIterator:
+    """
+    Asynchronous counterpart of iter_collected, for an async generator like the aiter_search of a plugin.
+
+    Every step runs as a task created in the private context, so the tasks it
+    starts inherit the stats while the consumer never sees them.
+
+    Args:
+        iterator: The async generator
+        stats: The stats to collect into
+
+    Yields:
+        The items of the generator
+    """
+    import asyncio
+
+    context = copy_context()
+    context.run(_current_stats.set, stats)
+    start = time.perf_counter()
+
+    try:
+        while True:
+            try:
+                item = await context.run(asyncio.ensure_future, iterator.__anext__())
+            except StopAsyncIteration:
+                break
+            yield item
+    except BaseException as e:
+        if not isinstance(e, GeneratorExit):
+            stats.error = repr(e)
+        raise
+    finally:
+        aclose = getattr(iterator, 'aclose', None)
+        if aclose is not None:
+            await context.run(asyncio.ensure_future, aclose())
+        stats.elapsed = time.perf_counter() - start
+
+
+def record_request(url: str, status: Optional[int], elapsed: float, size: int, cached: bool = False) -> None:
+    """Record an HTTP request in the stats of the current search, if any."""
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.requests.append(RequestStats(url, status, elapsed, size, cached))
+
+
+def record_retry(url: str, status: Optional[int]) -> None:
+    """Record a retried request attempt in the stats of the current search, if any."""
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.retries.append(RetryStats(url, status))
+
+
+def record_page(page: int, rows: int, parse_time: float) -> None:
+    """Record a parsed result page in the stats of the current search, if any."""
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.pages.append(PageStats(page, rows, parse_time))
+
+
+# Name, type and help of every exported metric
+PROMETHEUS_METRICS = {
+    'animag_searches_total': ('counter', 'Searches by outcome'),
+    'animag_search_duration_seconds': ('summary', 'Wall time of searches'),
+    'animag_shared_searches_total': ('counter', 'Searches answered by an identical search of another caller'),
+    'animag_http_requests_total': ('counter', 'HTTP requests by status code, cache for cache hits'),
+    'animag_http_request_duration_seconds': ('summary', 'Latency of HTTP requests sent to the network'),
+    'animag_http_retries_total': ('counter', 'Retried HTTP request attempts'),
+    'animag_http_response_bytes_total': ('counter', 'Bytes downloaded'),
+    'animag_pages_total': ('counter', 'Result pages parsed'),
+    'animag_rows_total': ('counter', 'Rows extracted from result pages'),
+    'animag_parse_duration_seconds': ('summary', 'Parse time of result pages'),
+}
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    """
+    Totals of the searches observed, by plugin, rendered in the Prometheus text format.
+
+    A registry can be shared between searchers and threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+
+    def _add(self, name: str, value: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        self._values[key] = self._values.get(key, 0) + value
+
+    def _observe(self, name: str, value: float, **labels: str) -> None:
+        self._add(name + '_sum', value, **labels)
+        self._add(name + '_count', 1, **labels)
+
+    def observe(self, stats: SearchStats) -> None:
+        """
+        Add the stats of a finished search to the totals.
+
+        Args:
+            stats: Stats of the search
+        """
+        plugin = stats.plugin
+        with self._lock:
+            self._add('animag_searches_total', 1, plugin=plugin, outcome='ok' if stats.ok else 'error')
+            self._observe('animag_search_duration_seconds', stats.elapsed, plugin=plugin)
+            self._add('animag_shared_searches_total', stats.shared, plugin=plugin)
+
+            for request in stats.requests:
+                status = 'cache' if request.cached else str(request.status or 'error')
+                self._add('animag_http_requests_total', 1, plugin=plugin, status=status)
+                if not request.cached:
+                    self._observe('animag_http_request_duration_seconds', request.elapsed, plugin=plugin)
+            self._add('animag_http_retries_total', len(stats.retries), plugin=plugin)
+            self._add('animag_http_response_bytes_total', stats.bytes, plugin=plugin)
+
+            for page in stats.pages:
+                self._observe('animag_parse_duration_seconds', page.parse_time, plugin=plugin)
+            self._add('animag_pages_total', len(stats.pages), plugin=plugin)
+            self._add('animag_rows_total', stats.rows, plugin=plugin)
+
+    def to_prometheus(self) -> str:
+        """
+        Render the totals in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics, ready to be served on a /metrics endpoint
+        """
+        with self._lock:
+            values = sorted(self._values.items())
+
+        lines = []
+        for name, (kind, help_text) in PROMETHEUS_METRICS.items():
+            samples = [(sample, labels, value) for (sample, labels), value in values
+                       if sample == name or sample in (name + '_sum', name + '_count')]
+            if not samples:
+                continue
+
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{sample}{_labels(labels)} {_number(value)}" for sample, labels, value in samples)
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Forget every total."""
+        with self._lock:
+            self._values.clear()
+
+
+def notify(stats: SearchStats, registry: Optional[MetricsRegistry],
+           callback: Optional[Callable[[SearchStats], None]]) -> None:
+    """Hand the stats of a finished search to a registry and a callback, never failing the search."""
+    if registry is not None:
+        registry.observe(stats)
+
+    if callback is not None:
+        try:
+            callback(stats)
+        except Exception as e:
+            log.error("Search stats callback failed: %r", e)
@@ -0,0 +1,259 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict
+from urllib.parse import urlsplit
+
+from .. import log
+
+DEFAULT_RATE = 10.0
+DEFAULT_BURST = 10
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MAX_CONCURRENCY = 16
+MIN_CONCURRENCY = 1
+DECREASE_FACTOR = 0.5
+# Backoff when a throttled response has no Retry-After, doubled on every consecutive throttled response
+BACKOFF_BASE = 1.0
+MAX_BACKOFF = 60.0
+# Longer Retry-After values are capped, so a misbehaving site cannot stall a search for hours
+MAX_RETRY_AFTER = 120.0
+ASYNC_POLL_INTERVAL = 0.05
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header, given either in seconds or as an HTTP date.
+
+    Args:
+        value: The header value
+
+    Returns:
+        Optional[float]: Seconds to wait, None if the header is missing or invalid
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        log.debug("Ignoring invalid Retry-After header: %s", value)
+        return None
+
+
+class HostLimiter:
+    """
+    Request budget of a single host: a token bucket for the request rate, and
+    an AIMD window for the number of requests in flight.
+
+    The window grows by one request per window of successful responses, and is
+    halved when the host throttles (429, 503) or a request fails. A throttled
+    response also pauses the host for its Retry-After delay, or for an
+    exponential backoff when the header is missing.
+    """
+
+    def __init__(self, host: str,
+                 rate: Optional[float] = DEFAULT_RATE,
+                 burst: int = DEFAULT_BURST,
+                 concurrency: int = DEFAULT_CONCURRENCY,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        """
+        Initialize HostLimiter object.
+
+        Args:
+            host: Name of the host
+            rate: Requests per second, None for no rate limit
+            burst: Number of requests which can be sent at once after an idle period
+            concurrency: Initial number of requests in flight
+            max_concurrency: Maximum number of requests in flight
+        """
+        self.host = host
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.concurrency = float(min(concurrency, max_concurrency))
+        self.active = 0
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _try_acquire(self, now: float) -> Optional[float]:
+        """
+        Take a token and a slot of the window if both are available, the condition must be held.
+
+        Returns:
+            Optional[float]: 0 if acquired, else seconds to wait, or None to wait for a request to finish
+        """
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.active >= int(self.concurrency):
+            return None
+
+        if self.rate:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+            self._tokens -= 1
+
+        self.active += 1
+        return 0.0
+
+    def acquire(self) -> None:
+        """Block until a request to the host can be sent."""
+        with self._cond:
+            while True:
+                delay = self._try_acquire(time.monotonic())
+                if delay == 0:
+                    return
+                self._cond.wait(delay)
+
+    async def aacquire(self) -> None:
+        """Asynchronous counterpart of acquire, waiting without blocking the event loop."""
+        import asyncio
+
+        while True:
+            with self._cond:
+                delay = self._try_acquire(time.monotonic())
+            if delay == 0:
+                return
+            await asyncio.sleep(ASYNC_POLL_INTERVAL if delay is None else delay)
+
+    def release(self, status: Optional[int], retry_after: Optional[str] = None) -> None:
+        """
+        Release the slot of a finished request and adapt the window to its outcome.
+
+        Args:
+            status: Status code of the response, None if the request failed
+            retry_after: Retry-After header of the response
+        """
+        with self._cond:
+            self.active -= 1
+
+            if status is None or status in THROTTLE_STATUS_CODES:
+                self.concurrency = max(MIN_CONCURRENCY, self.concurrency * DECREASE_FACTOR)
+            elif status < 500:
+                self.throttled = 0
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+
+            if status in THROTTLE_STATUS_CODES:
+                self.throttled += 1
+                delay = parse_retry_after(retry_after)
+                if delay is None:
+                    delay = min(MAX_BACKOFF, BACKOFF_BASE * 2 ** (self.throttled - 1))
+                delay = min(delay, MAX_RETRY_AFTER)
+                self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+                log.warning("%s throttled the request with status code %s, "
+                            "pausing for %.1fs with %d requests in flight",
+                            self.host, status, delay, int(self.concurrency))
+
+            self._cond.notify_all()
+
+
+class RateLimiter:
+    """
+    Per-host request budgets shared by every plugin, see HostLimiter.
+
+    Hosts without a specific configuration get the default budget. A rate
+    limiter can be shared between threads and event loops.
+    """
+
+    def __init__(self,
+                 rate: Optional[float] = DEFAULT_RATE,
+                 burst: int = DEFAULT_BURST,
+                 concurrency: int = DEFAULT_CONCURRENCY,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        """
+        Initialize RateLimiter object with the default budget of a host.
+
+        Args:
+            rate: Requests per second, None for no rate limit
+            burst: Number of requests which can be sent at once after an idle period
+            concurrency: Initial number of requests in flight
+            max_concurrency: Maximum number of requests in flight
+        """
+        self._defaults = {'rate': rate, 'burst': burst, 'concurrency': concurrency,
+                          'max_concurrency': max_concurrency}
+        self._configs: Dict[str, dict] = {}
+        self._hosts: Dict[str, HostLimiter] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, host: str, **budget) -> None:
+        """
+        Set the budget of a host, replacing its current state.
+
+        Args:
+            host: Name of the host, like 'share.dmhy.org'
+            **budget: rate, burst, concurrency and max_concurrency of HostLimiter
+        """
+        with self._lock:
+            self._configs[host] = budget
+            self._hosts.pop(host, None)
+
+    def host(self, host: str) -> HostLimiter:
+        """
+        Get the limiter of a host, creating it if necessary.
+
+        Args:
+            host: Name of the host
+
+        Returns:
+            HostLimiter: The limiter of the host
+        """
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            with self._lock:
+                limiter = self._hosts.get(host)
+                if limiter is None:
+                    limiter = self._hosts[host] = HostLimiter(host, **{**self._defaults, **self._configs.get(host, {})})
+        return limiter
+
+    def for_url(self, url: str) -> HostLimiter:
+        """Get the limiter of the host of a URL."""
+        return self.host(urlsplit(url).hostname or '')
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Get the process-wide shared rate limiter, creating it if necessary.
+
+    Returns:
+        RateLimiter: The shared rate limiter
+    """
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter()
+        return _default_limiter
+
+
+def configure_rate_limiter(rate: Optional[float] = DEFAULT_RATE,
+                           burst: int = DEFAULT_BURST,
+                           concurrency: int = DEFAULT_CONCURRENCY,
+                           max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> RateLimiter:
+    """
+    Replace the process-wide shared rate limiter with a newly configured one.
+
+    Args:
+        rate: Requests per second to a host, None for no rate limit
+        burst: Number of requests which can be sent at once to an idle host
+        concurrency: Initial number of requests in flight to a host
+        max_concurrency: Maximum number of requests in flight to a host
+
+    Returns:
+        RateLimiter: The new shared rate limiter
+    """
+    global _default_limiter
+    with _default_limiter_lock:
+        _default_limiter = RateLimiter(rate, burst, concurrency, max_concurrency)
+        return _default_limiter
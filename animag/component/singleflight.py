@@ -0,0 +1,173 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .. import log
+
+DEFAULT_MAX_ENTRIES = 256
+_MISSING = object()
+
+
+class _Call:
+    """A call in flight, waited for by the callers joining it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into a single call.
+
+    The first caller of a key runs the call, callers arriving while it is in
+    flight wait for it and receive the same result, or the same exception.
+    With a TTL the result is also remembered for that many seconds after the
+    call finished, so callers arriving just after it do not start another one.
+    Failures are never remembered. A SingleFlight can be shared between
+    threads and event loops.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Initialize SingleFlight object.
+
+        Args:
+            ttl: Seconds a result is remembered after its call finished, None to only share calls in flight
+            max_entries: Maximum number of remembered results, the least recently used are forgotten first
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Tuple[int, Hashable], Any] = {}
+        self._memo: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def _remembered(self, key: Hashable) -> Any:
+        """Get the remembered result of a key, the lock must be held."""
+        entry = self._memo.get(key)
+        if entry is None:
+            return _MISSING
+        if entry[0] <= time.monotonic():
+            del self._memo[key]
+            return _MISSING
+
+        self._memo.move_to_end(key)
+        return entry[1]
+
+    def _remember(self, key: Hashable, value: Any) -> None:
+        """Remember the result of a finished call, the lock must be held."""
+        if not self.ttl:
+            return
+
+        self._memo[key] = (time.monotonic() + self.ttl, value)
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.max_entries:
+            self._memo.popitem(last=False)
+
+    def do(self, key: Hashable, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Call func, unless a call with the same key is in flight or remembered.
+
+        Args:
+            key: Key identifying the calls giving the same result
+            func: The function to call
+            *args: Positional arguments of func
+            **kwargs: Keyword arguments of func
+
+        Returns:
+            The result of the call, shared by every caller of the key
+
+        Raises:
+            Exception: The exception raised by the call
+        """
+        with self._lock:
+            value = self._remembered(key)
+            if value is not _MISSING:
+                return value
+
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            log.debug("Joined the call in flight for %r", key)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None:
+                    self._remember(key, call.value)
+            call.done.set()
+            if call.waiters:
+                log.debug("Shared the call for %r with %d callers", key, call.waiters)
+
+        return call.value
+
+    async def ado(self, key: Hashable, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Asynchronous counterpart of do, for a coroutine function.
+
+        Calls are shared between the tasks of an event loop, and a caller being
+        cancelled does not cancel the call the other callers wait for.
+
+        Args:
+            key: Key identifying the calls giving the same result
+            func: The coroutine function to call
+            *args: Positional arguments of func
+            **kwargs: Keyword arguments of func
+
+        Returns:
+            The result of the call, shared by every caller of the key
+
+        Raises:
+            Exception: The exception raised by the call
+        """
+        import asyncio
+
+        flight = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            value = self._remembered(key)
+            if value is not _MISSING:
+                return value
+
+            task = self._tasks.get(flight)
+            if task is None:
+                task = self._tasks[flight] = asyncio.ensure_future(func(*args, **kwargs))
+                task.add_done_callback(lambda done: self._finish(flight, done))
+            else:
+                log.debug("Joined the call in flight for %r", key)
+
+        return await asyncio.shield(task)
+
+    def _finish(self, flight: Tuple[int, Hashable], task) -> None:
+        """Forget a finished task, remembering its result."""
+        with self._lock:
+            self._tasks.pop(flight, None)
+            if not task.cancelled() and task.exception() is None:
+                self._remember(flight[1], task.result())
+
+    def forget(self, key: Hashable) -> None:
+        """Forget the remembered result of a key, the next call runs again."""
+        with self._lock:
+            self._memo.pop(key, None)
+
+    def clear(self) -> None:
+        """Forget every remembered result."""
+        with self._lock:
+            self._memo.clear()
@@ -0,0 +1,235 @@
+import re
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+TITLE_CACHE_SIZE = 1 << 16
+
+# Every part of a title the parser looks at, told apart by the name of the outer group which matched.
+# Other words are looked up in TOKENS, the text in between is only kept to cut out the series name.
+# The leading class skips the characters no token starts with, like spaces and most CJK text, in a single
+# step: re has no prefilter for an alternation, and would otherwise try every branch at each of them.
+TOKEN_PATTERN = re.compile(r'''
+    [^\[【(（\]】)）~～\-A-Za-z\d简繁日第]*
+    (?:
+    (?P<open>[\[【(（])
+  | (?P<close>[\]】)）])
+  | (?P<dash>(?<=\s)-(?=\s))
+  | (?P<tilde>[~～])
+  | (?P<number>(?P<first>\d{1,3}(?:\.5)?)(?:[vV]\d)?(?:-(?P<last>\d{1,3}))?)(?![A-Za-z0-9.-])
+  | (?P<code>[sS](?P<season>\d{1,2})(?:[eE](?P<episode>\d{1,3}))?|[eE][pP]?(?P<ep>\d{1,3}))(?![A-Za-z0-9.-])
+  | (?P<word>[A-Za-z0-9]+(?:[-.][A-Za-z0-9]+)*)
+  | (?P<cjk>[简繁日]{1,3})(?=[体體中内外双雙字日])
+  | (?P<ordinal>第(?P<value>[\d一二三四五六七八九十]{1,3})(?:\s*[-~～]\s*(?P<value_end>\d{1,3}))?\s*(?P<unit>[季期话話集]))
+    )
+''', re.X)
+# Bare text decorating the title rather than naming the series, like '★04月新番'
+DECORATION_PATTERN = re.compile(r'[\s★☆]*(?:\d{1,2}月)?(?:新番|合集)?[\s★☆]*')
+NAME_STRIP = " -_|/."
+
+RESOLUTIONS = {'2160': 2160, '1080': 1080, '720': 720, '576': 576, '480': 480}
+WIDTHS = {'2160': '3840', '1080': '1920', '720': '1280', '576': '720', '480': '720'}
+TOKENS = {
+    **{f"{height}{suffix}": ('resolution', value)
+       for height, value in RESOLUTIONS.items() for suffix in ('p', 'i')},
+    '2160': ('resolution', 2160), '1080': ('resolution', 1080),
+    **{f"{WIDTHS[height]}x{height}": ('resolution', value) for height, value in RESOLUTIONS.items()},
+    '4k': ('resolution', 2160), 'uhd': ('resolution', 2160),
+    **dict.fromkeys(('hevc', 'x265', 'h265', 'h.265'), ('codec', 'HEVC')),
+    **dict.fromkeys(('avc', 'x264', 'h264', 'h.264'), ('codec', 'AVC')),
+    'av1': ('codec', 'AV1'),
+    **dict.fromkeys(('web-dl', 'webdl'), ('source', 'WEB-DL')),
+    **dict.fromkeys(('webrip', 'web-rip'), ('source', 'WEBRip')),
+    **dict.fromkeys(('bdrip', 'bd-rip'), ('source', 'BDRip')),
+    **dict.fromkeys(('bd', 'bluray', 'blu-ray', 'bdmv'), ('source', 'BD')),
+    **dict.fromkeys(('dvd', 'dvdrip', 'dvd-rip'), ('source', 'DVD')),
+    **dict.fromkeys(('hdtv', 'tvrip', 'tv-rip'), ('source', 'TV')),
+    **dict.fromkeys(('chs', 'sc', 'gb'), ('languages', ('CHS',))),
+    **dict.fromkeys(('cht', 'tc', 'big5'), ('languages', ('CHT',))),
+    'jpsc': ('languages', ('JPN', 'CHS')),
+    'jptc': ('languages', ('JPN', 'CHT')),
+    **dict.fromkeys(('jp', 'jpn', 'jap'), ('languages', ('JPN',))),
+    **dict.fromkeys(('eng', 'english'), ('languages', ('ENG',))),
+}
+CJK_LANGUAGES = {'简': 'CHS', '繁': 'CHT', '日': 'JPN'}
+CHINESE_NUMERALS = {numeral: value for value, numeral in enumerate('一二三四五六七八九十', start=1)}
+CLOSING = frozenset(']】)）')
+
+
+class TitleInfo(NamedTuple):
+    """Metadata of a release title, None (or empty) for what the title does not tell."""
+    group: Optional[str] = None
+    name: Optional[str] = None
+    season: Optional[int] = None
+    episode: Optional[float] = None
+    # Last episode of a batch, equal to episode for a single episode
+    episode_end: Optional[float] = None
+    resolution: Optional[int] = None
+    codec: Optional[str] = None
+    source: Optional[str] = None
+    languages: Tuple[str, ...] = ()
+
+    @property
+    def batch(self) -> bool:
+        """Whether the release is a batch of several episodes."""
+        return self.episode is not None and self.episode_end != self.episode
+
+
+def _ordinal(value: str) -> int:
+    """Convert '05', '二' or '十二' to a number."""
+    if value.isdigit():
+        return int(value)
+    if value in CHINESE_NUMERALS:
+        return CHINESE_NUMERALS[value]
+    tens, _, units = value.partition('十')
+    return CHINESE_NUMERALS.get(tens, 1) * 10 + CHINESE_NUMERALS.get(units, 0)
+
+
+def _bare_name(text: str) -> Optional[str]:
+    """Get the series name from the text of a segment, unless it only decorates the title."""
+    if text.isdigit() or DECORATION_PATTERN.fullmatch(text):
+        return None
+    return text.strip(NAME_STRIP) or None
+
+
+@lru_cache(maxsize=TITLE_CACHE_SIZE)
+def parse_title(title: str) -> TitleInfo:
+    """
+    Extract the release group, series name, episodes, resolution, codec, source and languages of a title.
+
+    Titles follow the loose conventions of fansub releases, like
+    '[Group] Name - 05 [1080p][HEVC]' or '[Group][Name][01-12][1080P][CHS]'.
+    The title is scanned once with a single precompiled pattern, and results
+    are memoized per title, as the same titles come back search after search.
+
+    Args:
+        title: The release title
+
+    Returns:
+        TitleInfo: The metadata found in the title
+    """
+    group = name = season = episode = episode_end = resolution = codec = source = None
+    languages = []
+    # The segment is the bracketed or bare part of the title being scanned, from start,
+    # and meta the position where its first metadata starts
+    start = depth = brackets = dash = 0
+    meta = previous = number = None
+
+    for match in TOKEN_PATTERN.finditer(title):
+        kind = match.lastgroup
+        # Where the token starts, after the skipped characters
+        position = match.start(kind)
+        if kind == 'word':
+            word = match.group(kind)
+            key = word.lower()
+            found = TOKENS.get(key)
+            if found is None and '-' in key:
+                # 'HEVC-10bit' and the like
+                for part in key.split('-'):
+                    found = TOKENS.get(part)
+                    if found is not None:
+                        break
+
+            if found is not None:
+                field, value = found
+                if field == 'resolution':
+                    resolution = resolution or value
+                elif field == 'codec':
+                    codec = codec or value
+                elif field == 'source':
+                    source = source or value
+                else:
+                    languages.extend(value)
+                if meta is None:
+                    meta = position
+            elif key == 'season':
+                kind = 'season'
+        elif kind == 'open':
+            if not depth and name is None:
+                name = _bare_name(title[start:position if meta is None else meta])
+            depth += 1
+            start = match.end()
+            meta = None
+        elif kind == 'close':
+            if depth:
+                depth -= 1
+                if not brackets and not title[:start - 1].strip():
+                    group = title[start:position].strip() or None
+                elif name is None and meta is None:
+                    name = _bare_name(title[start:position])
+                brackets += 1
+                start = match.end()
+                meta = None
+        elif kind == 'number':
+            value = float(match.group('first'))
+            if match.group('last'):
+                # '01-12'
+                last = float(match.group('last'))
+                if episode is None and value < last:
+                    episode, episode_end = value, last
+                if meta is None:
+                    meta = position
+            elif previous == 'season':
+                season = season or int(value)
+            elif previous == 'tilde' and number is not None:
+                # The end of '01~12'
+                if number < value and (episode is None or episode == number):
+                    episode, episode_end = number, value
+            elif depth and position == start:
+                # '[05]', or the start of '[01~12]'
+                if episode is None and title[match.end():match.end() + 1] in CLOSING:
+                    episode = episode_end = value
+                if meta is None:
+                    meta = start
+            elif previous == 'dash' and episode is None:
+                # ' - 05'
+                episode = episode_end = value
+                if meta is None:
+                    meta = dash
+            number = value
+        elif kind == 'dash':
+            dash = position
+        elif kind == 'code':
+            if match.group('season'):
+                season = season or int(match.group('season'))
+            code_episode = match.group('episode') or match.group('ep')
+            if code_episode and episode is None:
+                episode = episode_end = float(code_episode)
+            if meta is None:
+                meta = position
+        elif kind == 'cjk':
+            languages.extend(CJK_LANGUAGES[char] for char in match.group(kind))
+            if meta is None:
+                meta = position
+        elif kind == 'ordinal':
+            # '第二季' names a season, '第05话' an episode
+            value = _ordinal(match.group('value'))
+            if match.group('unit') in '季期':
+                season = season or value
+            elif episode is None:
+                episode = episode_end = float(value)
+                if match.group('value_end'):
+                    episode_end = float(match.group('value_end'))
+                if meta is None:
+                    meta = position
+        if kind != 'number' and kind != 'tilde':
+            number = None
+        previous = kind
+
+    if name is None and not depth:
+        name = _bare_name(title[start:len(title) if meta is None else meta])
+
+    return TitleInfo(group, name, season, episode, episode_end, resolution, codec, source,
+                     tuple(dict.fromkeys(languages)))
+
+
+def parse_titles(titles: Iterable[str]) -> List[TitleInfo]:
+    """
+    Parse many titles at once, see parse_title.
+
+    Args:
+        titles: The release titles
+
+    Returns:
+        List[TitleInfo]: The metadata of every title, in order
+    """
+    return list(map(parse_title, titles))
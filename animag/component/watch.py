@@ -0,0 +1,139 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional, NamedTuple, FrozenSet, Sequence
+
+from .Anime import Anime
+from .catalog import anime_key
+from .. import log
+
+DEFAULT_WATCH_FILE = "animag_watch.sqlite"
+# Number of latest releases remembered per watched search, in case the newest one gets deleted from the site
+MARK_SIZE = 32
+
+
+class Mark(NamedTuple):
+    """High-water mark of a watched search: the newest release time and the latest releases seen."""
+    timestamp: Optional[float]
+    keys: FrozenSet[str]
+
+    def seen(self, anime: Anime) -> bool:
+        """
+        Whether a release was already returned by a previous watch, or is older than all of them.
+
+        Args:
+            anime: The release
+
+        Returns:
+            bool: True if the release is not new
+        """
+        if anime_key(anime) in self.keys:
+            return True
+
+        return self.timestamp is not None and anime.timestamp is not None and anime.timestamp < self.timestamp
+
+
+class WatchState:
+    """
+    Persistent high-water marks of watched searches, keyed by plugin and keyword, backed by SQLite.
+
+    A watch state can be shared between threads.
+    """
+
+    def __init__(self, path: str = DEFAULT_WATCH_FILE):
+        """
+        Initialize WatchState object.
+
+        Args:
+            path: Path of the SQLite database, ':memory:' keeps the marks in memory
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS marks ("
+            "plugin TEXT NOT NULL, keyword TEXT NOT NULL, timestamp REAL, keys TEXT NOT NULL, "
+            "updated_at REAL NOT NULL, PRIMARY KEY (plugin, keyword))"
+        )
+
+    def get(self, plugin: str, keyword: str) -> Optional[Mark]:
+        """
+        Get the mark of a watched search.
+
+        Args:
+            plugin: Name of the plugin
+            keyword: Search keyword
+
+        Returns:
+            Optional[Mark]: The mark, or None if the search was never watched
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT timestamp, keys FROM marks WHERE plugin = ? AND keyword = ?", (plugin, keyword)
+            ).fetchone()
+
+        if row is None:
+            return None
+        return Mark(row[0], frozenset(json.loads(row[1])))
+
+    def update(self, plugin: str, keyword: str, animes: Sequence[Anime]) -> Mark:
+        """
+        Move the mark of a watched search past new releases.
+
+        Args:
+            plugin: Name of the plugin
+            keyword: Search keyword
+            animes: The new releases, newest first
+
+        Returns:
+            Mark: The updated mark
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT timestamp, keys FROM marks WHERE plugin = ? AND keyword = ?", (plugin, keyword)
+            ).fetchone()
+            timestamp, keys = (row[0], json.loads(row[1])) if row else (None, [])
+
+            keys = list(dict.fromkeys([anime_key(anime) for anime in animes] + keys))[:MARK_SIZE]
+            timestamps = [anime.timestamp for anime in animes if anime.timestamp is not None]
+            if timestamps:
+                timestamp = max(timestamps + ([timestamp] if timestamp is not None else []))
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO marks VALUES (?, ?, ?, ?, ?)",
+                (plugin, keyword, timestamp, json.dumps(keys), time.time())
+            )
+
+        log.debug("Watch mark of '%s' on %s moved past %d new releases", keyword, plugin, len(animes))
+        return Mark(timestamp, frozenset(keys))
+
+    def reset(self, plugin: Optional[str] = None, keyword: Optional[str] = None) -> None:
+        """
+        Forget marks, so the next watch returns every release again.
+
+        Args:
+            plugin: Only forget the marks of this plugin
+            keyword: Only forget the marks of this keyword
+        """
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM marks WHERE (? IS NULL OR plugin = ?) AND (? IS NULL OR keyword = ?)",
+                (plugin, plugin, keyword, keyword)
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM marks").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "WatchState":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
@@ -1,6 +1,9 @@
 import os
+import threading
+import time
+import weakref
 from functools import lru_cache
-from typing import Optional, Dict
+from typing import Optional, Dict, NamedTuple, Mapping
 
 import requests
 from requests import RequestException, Response
@@ -8,10 +11,19 @@ from requests.adapters import HTTPAdapter
 from urllib3.exceptions import InsecureRequestWarning
 from urllib3.util.retry import Retry
 
+from .cache import HTTPCache, CacheEntry
+from .metrics import record_request, record_retry
+from .ratelimit import RateLimiter, THROTTLE_STATUS_CODES, get_rate_limiter
 from .. import log, SearchRequestError
 
 RETRYING_NUM = 3
 DEFAULT_TIMEOUT = 10
+DEFAULT_POOL_CONNECTIONS = 8
+DEFAULT_POOL_MAXSIZE = 16
+DEFAULT_ASYNC_LIMIT = 100
+DEFAULT_ASYNC_LIMIT_PER_HOST = 16
+# Throttling statuses (429, 503) are retried by the sessions through the rate limiter instead
+RETRY_STATUS_CODES = (500, 502, 504)
 DEFAULT_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
                   "(KHTML, like Gecko) Chrome/80.0.3987.122 Safari/537.36"
@@ -19,29 +31,163 @@ DEFAULT_HEADERS = {
 
 
 class RequestSession:
-    """Session manager for HTTP requests with retry mechanism."""
+    """
+    Pooled session manager for HTTP requests with retry mechanism.
+
+    The underlying connection pools are kept per host, so consecutive requests
+    to the same site reuse warm keep-alive connections instead of paying a new
+    TCP + TLS handshake every time. Requests go through a per-host rate limiter,
+    which paces them and retries throttled ones after their Retry-After delay.
+    A session can be shared between threads.
+    """
+
+    def __init__(self,
+                 pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 keep_alive: bool = True,
+                 limiter: Optional[RateLimiter] = None):
+        """
+        Initialize RequestSession object.
+
+        Args:
+            pool_connections: Number of per-host connection pools to cache
+            pool_maxsize: Maximum number of connections kept in each host pool
+            keep_alive: Whether to keep connections open between requests
+            limiter: Per-host rate limiter, the process-wide shared limiter is used if omitted
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self._limiter = limiter
+        self._lock = threading.Lock()
+        self._session: Optional[requests.Session] = None
 
-    def __init__(self):
-        self.session = self._create_session()
+    @property
+    def limiter(self) -> RateLimiter:
+        """The rate limiter of the session."""
+        return self._limiter or get_rate_limiter()
 
-    @staticmethod
-    def _create_session() -> requests.Session:
+    @property
+    def session(self) -> requests.Session:
+        """The underlying requests session, created on first use."""
+        session = self._session
+        if session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._create_session()
+                session = self._session
+        return session
+
+    def _create_session(self) -> requests.Session:
         """Create and configure a requests session with retry strategy."""
         session = requests.Session()
         retry_strategy = Retry(
             total=RETRYING_NUM,
             backoff_factor=0.5,
-            status_forcelist=[500, 502, 503, 504]
+            status_forcelist=list(RETRY_STATUS_CODES),
+            # urllib3 would otherwise retry 429 and 503 responses carrying a Retry-After header itself
+            respect_retry_after_header=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retry_strategy
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
         session.headers.update(DEFAULT_HEADERS)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
         return session
 
+    def get(self, url: str, **kwargs) -> Response:
+        """
+        Send a GET request through the pooled session, within the budget of its host.
+
+        Throttled requests are retried once the host is unpaused, the last response is returned as is.
+        """
+        limit = self.limiter.for_url(url)
+
+        for attempt in range(RETRYING_NUM + 1):
+            status, retry_after = None, None
+            limit.acquire()
+            try:
+                response = self.session.get(url, **kwargs)
+                status, retry_after = response.status_code, response.headers.get('Retry-After')
+            finally:
+                limit.release(status, retry_after)
+
+            for retried in getattr(getattr(response.raw, 'retries', None), 'history', ()):
+                record_retry(url, retried.status)
+
+            if status not in THROTTLE_STATUS_CODES or attempt == RETRYING_NUM:
+                return response
+            log.debug("Retrying %s after status code %s", url, status)
+            record_retry(url, status)
+
     def close(self):
-        """Close the session."""
-        self.session.close()
+        """Close the session and release all pooled connections."""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def __enter__(self) -> "RequestSession":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+_default_session: Optional[RequestSession] = None
+_default_session_lock = threading.Lock()
+
+
+def get_session() -> RequestSession:
+    """
+    Get the process-wide shared session, creating it if necessary.
+
+    Returns:
+        RequestSession: The shared session
+    """
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = RequestSession()
+        return _default_session
+
+
+def configure_session(pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                      pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                      keep_alive: bool = True,
+                      limiter: Optional[RateLimiter] = None) -> RequestSession:
+    """
+    Replace the process-wide shared session with a newly configured one.
+
+    Args:
+        pool_connections: Number of per-host connection pools to cache
+        pool_maxsize: Maximum number of connections kept in each host pool
+        keep_alive: Whether to keep connections open between requests
+        limiter: Per-host rate limiter, the process-wide shared limiter is used if omitted
+
+    Returns:
+        RequestSession: The new shared session
+    """
+    global _default_session
+    with _default_session_lock:
+        if _default_session is not None:
+            _default_session.close()
+        _default_session = RequestSession(pool_connections, pool_maxsize, keep_alive, limiter)
+        return _default_session
+
+
+def close_session() -> None:
+    """Close the process-wide shared session, if it has been created."""
+    global _default_session
+    with _default_session_lock:
+        if _default_session is not None:
+            _default_session.close()
+            _default_session = None
 
 
 @lru_cache(maxsize=32)
@@ -67,7 +213,33 @@ def get_system_proxies() -> Dict[str, str]:
     return proxies
 
 
-def validate_response(response: Response, url: str) -> bytes:
+def check_response(status_code: int, content_type: str, url: str) -> None:
+    """
+    Check the status code and content type of an HTTP response.
+
+    Args:
+        status_code: Status code of the response
+        content_type: Content-Type header of the response
+        url: URL of the request
+
+    Raises:
+        SearchRequestError: If response is invalid
+    """
+    if status_code != 200:
+        raise SearchRequestError(f"Invalid status code {status_code} for URL: {url}")
+
+    if not content_type.startswith("text/html"):
+        raise SearchRequestError(f"Invalid content type '{content_type}' for URL: {url}")
+
+
+class AsyncResponse(NamedTuple):
+    """Response of an async request, mirroring the attributes of requests.Response used here."""
+    status_code: int
+    headers: Mapping[str, str]
+    content: bytes
+
+
+def validate_response(response: Response | AsyncResponse, url: str) -> bytes:
     """
     Validate HTTP response.
 
@@ -81,21 +253,61 @@ def validate_response(response: Response, url: str) -> bytes:
     Raises:
         SearchRequestError: If response is invalid
     """
-    if response.status_code != 200:
-        raise SearchRequestError(f"Invalid status code {response.status_code} for URL: {url}")
+    check_response(response.status_code, response.headers.get('Content-Type', ''), url)
+    return response.content
 
-    content_type = response.headers.get('Content-Type', '')
-    if not content_type.startswith("text/html"):
-        raise SearchRequestError(f"Invalid content type '{content_type}' for URL: {url}")
 
-    return response.content
+def cache_response(response: Response | AsyncResponse, url: str,
+                   cache: Optional[HTTPCache],
+                   entry: Optional[CacheEntry],
+                   ttl: Optional[float]) -> bytes:
+    """
+    Validate an HTTP response and store it in the cache.
+
+    Args:
+        response: Response object to validate
+        url: URL of the request
+        cache: Cache to store the response in
+        entry: Stale cache entry the request revalidated, if any
+        ttl: Seconds the response stays fresh in the cache
+
+    Returns:
+        bytes: Response content, taken from the cache entry if it is still valid
+
+    Raises:
+        SearchRequestError: If response is invalid
+    """
+    if entry is not None and response.status_code == 304:
+        log.debug("Cache revalidated for URL: %s", url)
+        cache.refresh(url, ttl)
+        return entry.body
+
+    content = validate_response(response, url)
+    if cache is not None:
+        cache.put(url, content, response.headers.get('ETag'), response.headers.get('Last-Modified'), ttl)
+
+    return content
+
+
+def cached_entry(url: str, cache: Optional[HTTPCache]) -> Optional[CacheEntry]:
+    """Look up a URL in the cache, if one is given."""
+    if cache is None:
+        return None
+
+    entry = cache.get(url)
+    if entry is not None and entry.fresh:
+        log.debug("Cache hit for URL: %s", url)
+    return entry
 
 
 def get_html(
         url: str,
         proxies: Optional[Dict[str, str]] = None,
         system_proxy: bool = False,
-        verify: bool = True
+        verify: bool = True,
+        session: Optional[RequestSession] = None,
+        cache: Optional[HTTPCache] = None,
+        ttl: Optional[float] = None
 ) -> bytes:
     """
     Get HTML content from URL with retry mechanism.
@@ -105,6 +317,9 @@ def get_html(
         proxies: Proxy configuration
         system_proxy: Whether to use system proxy
         verify: Whether to verify SSL certificates
+        session: Session to send the request through, defaults to the shared session
+        cache: Cache to serve and store the response, no caching if omitted
+        ttl: Seconds the response stays fresh in the cache, the cache default if omitted
 
     Returns:
         bytes: HTML content
@@ -118,19 +333,242 @@ def get_html(
     if system_proxy:
         proxies = get_system_proxies()
 
-    session = RequestSession()
+    entry = cached_entry(url, cache)
+    if entry is not None and entry.fresh:
+        record_request(url, None, 0.0, len(entry.body), cached=True)
+        return entry.body
+
+    if session is None:
+        session = get_session()
+
+    start = time.perf_counter()
     try:
-        log.debug(f"Making request to URL: {url}")
-        response = session.session.get(
+        log.debug("Making request to URL: %s", url)
+        response = session.get(
             url,
+            headers=entry.validators() if entry else None,
             proxies=proxies,
             verify=verify,
             timeout=DEFAULT_TIMEOUT
         )
-        return validate_response(response, url)
-
     except RequestException as e:
+        record_request(url, None, time.perf_counter() - start, 0)
+        raise SearchRequestError(f"Request failed for URL {url}: {e!r}")
+
+    record_request(url, response.status_code, time.perf_counter() - start, len(response.content),
+                   cached=entry is not None and response.status_code == 304)
+    return cache_response(response, url, cache, entry, ttl)
+
+
+class AsyncRequestSession:
+    """
+    Pooled session manager for asynchronous HTTP requests, built on aiohttp.
+
+    The aiohttp session is created lazily inside the running event loop, and its
+    connector keeps keep-alive connections per host. Requests go through the
+    same per-host rate limiter as the synchronous sessions. A session must only
+    be used from the event loop it was first used in.
+    """
+
+    def __init__(self,
+                 limit: int = DEFAULT_ASYNC_LIMIT,
+                 limit_per_host: int = DEFAULT_ASYNC_LIMIT_PER_HOST,
+                 keep_alive: bool = True,
+                 limiter: Optional[RateLimiter] = None):
+        """
+        Initialize AsyncRequestSession object.
+
+        Args:
+            limit: Maximum number of simultaneous connections
+            limit_per_host: Maximum number of simultaneous connections to one host
+            keep_alive: Whether to keep connections open between requests
+            limiter: Per-host rate limiter, the process-wide shared limiter is used if omitted
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keep_alive = keep_alive
+        self._limiter = limiter
+        self._session = None
+
+    @property
+    def limiter(self) -> RateLimiter:
+        """The rate limiter of the session."""
+        return self._limiter or get_rate_limiter()
+
+    @property
+    def session(self):
+        """The underlying aiohttp session, created on first use."""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
+
+    def _create_session(self):
+        """Create and configure an aiohttp session."""
+        try:
+            import aiohttp
+        except ImportError:
+            raise ImportError("The async API requires aiohttp, install it with 'pip install animag[async]'.")
+
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            force_close=not self.keep_alive
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            headers=DEFAULT_HEADERS,
+            timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT)
+        )
+
+    async def get(self, url: str,
+                  proxy: Optional[str] = None,
+                  verify: bool = True,
+                  headers: Optional[Dict[str, str]] = None) -> AsyncResponse:
+        """
+        Send a GET request within the budget of its host, retrying like the synchronous session does.
+
+        Args:
+            url: Target URL
+            proxy: Proxy URL
+            verify: Whether to verify SSL certificates
+            headers: Extra request headers
+
+        Returns:
+            AsyncResponse: The response, with its content read
+
+        Raises:
+            aiohttp.ClientError: If the request keeps failing
+        """
+        import asyncio
+        import aiohttp
+
+        limit = self.limiter.for_url(url)
+
+        for attempt in range(RETRYING_NUM + 1):
+            last_try = attempt == RETRYING_NUM
+            status, retry_after = None, None
+            await limit.aacquire()
+            try:
+                async with self.session.get(url, proxy=proxy, headers=headers,
+                                            ssl=None if verify else False) as response:
+                    status, retry_after = response.status, response.headers.get('Retry-After')
+                    if last_try or (status not in RETRY_STATUS_CODES and status not in THROTTLE_STATUS_CODES):
+                        return AsyncResponse(status, response.headers, await response.read())
+                    log.debug("Retrying %s after status code %s", url, status)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if last_try:
+                    raise
+            finally:
+                limit.release(status, retry_after)
+
+            record_retry(url, status)
+
+            # Throttled requests wait in aacquire until the host is unpaused
+            if status not in THROTTLE_STATUS_CODES:
+                await asyncio.sleep(0.5 * (2 ** attempt))
+
+    async def close(self) -> None:
+        """Close the session and release all pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "AsyncRequestSession":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+
+_default_async_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncRequestSession]" = \
+    weakref.WeakKeyDictionary()
+
+
+def get_async_session() -> AsyncRequestSession:
+    """
+    Get the shared async session of the running event loop, creating it if necessary.
+
+    Returns:
+        AsyncRequestSession: The shared session of the running loop
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    session = _default_async_sessions.get(loop)
+    if session is None:
+        session = _default_async_sessions[loop] = AsyncRequestSession()
+    return session
+
+
+async def close_async_session() -> None:
+    """Close the shared async session of the running event loop, if it has been created."""
+    import asyncio
+
+    session = _default_async_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+async def aget_html(
+        url: str,
+        proxies: Optional[Dict[str, str]] = None,
+        system_proxy: bool = False,
+        verify: bool = True,
+        session: Optional[AsyncRequestSession] = None,
+        cache: Optional[HTTPCache] = None,
+        ttl: Optional[float] = None
+) -> bytes:
+    """
+    Asynchronous counterpart of get_html.
+
+    The cache is an SQLite database, so it is read and written on a worker thread
+    rather than on the event loop.
+
+    Args:
+        url: Target URL
+        proxies: Proxy configuration
+        system_proxy: Whether to use system proxy
+        verify: Whether to verify SSL certificates
+        session: Session to send the request through, defaults to the shared session of the running loop
+        cache: Cache to serve and store the response, no caching if omitted
+        ttl: Seconds the response stays fresh in the cache, the cache default if omitted
+
+    Returns:
+        bytes: HTML content
+
+    Raises:
+        SearchRequestError: If request fails
+    """
+    if system_proxy:
+        proxies = get_system_proxies()
+
+    proxy = None
+    if proxies:
+        proxy = proxies.get('https' if url.startswith('https') else 'http')
+
+    import asyncio
+
+    entry = None if cache is None else await asyncio.to_thread(cached_entry, url, cache)
+    if entry is not None and entry.fresh:
+        record_request(url, None, 0.0, len(entry.body), cached=True)
+        return entry.body
+
+    if session is None:
+        session = get_async_session()
+
+    start = time.perf_counter()
+    try:
+        log.debug("Making async request to URL: %s", url)
+        response = await session.get(url, proxy=proxy, verify=verify,
+                                     headers=entry.validators() if entry else None)
+    except ImportError:
+        raise
+    except Exception as e:
+        record_request(url, None, time.perf_counter() - start, 0)
         raise SearchRequestError(f"Request failed for URL {url}: {e!r}")
 
-    finally:
-        session.close()
+    record_request(url, response.status_code, time.perf_counter() - start, len(response.content),
+                   cached=entry is not None and response.status_code == 304)
+    if cache is None:
+        return cache_response(response, url, cache, entry, ttl)
+    return await asyncio.to_thread(cache_response, response, url, cache, entry, ttl)
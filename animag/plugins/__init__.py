@@ -1,8 +1,81 @@
 import importlib
+import logging
+import threading
+import time
 from abc import ABCMeta, abstractmethod
-from typing import List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import (Any, List, Dict, Set, Tuple, Optional, Union, Callable, Iterator, Awaitable, AsyncIterator,
+                    TYPE_CHECKING)
 
-from .. import *
+from .. import log, PluginImportError
+from ..component.Anime import Anime, TimeFormat
+from ..component.cache import HTTPCache
+from ..component.metrics import record_page
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+    from ..component.webget import RequestSession, AsyncRequestSession
+
+BACKENDS = ('soup', 'lxml')
+ENTRY_POINT_GROUP = 'animag.plugins'
+# Bundled plugins as 'module:class', imported on first use
+BUILTIN_PLUGINS = {
+    'dmhy': '.dmhy:Dmhy',
+    'nyaa': '.nyaa:Nyaa',
+    'tokyotosho': '.tokyotosho:Tokyotosho',
+    'acgrip': '.acgrip:Acgrip',
+    '_miobt': '._miobt:_Miobt',
+}
+ALIASES = {'miobt': '_miobt'}
+
+_registry: Dict[str, Union[str, type]] = dict(BUILTIN_PLUGINS)
+_registry_lock = threading.Lock()
+_entry_points_loaded = False
+# Names already looked up as modules of this package, so a missing plugin is only searched for once
+_imported_names: Set[str] = set()
+
+
+class PageResults(list):
+    """Results of a result page, along with the number of the last page when the page announces it."""
+    last_page: Optional[int] = None
+
+
+class PageEnd:
+    """
+    First page past the results of a walk over the result pages, learned from the pages parsed so far.
+
+    Pages are parsed out of order by the workers of _iter_pages, which record an
+    empty page as soon as they parse it, so that the pages after it which are
+    not yet requested never are. With ``short_pages``, a page shorter than the
+    first one is the last page too.
+    """
+    __slots__ = ('start', 'short_pages', 'rows', 'page')
+
+    def __init__(self, start: int, short_pages: bool = False):
+        self.start = start
+        self.short_pages = short_pages
+        # Rows of the first page, the number of rows of a full page
+        self.rows: Optional[int] = None
+        self.page: Optional[int] = None
+
+    def reached(self, page: int) -> bool:
+        """Whether a page is known to be past the results."""
+        return self.page is not None and page >= self.page
+
+    def update(self, page: int, results: List[Any]) -> None:
+        """Record the results of a parsed page."""
+        if page == self.start:
+            self.rows = len(results)
+        if not results:
+            end = page
+        elif self.short_pages and self.rows is not None and page > self.start and len(results) < self.rows:
+            end = page + 1
+        else:
+            return
+        if self.page is None or end < self.page:
+            self.page = end
 
 
 class PluginMeta(ABCMeta):
@@ -17,6 +90,25 @@ class PluginMeta(ABCMeta):
 
 class BasePlugin(metaclass=PluginMeta):
     abstract = True
+    session: Optional["RequestSession"] = None
+    async_session: Optional["AsyncRequestSession"] = None
+    cache: Optional[HTTPCache] = None
+    cache_ttl: Optional[float] = None
+    prefetch: int = 3
+    # Start with a single page in flight and double the window after each full page, for searches likely to stop early;
+    # None starts slow only when _last_page cannot tell the last page, so a single page of results costs one request
+    slow_start: Optional[bool] = None
+    # Pages requested at once once the number of pages is known from the first page, see _last_page
+    burst_pages: int = 16
+    # False when _last_page only sees the pages linked around the current one, so the pages past it are still probed
+    last_page_exact: bool = True
+    # True when every page but the last one is full, so a page shorter than the first one ends the results.
+    # Off by default, as sites may drop rows and plugins skip malformed ones
+    short_last_page: bool = False
+    # 'soup' parses pages with BeautifulSoup through _parse_page, 'lxml' uses _parse_page_lxml
+    backend: str = 'lxml'
+    # Replaced by the logger of the searcher, see animag.get_logger
+    logger: logging.Logger = log
 
     def __init__(self,
                  parser: Optional[str] = None,
@@ -24,7 +116,29 @@ class BasePlugin(metaclass=PluginMeta):
                  timefmt: Optional[str] = None):
         self._parser = parser
         self._verify = verify
-        self.timefmt = timefmt
+        self.time_format = TimeFormat(timefmt)
+
+    @property
+    def timefmt(self) -> str:
+        return self.time_format.fmt
+
+    @timefmt.setter
+    def timefmt(self, timefmt: str) -> None:
+        self.time_format.fmt = timefmt
+
+    def _anime(self, timestamp: Optional[float], title: str, size: Optional[str], magnet: Optional[str],
+               torrent: Optional[str] = None) -> Anime:
+        """
+        Build a search result whose release time is displayed with the time format of the plugin.
+
+        Args:
+        - timestamp: Release time as an epoch timestamp
+        - title: Title of the release
+        - size: Size string
+        - magnet: Magnet link
+        - torrent: Torrent download link
+        """
+        return Anime(None, title, size, magnet, torrent, timestamp=timestamp, time_format=self.time_format)
 
     @abstractmethod
     def search(self, keyword: str,
@@ -44,20 +158,478 @@ class BasePlugin(metaclass=PluginMeta):
         """
         pass
 
+    def iter_search(self, keyword: str,
+                    collected: Optional[bool] = None,
+                    proxies: Optional[dict] = None,
+                    system_proxy: Optional[bool] = None,
+                    max_pages: Optional[int] = None,
+                    slow_start: Optional[bool] = None,
+                    **extra_options) -> Iterator[Anime]:
+        """
+        Search for a keyword, yielding results as soon as each page is parsed.
+
+        Plugins without a native implementation yield the results of search.
+        Closing the generator stops requesting further pages.
+
+        Args:
+        - keyword: Search keyword
+        - collected: Collected data
+        - proxies: Proxy settings
+        - system_proxy: Whether to use system proxy
+        - max_pages: Maximum number of pages to request, unlimited if omitted
+        - slow_start: Start with a single page in flight, see _iter_pages, self.slow_start if omitted
+        - extra_options: Extra options for the search engine
+        """
+        kwargs = {
+            **({} if collected is None else {'collected': collected}),
+            **({} if proxies is None else {'proxies': proxies}),
+            **({} if system_proxy is None else {'system_proxy': system_proxy}),
+            **extra_options
+        }
+        yield from self.search(keyword, **kwargs) or []
+
+    async def asearch(self, keyword: str,
+                      collected: Optional[bool] = None,
+                      proxies: Optional[dict] = None,
+                      system_proxy: Optional[bool] = None,
+                      **extra_options) -> List[Anime] | None:
+        """
+        Asynchronous counterpart of search.
+
+        Plugins without a native implementation run their blocking search in a worker thread.
+
+        Args:
+        - keyword: Search keyword
+        - collected: Collected data
+        - proxies: Proxy settings
+        - system_proxy: Whether to use system proxy
+        - extra_options: Extra options for the search engine
+        """
+        kwargs = {
+            **({} if collected is None else {'collected': collected}),
+            **({} if proxies is None else {'proxies': proxies}),
+            **({} if system_proxy is None else {'system_proxy': system_proxy}),
+            **extra_options
+        }
+        import asyncio
+
+        return await asyncio.to_thread(self.search, keyword, **kwargs)
+
+    async def aiter_search(self, keyword: str,
+                           collected: Optional[bool] = None,
+                           proxies: Optional[dict] = None,
+                           system_proxy: Optional[bool] = None,
+                           max_pages: Optional[int] = None,
+                           slow_start: Optional[bool] = None,
+                           **extra_options) -> AsyncIterator[Anime]:
+        """
+        Asynchronous counterpart of iter_search, iterated with ``async for``.
+
+        Plugins without a native implementation yield the results of asearch.
+        Closing the generator stops requesting further pages.
+
+        Args:
+        - keyword: Search keyword
+        - collected: Collected data
+        - proxies: Proxy settings
+        - system_proxy: Whether to use system proxy
+        - max_pages: Maximum number of pages to request, unlimited if omitted
+        - slow_start: Start with a single page in flight, see _iter_pages, self.slow_start if omitted
+        - extra_options: Extra options for the search engine
+        """
+        kwargs = {
+            **({} if collected is None else {'collected': collected}),
+            **({} if proxies is None else {'proxies': proxies}),
+            **({} if system_proxy is None else {'system_proxy': system_proxy}),
+            **extra_options
+        }
+        for anime in await self.asearch(keyword, **kwargs) or []:
+            yield anime
+
+    def _page_url(self, page: int, params: dict) -> str:
+        """
+        Build the URL of a result page, used by _fetch_page and _afetch_page.
+
+        Args:
+        - page: Page number
+        - params: Query parameters of the search
+        """
+        raise NotImplementedError
+
+    def _parse_page(self, html: bytes, page: int) -> List[Any]:
+        """
+        Parse a result page, used by _fetch_page and _afetch_page.
+
+        Args:
+        - html: Content of the page
+        - page: Page number
+
+        Returns:
+        - The results of the page, an empty list past the last page
+        """
+        raise NotImplementedError
+
+    def _parse_page_lxml(self, html: bytes, page: int) -> List[Any]:
+        """
+        Parse a result page with lxml XPath, producing the same results as _parse_page.
+
+        Args:
+        - html: Content of the page
+        - page: Page number
+
+        Returns:
+        - The results of the page, an empty list past the last page
+        """
+        raise NotImplementedError
+
+    def _last_page(self, html: bytes, page: int) -> Optional[int]:
+        """
+        Find the number of the last result page in the pagination or the result count of a page.
+
+        Plugins implementing it let _iter_pages request the first page alone, then
+        every remaining page at once, instead of probing for the first empty page.
+
+        Args:
+        - html: Content of the page
+        - page: Page number
+
+        Returns:
+        - The number of the last page, None if the page does not tell
+        """
+        return None
+
+    @property
+    def _discovers_pages(self) -> bool:
+        return type(self)._last_page is not BasePlugin._last_page
+
+    def _starts_slow(self, slow_start: Optional[bool]) -> bool:
+        """Resolve the slow_start argument of a walk over the result pages, see self.slow_start."""
+        if slow_start is None:
+            slow_start = self.slow_start
+        return not self._discovers_pages if slow_start is None else slow_start
+
+    def _parse(self, html: bytes, page: int) -> List[Any]:
+        """Parse a result page with the selected backend, plugins without an lxml parser use _parse_page."""
+        start = time.perf_counter()
+        if self.backend == 'lxml' and type(self)._parse_page_lxml is not BasePlugin._parse_page_lxml:
+            rows = self._parse_page_lxml(html, page)
+        else:
+            rows = self._parse_page(html, page)
+
+        if rows and self._discovers_pages:
+            last_page = self._last_page(html, page)
+            if last_page is not None:
+                rows = PageResults(rows)
+                rows.last_page = last_page
+
+        record_page(page, len(rows), time.perf_counter() - start)
+        return rows
+
+    def _soup(self, html: bytes) -> "BeautifulSoup":
+        """
+        Build the BeautifulSoup tree of a page, used by the 'soup' backend.
+
+        Args:
+        - html: Content of the page
+        """
+        from bs4 import BeautifulSoup
+
+        return BeautifulSoup(html, self._parser)
+
+    def _fetch_page(self, page: int, params: dict, proxies: Optional[dict], system_proxy: bool) -> List[Any]:
+        from ..component.webget import get_html
+
+        self.logger.debug("Processing the page of %d", page)
+
+        html = get_html(self._page_url(page, params), verify=self._verify, proxies=proxies,
+                        system_proxy=system_proxy, session=self.session, cache=self.cache, ttl=self.cache_ttl)
+        return self._parse(html, page)
+
+    async def _afetch_page(self, page: int, params: dict, proxies: Optional[dict], system_proxy: bool) -> List[Any]:
+        from ..component.webget import aget_html
+
+        self.logger.debug("Processing the page of %d", page)
+
+        html = await aget_html(self._page_url(page, params), verify=self._verify, proxies=proxies,
+                               system_proxy=system_proxy, session=self.async_session,
+                               cache=self.cache, ttl=self.cache_ttl)
+        return self._parse(html, page)
+
+    def _plan_pages(self, results: List[Any], start: int, stop: Optional[int],
+                    slow_start: bool) -> Tuple[Optional[int], int]:
+        """
+        Adjust a walk over the result pages to the last page announced by its first page.
+
+        Args:
+        - results: Results of the first page
+        - start: Number of the first page
+        - stop: Number of the page to stop before, None for no limit
+        - slow_start: Whether the walk started with a single page in flight
+
+        Returns:
+        - The page to stop before, and the page before which every page is requested at once
+        """
+        last_page = getattr(results, 'last_page', None)
+        if last_page is None:
+            return stop, start
+
+        end = max(start, last_page) + 1
+        if stop is not None:
+            end = min(stop, end)
+        if self.last_page_exact:
+            stop = end
+        return stop, start if slow_start else end
+
+    def _iter_pages(self, fetch_page: Callable[[int], List[Any]], start: int = 1,
+                    max_pages: Optional[int] = None, slow_start: Optional[bool] = None) -> Iterator[List[Any]]:
+        """
+        Walk the result pages in order, keeping the next pages in flight.
+
+        Plugins implementing _last_page request the first page alone, then every
+        remaining page at once (up to ``self.burst_pages``), and stop at the last
+        page without probing past it. Other plugins keep up to ``self.prefetch``
+        pages in flight speculatively, starting from a single page unless
+        ``slow_start`` is False. Once an empty page is parsed, or a short one with
+        ``self.short_last_page``, the pages after it are no longer requested, and
+        pages requested beyond it are discarded.
+
+        Pages are fetched on a thread pool, in the context of the caller so their
+        metrics are collected.
+
+        Args:
+        - fetch_page: Function fetching and parsing a page by its number, returning an empty list past the last page
+        - start: Number of the first page
+        - max_pages: Maximum number of pages to request, unlimited if omitted
+        - slow_start: Start with a single page in flight and double the window after each full page,
+          self.slow_start if omitted
+
+        Yields:
+        - The non-empty results of each page, in page order
+        """
+        slow_start = self._starts_slow(slow_start)
+        stop = None if max_pages is None else start + max_pages
+        window = max(1, self.prefetch if max_pages is None else min(self.prefetch, max_pages))
+        end = PageEnd(start, self.short_last_page)
+
+        def fetch(page: int) -> List[Any]:
+            if end.reached(page):
+                return []
+            results = fetch_page(page)
+            end.update(page, results)
+            return results
+
+        if window == 1:
+            page = start
+            while (stop is None or page < stop) and (results := fetch(page)):
+                yield results
+                if page == start:
+                    stop = self._plan_pages(results, start, stop, slow_start)[0]
+                page += 1
+            return
+
+        discovers = self._discovers_pages
+        workers = max(window, self.burst_pages) if discovers else window
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=self.name) as executor:
+            pending = deque()
+            next_page = start
+            burst_end = start
+            in_flight = 1 if slow_start or discovers else window
+
+            try:
+                while True:
+                    while (stop is None or next_page < stop) and \
+                            len(pending) < (max(in_flight, self.burst_pages) if next_page < burst_end else in_flight):
+                        pending.append(executor.submit(copy_context().run, fetch, next_page))
+                        next_page += 1
+
+                    if not pending:
+                        break
+
+                    page = next_page - len(pending)
+                    results = pending.popleft().result()
+                    if not results:
+                        break
+
+                    if page == start:
+                        stop, burst_end = self._plan_pages(results, start, stop, slow_start)
+                        while pending and stop is not None and next_page > stop:
+                            pending.pop().cancel()
+                            next_page -= 1
+
+                    yield results
+                    in_flight = min(window, in_flight * 2)
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    async def _aiter_pages(self, fetch_page: Callable[[int], Awaitable[List[Any]]], start: int = 1,
+                           max_pages: Optional[int] = None,
+                           slow_start: Optional[bool] = None) -> AsyncIterator[List[Any]]:
+        """
+        Asynchronous counterpart of _iter_pages, keeping the next pages in flight as tasks.
+
+        Args:
+        - fetch_page: Coroutine function fetching and parsing a page by its number
+        - start: Number of the first page
+        - max_pages: Maximum number of pages to request, unlimited if omitted
+        - slow_start: Start with a single page in flight, self.slow_start if omitted
+
+        Yields:
+        - The non-empty results of each page, in page order
+        """
+        import asyncio
+
+        slow_start = self._starts_slow(slow_start)
+        stop = None if max_pages is None else start + max_pages
+        window = max(1, self.prefetch if max_pages is None else min(self.prefetch, max_pages))
+        end = PageEnd(start, self.short_last_page)
+
+        async def fetch(page: int) -> List[Any]:
+            if end.reached(page):
+                return []
+            results = await fetch_page(page)
+            end.update(page, results)
+            return results
+
+        pending = deque()
+        next_page = start
+        burst_end = start
+        burst = max(window, self.burst_pages)
+        in_flight = 1 if slow_start or self._discovers_pages else window
+
+        try:
+            while True:
+                while (stop is None or next_page < stop) and \
+                        len(pending) < (max(in_flight, burst) if next_page < burst_end else in_flight):
+                    pending.append(asyncio.ensure_future(fetch(next_page)))
+                    next_page += 1
+
+                if not pending:
+                    break
+
+                page = next_page - len(pending)
+                results = await pending.popleft()
+                if not results:
+                    break
+
+                if page == start:
+                    stop, burst_end = self._plan_pages(results, start, stop, slow_start)
+                    while pending and stop is not None and next_page > stop:
+                        self._discard(pending.pop())
+                        next_page -= 1
+
+                yield results
+                in_flight = min(window, in_flight * 2)
+        finally:
+            for task in pending:
+                self._discard(task)
+
+    @staticmethod
+    def _discard(task) -> None:
+        """Cancel a page task, retrieving the outcome of a finished one so it is not reported as unhandled."""
+        if not task.cancel() and not task.cancelled():
+            task.exception()
+
+
+def register_plugin(name: str, plugin: Union[str, type]) -> None:
+    """
+    Register a plugin under a name, replacing any plugin of the same name.
+
+    Args:
+    - name: Name of the plugin, as given to Searcher
+    - plugin: The plugin class, or its 'module:class' path imported on first use
+    """
+    with _registry_lock:
+        _registry[name] = plugin
+
+
+def _load_entry_points() -> None:
+    """Register the plugins of installed packages, declared in the 'animag.plugins' entry point group."""
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+
+    from importlib.metadata import entry_points
+
+    with _registry_lock:
+        if _entry_points_loaded:
+            return
+        _entry_points_loaded = True
+
+        try:
+            for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+                _registry.setdefault(entry_point.name, entry_point.value)
+        except Exception as e:
+            log.error("Failed to load the plugin entry points: %r", e)
+
+
+def available_plugins() -> List[str]:
+    """
+    List the names of the bundled, registered and installed plugins.
+
+    Returns:
+    - The plugin names
+    """
+    _load_entry_points()
+    return sorted(_registry)
+
+
+def _defined_plugin(name: str) -> Optional[type]:
+    """Find a plugin class already defined, by the class name matching a plugin name."""
+    return PluginMeta.plugins.get(name.title()) or PluginMeta.plugins.get(name)
+
 
 def get_plugin(name: str):
     """
     Get a plugin by its name.
 
+    Plugins are looked up in the registry, then in the 'animag.plugins' entry
+    points, then among the plugin classes already defined, then in the module
+    of the same name in this package, and are imported the first time they are
+    requested.
+
     Args:
     - name: Name of the plugin
 
     Returns:
-    - Plugin class if found, otherwise None
+    - The plugin class
+
+    Raises:
+    - PluginImportError: If the plugin cannot be found or imported
     """
-    try:
-        importlib.import_module(f".{name}", package=__name__)
-    except:
-        raise PluginImportError(f"The plugin {name} cannot be imported, maybe you must import it manually.")
+    name = ALIASES.get(name, name)
+    plugin = _registry.get(name)
+    if plugin is None:
+        _load_entry_points()
+        plugin = _registry.get(name)
+
+    if plugin is None:
+        # Plugins defined by the application register themselves by class name when their module is imported
+        plugin = _defined_plugin(name)
+        if plugin is None and name not in _imported_names:
+            # Plugins dropped into this package are found by their module name, see the README
+            _imported_names.add(name)
+            try:
+                importlib.import_module(f".{name}", package=__name__)
+            except ModuleNotFoundError as e:
+                if e.name != f"{__name__}.{name}":
+                    raise PluginImportError(f"The plugin {name} cannot be imported: {e!r}")
+            except Exception as e:
+                raise PluginImportError(f"The plugin {name} cannot be imported: {e!r}")
+            plugin = _defined_plugin(name)
+
+        if plugin is None:
+            raise PluginImportError(f"The plugin {name} cannot be found, maybe you must import or register it manually.")
+        return plugin
+
+    if isinstance(plugin, str):
+        module_name, _, class_name = plugin.partition(':')
+        try:
+            plugin = getattr(importlib.import_module(module_name, package=__name__), class_name)
+        except (ImportError, AttributeError) as e:
+            raise PluginImportError(f"The plugin {name} cannot be imported: {e!r}")
+
+        with _registry_lock:
+            _registry[name] = plugin
 
-    return PluginMeta.plugins.get(name.title())
+    return plugin
@@ -1,19 +1,29 @@
 # Stable
 import re
 import time
-from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from contextvars import copy_context
+from typing import Optional, List, Tuple, Iterator, AsyncIterator
 from urllib.parse import urlencode
 
-from bs4 import BeautifulSoup
+from lxml.etree import XPath
 
 from animag.component.Anime import Anime
-from animag.component.webget import get_html
+from animag.component.cache import IMMUTABLE
+from animag.component.fastparse import parse_html, class_xpath, get_text, get_string
+from animag.component.webget import get_html, aget_html
 from . import BasePlugin
-from .. import log
 
 DOMAIN = "https://miobt.com/"
 BASE_URL = "https://miobt.com/search.php?"
 
+TBODY_XPATH = XPath(f"(//tbody[{class_xpath('tbody')} and @id='data_list'])[1]")
+MAIN_XPATH = XPath(f"(//*[@id='btm'])[1]//*[{class_xpath('main')} and @id='']")
+SCRIPT_XPATH = XPath("(.//script)[1]/following-sibling::script")
+PAGES_PATTERN = re.compile(rb'<div class="pages">(.*?)</div>', re.S)
+PAGE_LINK_PATTERN = re.compile(rb'[?&;]page=(\d+)')
+
 
 def get_magnet(script: str) -> str:
     hash_id = re.search(r"hash_id'\] = \"(.+?)\"", script)
@@ -27,64 +37,170 @@ def get_magnet(script: str) -> str:
 
 class _Miobt(BasePlugin):
     abstract = False
+    detail_workers: int = 8
+    # The magnet of a release never changes, so its detail page never has to be downloaded again
+    detail_cache_ttl: Optional[float] = IMMUTABLE
+    # The pagination only links the pages around the current one
+    last_page_exact = False
 
     def __init__(self, parser: str = 'lxml', verify: bool = False, timefmt: str = r'%Y/%m/%d %H:%M') -> None:
         super().__init__(parser, verify, timefmt)
 
     def search(self, keyword: str, collected: bool = True, proxies: Optional[dict] = None,
                system_proxy: bool = False, **extra_options) -> List[Anime]:
-        animes: List[Anime] = []
+        return list(self.iter_search(keyword, collected, proxies, system_proxy, **extra_options))
+
+    def iter_search(self, keyword: str, collected: bool = True, proxies: Optional[dict] = None,
+                    system_proxy: bool = False, max_pages: Optional[int] = None,
+                    slow_start: Optional[bool] = None, **extra_options) -> Iterator[Anime]:
         prev_anime_title = ""
-        page = 1
+        params = self._search_params(keyword, collected, extra_options)
+        pages = self._iter_pages(lambda page: self._fetch_page(page, params, proxies, system_proxy),
+                                 max_pages=max_pages, slow_start=slow_start)
+
+        # Miobt keeps serving the last page past the end, so pages are compared by their first title
+        with ThreadPoolExecutor(max_workers=max(1, self.detail_workers),
+                                thread_name_prefix="miobt-detail") as executor:
+            for rows in pages:
+                if rows[0][1] == prev_anime_title:
+                    break
+
+                prev_anime_title = rows[0][1]
+
+                details = [executor.submit(copy_context().run, self._fetch_anime, row, proxies, system_proxy)
+                           for row in rows]
+                try:
+                    yield from (anime for anime in (future.result() for future in details) if anime is not None)
+                finally:
+                    for future in details:
+                        future.cancel()
+
+    async def asearch(self, keyword: str, collected: bool = True, proxies: Optional[dict] = None,
+                      system_proxy: bool = False, max_pages: Optional[int] = None,
+                      **extra_options) -> List[Anime]:
+        return [anime async for anime in self.aiter_search(keyword, collected, proxies, system_proxy,
+                                                           max_pages=max_pages, **extra_options)]
+
+    async def aiter_search(self, keyword: str, collected: bool = True, proxies: Optional[dict] = None,
+                           system_proxy: bool = False, max_pages: Optional[int] = None,
+                           slow_start: Optional[bool] = None, **extra_options) -> AsyncIterator[Anime]:
+        import asyncio
 
+        prev_anime_title = ""
+        params = self._search_params(keyword, collected, extra_options)
+        semaphore = asyncio.Semaphore(max(1, self.detail_workers))
+
+        pages = self._aiter_pages(lambda page: self._afetch_page(page, params, proxies, system_proxy),
+                                  max_pages=max_pages, slow_start=slow_start)
+        async with aclosing(pages):
+            async for rows in pages:
+                if rows[0][1] == prev_anime_title:
+                    break
+
+                prev_anime_title = rows[0][1]
+
+                details = await asyncio.gather(
+                    *(self._afetch_anime(row, proxies, system_proxy, semaphore) for row in rows)
+                )
+                for anime in details:
+                    if anime is not None:
+                        yield anime
+
+    def _search_params(self, keyword: str, collected: bool, extra_options: dict) -> dict:
         params = {'keyword': keyword, **extra_options}
         if collected:
             params['complete'] = 1
 
-        while True:
-            params['page'] = page
-            url = BASE_URL + urlencode(params)
+        return params
 
-            try:
-                html = get_html(url, verify=self._verify, proxies=proxies, system_proxy=system_proxy)
-                bs = BeautifulSoup(html, self._parser)
-                tbody = bs.find("tbody", class_="tbody", id="data_list")
+    def _page_url(self, page: int, params: dict) -> str:
+        return BASE_URL + urlencode({**params, 'page': page})
 
-                if not tbody:
-                    break
+    def _last_page(self, html: bytes, page: int) -> Optional[int]:
+        match = PAGES_PATTERN.search(html)
+        if match is None:
+            return None
+        return max((int(number) for number in PAGE_LINK_PATTERN.findall(match.group(1))), default=page)
 
-                current_titles = [tr.find_all("td")[2].a.get_text(strip=True) for tr in tbody.find_all("tr")]
-                if not current_titles or current_titles[0] == prev_anime_title:
-                    break
+    def _parse_page(self, html: bytes, page: int) -> List[Tuple[float, str, str, str]]:
+        rows = []
+
+        try:
+            bs = self._soup(html)
+            tbody = bs.find("tbody", class_="tbody", id="data_list")
+
+            if not tbody:
+                return rows
+
+            for tr in tbody.find_all("tr"):
+                tds = tr.find_all("td")
+                timestamp = time.mktime(time.strptime(tds[0].get_text(strip=True), '%Y/%m/%d'))
+
+                title = tds[2].a.get_text(strip=True)
+                link = DOMAIN + tds[2].a["href"]
+                size = tds[3].string
+
+                rows.append((timestamp, title, link, size))
+
+        except Exception as e:
+            self.logger.error("Error occurred while processing page %d: %s", page, e)
+            raise
+
+        return rows
+
+    def _parse_page_lxml(self, html: bytes, page: int) -> List[Tuple[float, str, str, str]]:
+        rows = []
+
+        try:
+            tbody = TBODY_XPATH(parse_html(html))
+
+            if not tbody:
+                return rows
+
+            for tr in tbody[0].iterfind(".//tr"):
+                tds = tr.findall(".//td")
+                timestamp = time.mktime(time.strptime(get_text(tds[0]), '%Y/%m/%d'))
+
+                a = tds[2].find(".//a")
+                title = get_text(a)
+                link = DOMAIN + a.get("href")
+                size = get_string(tds[3])
 
-                prev_anime_title = current_titles[0]
+                rows.append((timestamp, title, link, size))
 
-                for tr in tbody.find_all("tr"):
-                    tds = tr.find_all("td")
-                    release_time = tds[0].get_text(strip=True)
-                    release_time = time.strftime(self.timefmt, time.strptime(release_time, '%Y/%m/%d'))
+        except Exception as e:
+            self.logger.error("Error occurred while processing page %d: %s", page, e)
+            raise
 
-                    title = tds[2].a.get_text(strip=True)
-                    link = DOMAIN + tds[2].a["href"]
-                    size = tds[3].string
+        return rows
 
-                    try:
-                        link_html = get_html(link, verify=self._verify, proxies=proxies, system_proxy=system_proxy)
-                        link_bs = BeautifulSoup(link_html, self._parser)
-                        script = link_bs.find(id="btm").find(class_="main", id="").script.find_next_siblings("script")[
-                            -1].string
-                        magnet = get_magnet(script)
-                    except (ValueError, AttributeError, IndexError) as e:
-                        log.error(f"Failed to get magnet link for {title}: {e}")
-                        continue
+    def _fetch_anime(self, row: Tuple[float, str, str, str], proxies: Optional[dict],
+                     system_proxy: bool) -> Optional[Anime]:
+        link_html = get_html(row[2], verify=self._verify, proxies=proxies, system_proxy=system_proxy,
+                             session=self.session, cache=self.cache, ttl=self.detail_cache_ttl)
+        return self._parse_detail(row, link_html)
 
-                    log.debug(f"Successfully got: {title}")
-                    animes.append(Anime(release_time, title, size, magnet))
+    async def _afetch_anime(self, row: Tuple[float, str, str, str], proxies: Optional[dict],
+                            system_proxy: bool, semaphore: "asyncio.Semaphore") -> Optional[Anime]:
+        async with semaphore:
+            link_html = await aget_html(row[2], verify=self._verify, proxies=proxies, system_proxy=system_proxy,
+                                        session=self.async_session, cache=self.cache, ttl=self.detail_cache_ttl)
+        return self._parse_detail(row, link_html)
 
-                page += 1
+    def _parse_detail(self, row: Tuple[float, str, str, str], link_html: bytes) -> Optional[Anime]:
+        timestamp, title, link, size = row
 
-            except Exception as e:
-                log.error(f"Error occurred while processing page {page}: {e}")
-                raise
+        try:
+            if self.backend == 'lxml':
+                script = get_string(SCRIPT_XPATH(MAIN_XPATH(parse_html(link_html))[0])[-1])
+            else:
+                link_bs = self._soup(link_html)
+                script = link_bs.find(id="btm").find(class_="main", id="").script.find_next_siblings("script")[
+                    -1].string
+            magnet = get_magnet(script)
+        except (ValueError, AttributeError, IndexError) as e:
+            self.logger.error("Failed to get magnet link for %s: %s", title, e)
+            return None
 
-        return animes
+        self.logger.debug("Successfully got: %s", title)
+        return self._anime(timestamp, title, size, magnet)
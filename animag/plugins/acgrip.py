@@ -1,64 +1,122 @@
-import time
-from typing import List
+import logging
+from contextlib import aclosing
+from typing import List, Iterator, AsyncIterator, Optional
 from urllib.parse import urlencode
 
-from bs4 import BeautifulSoup
+from lxml.etree import XPath
 
 from . import BasePlugin
-from .. import *
+from .. import SearchParserError
+from ..component.Anime import Anime
+from ..component.fastparse import parse_html, get_text, get_string
 
 DOMAIN = "https://acg.rip"
 BASE_URL = "https://acg.rip/page/{}?"
 
+ROWS_XPATH = XPath("(//thead)[1]/following-sibling::tr")
+
 
 class Acgrip(BasePlugin):
     abstract = False
+    # Warned on the first search rather than at construction, once the searcher has set self.logger
+    _warned: bool = False
 
     def __init__(self, parser: str = 'lxml', verify: bool = False, timefmt: str = r'%Y/%m/%d %H:%M') -> None:
-        log.warning("Using acg.rip searcher can only return torrent download addresses.")
         super().__init__(parser, verify, timefmt)
 
     def search(self, keyword: str, collected: bool = False, proxies: Optional[dict] = None,
                system_proxy: bool = False, **extra_options) -> List[Anime] | None:
-        animes: List[Anime] = []
-        page = 1
+        return list(self.iter_search(keyword, collected, proxies, system_proxy, **extra_options))
+
+    def iter_search(self, keyword: str, collected: bool = False, proxies: Optional[dict] = None,
+                    system_proxy: bool = False, max_pages: Optional[int] = None,
+                    slow_start: Optional[bool] = None, **extra_options) -> Iterator[Anime]:
+        params = self._search_params(keyword, collected, extra_options)
+        pages = self._iter_pages(lambda page: self._fetch_page(page, params, proxies, system_proxy),
+                                 max_pages=max_pages, slow_start=slow_start)
+        for animes in pages:
+            yield from animes
+
+    async def asearch(self, keyword: str, collected: bool = False, proxies: Optional[dict] = None,
+                      system_proxy: bool = False, max_pages: Optional[int] = None,
+                      **extra_options) -> List[Anime] | None:
+        return [anime async for anime in self.aiter_search(keyword, collected, proxies, system_proxy,
+                                                           max_pages=max_pages, **extra_options)]
+
+    async def aiter_search(self, keyword: str, collected: bool = False, proxies: Optional[dict] = None,
+                           system_proxy: bool = False, max_pages: Optional[int] = None,
+                           slow_start: Optional[bool] = None, **extra_options) -> AsyncIterator[Anime]:
+        params = self._search_params(keyword, collected, extra_options)
+        pages = self._aiter_pages(lambda page: self._afetch_page(page, params, proxies, system_proxy),
+                                  max_pages=max_pages, slow_start=slow_start)
+        async with aclosing(pages):
+            async for animes in pages:
+                for anime in animes:
+                    yield anime
+
+    def _search_params(self, keyword: str, collected: bool, extra_options: dict) -> dict:
+        if not self._warned:
+            self._warned = True
+            self.logger.warning("Using acg.rip searcher can only return torrent download addresses.")
 
         params = {'term': keyword, **extra_options}
         if collected:
-            log.warning("Acg.rip searcher does not support collection.")
+            self.logger.warning("Acg.rip searcher does not support collection.")
+
+        return params
+
+    def _page_url(self, page: int, params: dict) -> str:
+        return BASE_URL.format(page) + urlencode(params)
+
+    def _parse_page(self, html: bytes, page: int) -> List[Anime]:
+        animes: List[Anime] = []
+        debug = self.logger.isEnabledFor(logging.DEBUG)
 
-        while True:
-            log.debug(f"Processing the page of {page}")
+        try:
+            bs = self._soup(html)
+            tr = bs.thead.find_next_sibling("tr")
 
-            url = BASE_URL.format(page) + urlencode(params)
-            html = get_html(url, verify=self._verify, proxies=proxies, system_proxy=system_proxy)
+            while tr:
+                tds = tr.find_all("td")
 
-            try:
-                bs = BeautifulSoup(html, self._parser)
-                tr = bs.thead.find_next_sibling("tr")
+                timestamp = int(tds[0].find_all("div")[1].time.get("datetime"))
 
-                if tr is None:
-                    break
+                title = tds[1].find_all("a")[-1].get_text(strip=True)
+                magnet = DOMAIN + tds[2].a["href"]
+                size = tds[3].string
 
-                while tr:
-                    tds = tr.find_all("td")
+                if debug:
+                    self.logger.debug("Successfully got the magnet: %s", title)
 
-                    release_time = tds[0].find_all("div")[1].time.get("datetime")
-                    release_time = time.strftime(self.timefmt, time.localtime(int(release_time)))
+                animes.append(self._anime(timestamp, title, size, magnet))
+
+                tr = tr.find_next_sibling("tr")
+
+        except Exception as e:
+            raise SearchParserError(f"A error occurred while processing the page of {page} with error {e!r}")
+
+        return animes
+
+    def _parse_page_lxml(self, html: bytes, page: int) -> List[Anime]:
+        animes: List[Anime] = []
+        debug = self.logger.isEnabledFor(logging.DEBUG)
 
-                    title = tds[1].find_all("a")[-1].get_text(strip=True)
-                    magnet = DOMAIN + tds[2].a["href"]
-                    size = tds[3].string
+        try:
+            for tr in ROWS_XPATH(parse_html(html)):
+                tds = tr.findall(".//td")
 
-                    log.debug(f"Successfully got the magnet: {title}")
+                timestamp = int(tds[0].findall(".//div")[1].find(".//time").get("datetime"))
 
-                    animes.append(Anime(release_time, title, size, magnet))
+                title = get_text(tds[1].findall(".//a")[-1])
+                magnet = DOMAIN + tds[2].find(".//a").get("href")
+                size = get_string(tds[3])
 
-                    tr = tr.find_next_sibling("tr")
+                if debug:
+                    self.logger.debug("Successfully got the magnet: %s", title)
 
-                page += 1
+                animes.append(self._anime(timestamp, title, size, magnet))
 
-            except Exception as e:
-                raise SearchParserError(f"A error occurred while processing the page of {page} with error {e!r}")
+        except Exception as e:
+            raise SearchParserError(f"A error occurred while processing the page of {page} with error {e!r}")
 
         return animes
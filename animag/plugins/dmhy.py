@@ -1,14 +1,21 @@
+import logging
 import time
-from typing import List
+from contextlib import aclosing
+from typing import List, Iterator, AsyncIterator, Optional
 from urllib.parse import urlencode
 
-from bs4 import BeautifulSoup
+from lxml.etree import XPath
 
 from . import BasePlugin
-from .. import *
+from .. import SearchParserError
+from ..component.Anime import Anime
+from ..component.fastparse import parse_html, class_xpath, get_text, get_string
 
 BASE_URL = "https://dmhy.org/topics/list/page/{}?"
 
+ROWS_XPATH = XPath("(//tbody)[1]//tr")
+MAGNET_XPATH = XPath(f".//*[{class_xpath('download-arrow')}]/@href")
+
 
 class Dmhy(BasePlugin):
     abstract = False
@@ -18,42 +25,92 @@ class Dmhy(BasePlugin):
 
     def search(self, keyword: str, collected: bool = False, proxies: Optional[dict] = None,
                system_proxy: bool = False, **extra_options) -> List[Anime] | None:
-        animes: List[Anime] = []
-        page = 1
-
+        return list(self.iter_search(keyword, collected, proxies, system_proxy, **extra_options))
+
+    def iter_search(self, keyword: str, collected: bool = False, proxies: Optional[dict] = None,
+                    system_proxy: bool = False, max_pages: Optional[int] = None,
+                    slow_start: Optional[bool] = None, **extra_options) -> Iterator[Anime]:
+        params = self._search_params(keyword, collected, extra_options)
+        pages = self._iter_pages(lambda page: self._fetch_page(page, params, proxies, system_proxy),
+                                 max_pages=max_pages, slow_start=slow_start)
+        for animes in pages:
+            yield from animes
+
+    async def asearch(self, keyword: str, collected: bool = False, proxies: Optional[dict] = None,
+                      system_proxy: bool = False, max_pages: Optional[int] = None,
+                      **extra_options) -> List[Anime] | None:
+        return [anime async for anime in self.aiter_search(keyword, collected, proxies, system_proxy,
+                                                           max_pages=max_pages, **extra_options)]
+
+    async def aiter_search(self, keyword: str, collected: bool = False, proxies: Optional[dict] = None,
+                           system_proxy: bool = False, max_pages: Optional[int] = None,
+                           slow_start: Optional[bool] = None, **extra_options) -> AsyncIterator[Anime]:
+        params = self._search_params(keyword, collected, extra_options)
+        pages = self._aiter_pages(lambda page: self._afetch_page(page, params, proxies, system_proxy),
+                                  max_pages=max_pages, slow_start=slow_start)
+        async with aclosing(pages):
+            async for animes in pages:
+                for anime in animes:
+                    yield anime
+
+    def _search_params(self, keyword: str, collected: bool, extra_options: dict) -> dict:
         params = {'keyword': keyword, **extra_options}
         if collected:
             params['sort_id'] = "31"
 
-        while True:
-            log.debug(f"Processing the page of {page}")
+        return params
+
+    def _page_url(self, page: int, params: dict) -> str:
+        return BASE_URL.format(page) + urlencode(params)
+
+    def _parse_page(self, html: bytes, page: int) -> List[Anime]:
+        animes: List[Anime] = []
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+
+        try:
+            bs = self._soup(html)
+            tbody = bs.find("tbody")
 
-            url = BASE_URL.format(page) + urlencode(params)
-            html = get_html(url, verify=self._verify, proxies=proxies, system_proxy=system_proxy)
+            if not tbody:
+                return animes
 
-            try:
-                bs = BeautifulSoup(html, self._parser)
-                tbody = bs.find("tbody")
+            for tr in tbody.find_all("tr"):
+                tds = tr.find_all("td")
+                released = time.strptime(tds[0].span.string, '%Y/%m/%d %H:%M')
 
-                if not tbody:
-                    break
+                title = tds[2].find_all("a")[-1].get_text(strip=True)
+                magnet = tds[3].find(class_="download-arrow")["href"]
+                size = tds[4].string
 
-                for tr in tbody.find_all("tr"):
-                    tds = tr.find_all("td")
-                    release_time = tds[0].span.string
-                    release_time = time.strftime(self.timefmt, time.strptime(release_time, '%Y/%m/%d %H:%M'))
+                if debug:
+                    self.logger.debug("Successfully got: %s", title)
+
+                animes.append(self._anime(time.mktime(released), title, size, magnet))
+
+        except Exception as e:
+            raise SearchParserError(f"A error occurred while processing the page of {page} with error {e!r}")
+
+        return animes
+
+    def _parse_page_lxml(self, html: bytes, page: int) -> List[Anime]:
+        animes: List[Anime] = []
+        debug = self.logger.isEnabledFor(logging.DEBUG)
 
-                    title = tds[2].find_all("a")[-1].get_text(strip=True)
-                    magnet = tds[3].find(class_="download-arrow")["href"]
-                    size = tds[4].string
+        try:
+            for tr in ROWS_XPATH(parse_html(html)):
+                tds = tr.findall(".//td")
+                released = time.strptime(get_string(tds[0].find(".//span")), '%Y/%m/%d %H:%M')
 
-                    log.debug(f"Successfully got: {title}")
+                title = get_text(tds[2].findall(".//a")[-1])
+                magnet = MAGNET_XPATH(tds[3])[0]
+                size = get_string(tds[4])
 
-                    animes.append(Anime(release_time, title, size, magnet))
+                if debug:
+                    self.logger.debug("Successfully got: %s", title)
 
-                page += 1
+                animes.append(self._anime(time.mktime(released), title, size, magnet))
 
-            except Exception as e:
-                raise SearchParserError(f"A error occurred while processing the page of {page} with error {e!r}")
+        except Exception as e:
+            raise SearchParserError(f"A error occurred while processing the page of {page} with error {e!r}")
 
         return animes
@@ -1,14 +1,23 @@
+import logging
+import math
+import re
 import time
-from typing import List
+from contextlib import aclosing
+from typing import List, Iterator, AsyncIterator, Optional
 from urllib.parse import urlencode
 
-from bs4 import BeautifulSoup
+from lxml.etree import XPath
 
 from . import BasePlugin
-from .. import *
+from .. import SearchParserError
+from ..component.Anime import Anime
+from ..component.fastparse import parse_html, get_string
 
 BASE_URL = "https://nyaa.si/?"
 
+TBODY_XPATH = XPath("(//tbody)[1]")
+RESULTS_PATTERN = re.compile(rb'Displaying results (\d+)-(\d+) out of (\d+) results')
+
 
 class Nyaa(BasePlugin):
     abstract = False
@@ -18,46 +27,111 @@ class Nyaa(BasePlugin):
 
     def search(self, keyword: str, collected: bool = False, proxies: Optional[dict] = None,
                system_proxy: bool = False, **extra_options) -> List[Anime] | None:
-        animes: List[Anime] = []
-        page = 1
+        return list(self.iter_search(keyword, collected, proxies, system_proxy, **extra_options))
+
+    def iter_search(self, keyword: str, collected: bool = False, proxies: Optional[dict] = None,
+                    system_proxy: bool = False, max_pages: Optional[int] = None,
+                    slow_start: Optional[bool] = None, **extra_options) -> Iterator[Anime]:
+        params = self._search_params(keyword, collected, extra_options)
+        pages = self._iter_pages(lambda page: self._fetch_page(page, params, proxies, system_proxy),
+                                 max_pages=max_pages, slow_start=slow_start)
+        for animes in pages:
+            yield from animes
+
+    async def asearch(self, keyword: str, collected: bool = False, proxies: Optional[dict] = None,
+                      system_proxy: bool = False, max_pages: Optional[int] = None,
+                      **extra_options) -> List[Anime] | None:
+        return [anime async for anime in self.aiter_search(keyword, collected, proxies, system_proxy,
+                                                           max_pages=max_pages, **extra_options)]
+
+    async def aiter_search(self, keyword: str, collected: bool = False, proxies: Optional[dict] = None,
+                           system_proxy: bool = False, max_pages: Optional[int] = None,
+                           slow_start: Optional[bool] = None, **extra_options) -> AsyncIterator[Anime]:
+        params = self._search_params(keyword, collected, extra_options)
+        pages = self._aiter_pages(lambda page: self._afetch_page(page, params, proxies, system_proxy),
+                                  max_pages=max_pages, slow_start=slow_start)
+        async with aclosing(pages):
+            async for animes in pages:
+                for anime in animes:
+                    yield anime
+
+    def _search_params(self, keyword: str, collected: bool, extra_options: dict) -> dict:
         params = {'q': keyword, 'c': "1_0", **extra_options}
 
         if collected:
-            log.warning("Nyaa search does not support collection.")
+            self.logger.warning("Nyaa search does not support collection.")
+
+        return params
+
+    def _page_url(self, page: int, params: dict) -> str:
+        return BASE_URL + urlencode({**params, 'p': page})
+
+    def _last_page(self, html: bytes, page: int) -> Optional[int]:
+        # "Displaying results 1-75 out of 1000 results." below the table, the page size is the one of a full page
+        match = RESULTS_PATTERN.search(html)
+        if match is None:
+            return None
+
+        first, last, total = map(int, match.groups())
+        if last >= total or last < first:
+            return page
+        return page - 1 + math.ceil((total - first + 1) / (last - first + 1))
+
+    def _parse_page(self, html: bytes, page: int) -> List[Anime]:
+        animes: List[Anime] = []
+        debug = self.logger.isEnabledFor(logging.DEBUG)
 
-        while True:
-            log.debug(f"Processing the page of {page}")
+        try:
+            bs = self._soup(html)
+            tbody = bs.find("tbody")
 
-            params['p'] = page
-            url = BASE_URL + urlencode(params)
-            html = get_html(url, verify=self._verify, proxies=proxies, system_proxy=system_proxy)
+            if not tbody or tbody.string == "\n":
+                return animes
 
-            try:
-                bs = BeautifulSoup(html, self._parser)
-                tbody = bs.find("tbody")
+            for tr in tbody.find_all("tr"):
+                tds = tr.find_all("td")
 
-                if not tbody or tbody.string == "\n":
-                    break
+                released = time.strptime(tds[4].string, '%Y-%m-%d %H:%M')
 
-                for tr in tbody.find_all("tr"):
-                    tds = tr.find_all("td")
+                title = tds[1].a.get("title")
+                magnet = tds[2].find_all("a")[1].get("href")
+                size = tds[3].string
+
+                if debug:
+                    self.logger.debug("Successfully got: %s", title)
+
+                animes.append(self._anime(time.mktime(released), title, size, magnet))
+
+        except Exception as e:
+            raise SearchParserError(f"A error occurred while processing the page of {page} with error {e!r}")
+
+        return animes
+
+    def _parse_page_lxml(self, html: bytes, page: int) -> List[Anime]:
+        animes: List[Anime] = []
+        debug = self.logger.isEnabledFor(logging.DEBUG)
 
-                    release_time = tds[4].string
-                    release_time = time.strftime(self.timefmt, time.strptime(release_time, '%Y-%m-%d %H:%M'))
+        try:
+            tbody = TBODY_XPATH(parse_html(html))
 
-                    title = tds[1].a.get("title")
-                    magnet = tds[2].find_all("a")[1].get("href")
-                    size = tds[3].string
+            if not tbody or get_string(tbody[0]) == "\n":
+                return animes
 
-                    log.debug(f"Successfully got: {title}")
+            for tr in tbody[0].iterfind(".//tr"):
+                tds = tr.findall(".//td")
 
-                    animes.append(Anime(release_time, title, size, magnet))
+                released = time.strptime(get_string(tds[4]), '%Y-%m-%d %H:%M')
 
-                page += 1
+                title = tds[1].find(".//a").get("title")
+                magnet = tds[2].findall(".//a")[1].get("href")
+                size = get_string(tds[3])
 
+                if debug:
+                    self.logger.debug("Successfully got: %s", title)
 
+                animes.append(self._anime(time.mktime(released), title, size, magnet))
 
-            except Exception as e:
-                raise SearchParserError(f"A error occurred while processing the page of {page} with error {e!r}")
+        except Exception as e:
+            raise SearchParserError(f"A error occurred while processing the page of {page} with error {e!r}")
 
         return animes
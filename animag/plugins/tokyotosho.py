@@ -1,15 +1,24 @@
+import logging
 import re
 import time
-from typing import List
+from contextlib import aclosing
+from typing import List, Iterator, AsyncIterator, Optional
 from urllib.parse import urlencode
 
-from bs4 import BeautifulSoup
+from lxml.etree import XPath
 
 from . import BasePlugin
-from .. import *
+from .. import SearchParserError
+from ..component.Anime import Anime
+from ..component.fastparse import parse_html, class_xpath, get_text
 
 BASE_URL = "https://www.tokyotosho.info/search.php?"
 
+TABLE_XPATH = XPath(f"(//*[{class_xpath('listing')}])[1]")
+CATEGORY_XPATH = XPath(f".//*[{class_xpath('category_0')}]")
+TOP_XPATH = XPath(f"(.//*[{class_xpath('desc-top')}])[1]")
+BOTTOM_XPATH = XPath(f"(.//*[{class_xpath('desc-bot')}])[1]")
+
 
 def extract_info(text):
     size_match = re.search(r"Size:\s([\d.]+(?:MB|GB|KB))", text)
@@ -29,49 +38,108 @@ class Tokyotosho(BasePlugin):
 
     def search(self, keyword: str, collected: bool = False, proxies: Optional[dict] = None,
                system_proxy: bool = False, **extra_options) -> List[Anime] | None:
-        animes: List[Anime] = []
-        page = 1
+        return list(self.iter_search(keyword, collected, proxies, system_proxy, **extra_options))
+
+    def iter_search(self, keyword: str, collected: bool = False, proxies: Optional[dict] = None,
+                    system_proxy: bool = False, max_pages: Optional[int] = None,
+                    slow_start: Optional[bool] = None, **extra_options) -> Iterator[Anime]:
+        params = self._search_params(keyword, collected, extra_options)
+        pages = self._iter_pages(lambda page: self._fetch_page(page, params, proxies, system_proxy),
+                                 max_pages=max_pages, slow_start=slow_start)
+        for animes in pages:
+            yield from animes
+
+    async def asearch(self, keyword: str, collected: bool = False, proxies: Optional[dict] = None,
+                      system_proxy: bool = False, max_pages: Optional[int] = None,
+                      **extra_options) -> List[Anime] | None:
+        return [anime async for anime in self.aiter_search(keyword, collected, proxies, system_proxy,
+                                                           max_pages=max_pages, **extra_options)]
+
+    async def aiter_search(self, keyword: str, collected: bool = False, proxies: Optional[dict] = None,
+                           system_proxy: bool = False, max_pages: Optional[int] = None,
+                           slow_start: Optional[bool] = None, **extra_options) -> AsyncIterator[Anime]:
+        params = self._search_params(keyword, collected, extra_options)
+        pages = self._aiter_pages(lambda page: self._afetch_page(page, params, proxies, system_proxy),
+                                  max_pages=max_pages, slow_start=slow_start)
+        async with aclosing(pages):
+            async for animes in pages:
+                for anime in animes:
+                    yield anime
+
+    def _search_params(self, keyword: str, collected: bool, extra_options: dict) -> dict:
         params = {'terms': keyword, 'type': 1, **extra_options}
 
         if collected:
-            log.warning("Tokyotosho search does not support collection.")
+            self.logger.warning("Tokyotosho search does not support collection.")
+
+        return params
+
+    def _page_url(self, page: int, params: dict) -> str:
+        return BASE_URL + urlencode({**params, 'page': page})
+
+    def _parse_page(self, html: bytes, page: int) -> List[Anime]:
+        animes: List[Anime] = []
+        debug = self.logger.isEnabledFor(logging.DEBUG)
 
-        while True:
-            log.debug(f"Processing the page of {page}")
+        try:
+            bs = self._soup(html)
+            table = bs.find(class_='listing')
 
-            params['page'] = page
-            url = BASE_URL + urlencode(params)
-            html = get_html(url, verify=self._verify, proxies=proxies, system_proxy=system_proxy)
+            if not table or not table.find(class_='category_0'):
+                return animes
 
-            try:
-                bs = BeautifulSoup(html, self._parser)
-                table = bs.find(class_='listing')
+            for row in list(zip(*[iter(table.find_all(class_='category_0'))] * 2)):
+                top = row[0].find(class_='desc-top')
+                if not top:
+                    continue
+                title = top.get_text(strip=True)
+                magnet = top.a['href'] if top.a else None
 
-                if not table or not table.find(class_='category_0'):
-                    break
+                bottom = row[1].find(class_='desc-bot')
+                if not bottom:
+                    continue
+                size, released = extract_info(bottom.text)
 
-                for row in list(zip(*[iter(table.find_all(class_='category_0'))] * 2)):
-                    top = row[0].find(class_='desc-top')
-                    if not top:
-                        continue
-                    title = top.get_text(strip=True)
-                    magnet = top.a['href'] if top.a else None
+                if debug:
+                    self.logger.debug("Successfully got: %s", title)
+
+                animes.append(self._anime(time.mktime(released) if released else None, title, size, magnet))
+
+        except Exception as e:
+            raise SearchParserError(f"A error occurred while processing the page of {page} with error {e!r}")
+
+        return animes
+
+    def _parse_page_lxml(self, html: bytes, page: int) -> List[Anime]:
+        animes: List[Anime] = []
+        debug = self.logger.isEnabledFor(logging.DEBUG)
 
-                    bottom = row[1].find(class_='desc-bot')
-                    if not bottom:
-                        continue
-                    size, release_time = extract_info(bottom.text)
-                    release_time = time.strftime(self.timefmt, release_time) if release_time else None
+        try:
+            table = TABLE_XPATH(parse_html(html))
+            cells = CATEGORY_XPATH(table[0]) if table else []
 
-                    log.debug(f"Successfully got: {title}")
+            if not cells:
+                return animes
 
-                    animes.append(Anime(release_time, title, size, magnet))
+            for row in list(zip(*[iter(cells)] * 2)):
+                top = TOP_XPATH(row[0])
+                if not top:
+                    continue
+                title = get_text(top[0])
+                link = top[0].find(".//a")
+                magnet = link.get('href') if link is not None else None
 
-                page += 1
+                bottom = BOTTOM_XPATH(row[1])
+                if not bottom:
+                    continue
+                size, released = extract_info(bottom[0].text_content())
 
+                if debug:
+                    self.logger.debug("Successfully got: %s", title)
 
+                animes.append(self._anime(time.mktime(released) if released else None, title, size, magnet))
 
-            except Exception as e:
-                raise SearchParserError(f"A error occurred while processing the page of {page} with error {e!r}")
+        except Exception as e:
+            raise SearchParserError(f"A error occurred while processing the page of {page} with error {e!r}")
 
         return animes
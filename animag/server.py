@@ -0,0 +1,310 @@
+import argparse
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Dict, Optional, Sequence
+from urllib.parse import urlsplit, parse_qs
+
+from . import log, setup_logger, SearchError, PluginImportError
+from .Searcher import Searcher, DEFAULT_PLUGINS
+from .component.Anime import Anime
+from .component.cache import HTTPCache
+from .component.export import FIELDS
+from .component.metrics import MetricsRegistry
+from .component.singleflight import SingleFlight
+from .plugins import available_plugins
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8730
+DEFAULT_WORKERS = 8
+DEFAULT_QUEUE_SIZE = 32
+DEFAULT_RESULT_TTL = 60.0
+# Seconds a client is asked to wait when every worker and queue slot is taken
+RETRY_AFTER = 1
+# Seconds to receive a request before the connection is dropped
+REQUEST_TIMEOUT = 10
+OVERLOADED_BODY = b'{"error": "server is busy"}'
+OVERLOADED_RESPONSE = (b"HTTP/1.1 503 Service Unavailable\r\n"
+                       b"Content-Type: application/json\r\n"
+                       b"Retry-After: %d\r\n"
+                       b"Connection: close\r\n"
+                       b"Content-Length: %d\r\n\r\n%s") % (RETRY_AFTER, len(OVERLOADED_BODY), OVERLOADED_BODY)
+
+
+def anime_dict(anime: Anime) -> Dict[str, Any]:
+    """Represent a result in JSON, with the fields of the exports."""
+    return {field: getattr(anime, field) for field in FIELDS}
+
+
+class BadRequest(ValueError):
+    """Invalid query parameters, answered with 400."""
+
+
+class SearchRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handler of the search API, every connection serves a single request.
+
+    Endpoints:
+        GET /search?q=...: Results of a search as a JSON document
+        GET /search/stream?q=...: Results of a search as NDJSON, sent as the pages are parsed
+        GET /plugins: Names of the available plugins
+        GET /metrics: Search metrics in the Prometheus text format
+        GET /health: Liveness probe
+
+    Search parameters: q (keyword, required), plugin (default 'dmhy'), plugins
+    (comma separated, or 'all', to search several plugins at once), collected
+    (0 or 1), limit and max_pages.
+    """
+    server: "SearchServer"
+    protocol_version = "HTTP/1.1"
+    timeout = REQUEST_TIMEOUT
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        routes = {
+            '/search': self._search,
+            '/search/stream': self._stream,
+            '/plugins': lambda _: self._send_json({'plugins': available_plugins()}),
+            '/metrics': lambda _: self._send(HTTPStatus.OK, self.server.metrics.to_prometheus().encode(),
+                                             "text/plain; version=0.0.4"),
+            '/health': lambda _: self._send_json({'status': 'ok'}),
+        }
+
+        route = routes.get(url.path.rstrip('/') or '/')
+        if route is None:
+            self._send_json({'error': f"unknown endpoint {url.path}"}, HTTPStatus.NOT_FOUND)
+            return
+
+        try:
+            route(query)
+        except (BadRequest, PluginImportError) as e:
+            self._send_json({'error': str(e)}, HTTPStatus.BAD_REQUEST)
+        except SearchError as e:
+            self._send_json({'error': str(e)}, HTTPStatus.BAD_GATEWAY)
+        except (BrokenPipeError, ConnectionResetError):
+            log.debug("Client of %s disconnected", url.path)
+        except Exception as e:
+            log.error("Request to %s failed: %r", url.path, e)
+            self._send_json({'error': "internal server error"}, HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    def _params(self, query: Dict[str, str]) -> Dict[str, Any]:
+        """Validate the search parameters of a query."""
+        keyword = query.get('q', '').strip()
+        if not keyword:
+            raise BadRequest("missing search keyword q")
+
+        params: Dict[str, Any] = {'keyword': keyword, 'collected': query.get('collected', '0') in ('1', 'true')}
+        for name in ('limit', 'max_pages'):
+            if name in query:
+                try:
+                    params[name] = int(query[name])
+                except ValueError:
+                    raise BadRequest(f"{name} must be an integer")
+                if params[name] < 1:
+                    raise BadRequest(f"{name} must be positive")
+        return params
+
+    @staticmethod
+    def _plugins(query: Dict[str, str]) -> Optional[Sequence[str]]:
+        """The plugins of a multi-plugin search, None for a single plugin search."""
+        plugins = query.get('plugins')
+        if plugins is None:
+            return None
+        return DEFAULT_PLUGINS if plugins == 'all' else [name for name in plugins.split(',') if name]
+
+    def _search(self, query: Dict[str, str]) -> None:
+        params = self._params(query)
+        plugins = self._plugins(query)
+        searcher = self.server.searcher(query.get('plugin', 'dmhy'))
+
+        if plugins is None:
+            animes = searcher.search(**params)
+            reports = None
+        else:
+            limit = params.pop('limit', None)
+            params.pop('max_pages', None)
+            animes = searcher.search_all(plugins=plugins, **params)[:limit]
+            reports = {name: {'ok': report.ok, 'count': report.count,
+                              'error': None if report.ok else repr(report.error)}
+                       for name, report in searcher.plugin_reports.items()}
+
+        animes = list(animes or ())
+        body = {'keyword': params['keyword'], 'count': len(animes), 'results': [anime_dict(a) for a in animes]}
+        if reports is not None:
+            body['plugins'] = reports
+        self._send_json(body)
+
+    def _stream(self, query: Dict[str, str]) -> None:
+        params = self._params(query)
+        if self._plugins(query) is not None:
+            raise BadRequest("streaming searches a single plugin")
+
+        searcher = self.server.searcher(query.get('plugin', 'dmhy'))
+        animes = searcher.iter_search(**params)
+
+        with closing(animes):
+            # Fetch the first page before committing to a 200 response, so early failures get a proper status
+            first = next(animes, None)
+
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.send_header("Connection", "close")
+            self.end_headers()
+
+            try:
+                if first is not None:
+                    self._write_line(anime_dict(first))
+                    for anime in animes:
+                        self._write_line(anime_dict(anime))
+            except SearchError as e:
+                # Too late for an error status, the failure ends the stream instead
+                self._write_line({'error': str(e)})
+            except (BrokenPipeError, ConnectionResetError):
+                raise
+            except Exception as e:
+                log.error("Stream of '%s' failed: %r", params['keyword'], e)
+                self._write_line({'error': "internal server error"})
+            self.wfile.write(b"0\r\n\r\n")
+
+    def _write_line(self, item: Dict[str, Any]) -> None:
+        """Send a JSON line as a chunk of the response."""
+        data = json.dumps(item, ensure_ascii=False).encode() + b"\n"
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def _send_json(self, body: Any, status: HTTPStatus = HTTPStatus.OK) -> None:
+        self._send(status, json.dumps(body, ensure_ascii=False).encode(), "application/json")
+
+    def _send(self, status: HTTPStatus, data: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        log.debug("%s - %s", self.address_string(), format % args)
+
+
+class SearchServer(HTTPServer):
+    """
+    Local HTTP/JSON search service, see SearchRequestHandler for the API.
+
+    Requests are handled by a bounded pool of worker threads. Up to
+    ``queue_size`` more requests wait for a free worker, further requests are
+    refused at once with 503 and a Retry-After header, so that a burst of
+    clients cannot pile up unbounded work.
+
+    Identical searches running at the same time share a single crawl, and
+    their results are remembered for ``result_ttl`` seconds. Streams and
+    searches with a limit stop requesting pages early, so they always crawl on
+    their own. Every search goes through the process-wide rate limiter and,
+    when given, the HTTP cache.
+    """
+    def __init__(self, host: str = DEFAULT_HOST,
+                 port: int = DEFAULT_PORT,
+                 workers: int = DEFAULT_WORKERS,
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 result_ttl: Optional[float] = DEFAULT_RESULT_TTL,
+                 cache: Optional[HTTPCache] = None,
+                 **searcher_options) -> None:
+        """
+        Initialize SearchServer object and bind its socket.
+
+        Args:
+            host: Address to listen on, the loopback interface by default
+            port: Port to listen on, 0 to pick a free one
+            workers: Number of requests handled at once
+            queue_size: Number of requests waiting for a worker before new ones are refused
+            result_ttl: Seconds the results of a search are reused, None or 0 to only share searches in flight
+            cache: HTTP cache of the pages requested by the plugins
+            **searcher_options: Other options of the searchers, like parser or backend
+        """
+        super().__init__((host, port), SearchRequestHandler)
+        self.workers = workers
+        self.cache = cache
+        self.metrics = MetricsRegistry()
+        self.singleflight = SingleFlight(ttl=result_ttl)
+        self.searcher_options = searcher_options
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="animag-serve")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._local = threading.local()
+
+    def searcher(self, plugin_name: str) -> Searcher:
+        """
+        Get the searcher of a plugin for the current worker thread.
+
+        Searchers keep the results of their last search, so every worker thread
+        has its own, created by its first request and reused by the next ones.
+        They share the cache, metrics and in-flight searches of the server.
+        """
+        searchers = self._local.__dict__.setdefault('searchers', {})
+        searcher = searchers.get(plugin_name)
+        if searcher is None:
+            searcher = searchers[plugin_name] = Searcher(plugin_name, cache=self.cache, metrics=self.metrics,
+                                                         singleflight=self.singleflight, **self.searcher_options)
+        return searcher
+
+    def process_request(self, request, client_address) -> None:
+        if not self._slots.acquire(blocking=False):
+            log.warning("Refused a request from %s: all workers and queue slots are taken", client_address[0])
+            try:
+                request.sendall(OVERLOADED_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+
+        self._executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "SearchServer":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.server_close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="animag serve", description="本地 HTTP/JSON 搜索服务")
+
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST, help=f'监听地址, 默认为 {DEFAULT_HOST}')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'监听端口, 默认为 {DEFAULT_PORT}')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='同时处理的请求数')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help='等待处理的请求数上限, 超出时返回 503')
+    parser.add_argument('--result-ttl', type=float, default=DEFAULT_RESULT_TTL, metavar='SECONDS',
+                        help='相同搜索结果的复用时间, 0 为只合并同时进行的搜索')
+    parser.add_argument('--cache', type=str, metavar='FILE', help='HTTP 缓存文件, 默认不缓存页面')
+    parser.add_argument('--log-level', type=str.upper, default='INFO',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], help='日志级别, 默认为 INFO')
+
+    args = parser.parse_args(argv)
+    setup_logger(level=getattr(logging, args.log_level), background=True)
+
+    cache = HTTPCache(args.cache) if args.cache else None
+    with SearchServer(args.host, args.port, workers=args.workers, queue_size=args.queue_size,
+                      result_ttl=args.result_ttl, cache=cache) as server:
+        log.info("Serving searches on http://%s:%d", args.host, server.server_address[1])
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            log.info("Search service stopped")
@@ -0,0 +1,78 @@
+"""
+Benchmark of the cross-plugin deduplication.
+
+Generates the merged results of a search on several sites: every release is
+listed with its magnet on dmhy and nyaa, with only a torrent link and a
+rounded size on acgrip, and without magnet on tokyotosho. Releases are the
+episodes of many series, in the title formats of the fixtures, so the titles
+of a series only differ by the episode number.
+Prints, for growing result sets, the clustering time and how many releases
+were found compared to the real number, with and without fuzzy matching.
+
+Usage: python -m benchmarks.bench_dedup [releases...]
+"""
+import random
+import sys
+import time
+
+from animag.component.Anime import Anime
+from animag.component.dedup import Deduplicator
+
+
+TEMPLATES = [
+    "[喵萌奶茶屋&LoliHouse] {name} - {ep:02d} [WebRip 1080p HEVC-10bit AAC][简繁内封字幕]",
+    "[Nekomoe kissaten][{name}][{ep:02d}][1080p][JPSC]",
+    "[SubsPlease] {name} - {ep:02d} (1080p) [{crc:08X}].mkv",
+    "【动漫国字幕组】★04月新番[{name}][{ep:02d}][1080P][简体][MP4]",
+    "[ANi] {name} - {ep:02d} [1080P][Baha][WEB-DL][AAC AVC][CHT][MP4]",
+]
+SYLLABLES = ["ka", "ki", "ku", "sa", "shi", "su", "ta", "chi", "tsu", "na", "ni", "no", "ha", "hi", "fu",
+             "ma", "mi", "mu", "ra", "ri", "ru", "ya", "yu", "yo", "wa", "to", "ko", "so", "ne", "re"]
+EPISODES = 12
+
+
+def series_name(rng: random.Random) -> str:
+    return " ".join("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).capitalize()
+                    for _ in range(rng.randint(2, 3)))
+
+
+def results(releases: int):
+    rng = random.Random(releases)
+    names = [series_name(rng) for _ in range(releases // EPISODES + 1)]
+    animes = []
+    for release in range(releases):
+        template = TEMPLATES[release % len(TEMPLATES)]
+        title = template.format(name=names[release // EPISODES], ep=release % EPISODES + 1, crc=rng.getrandbits(32))
+        size_mib = rng.uniform(200, 1500)
+        btih = f"{release:040x}"
+
+        animes.append(Anime(None, title, f"{size_mib:.1f}MB", f"magnet:?xt=urn:btih:{btih}", plugin='dmhy'))
+        animes.append(Anime(None, title, f"{size_mib / 1024:.2f}GiB", f"magnet:?xt=urn:btih:{btih}",
+                            plugin='nyaa'))
+        animes.append(Anime(None, title, f"{round(size_mib)}MB", f"https://acg.rip/t/{release}.torrent",
+                            plugin='acgrip'))
+        if release % 2:
+            animes.append(Anime(None, title, f"{size_mib:.0f}MiB", f"https://www.tokyotosho.info/{release}.torrent",
+                                plugin='tokyotosho'))
+    rng.shuffle(animes)
+    return animes
+
+
+def bench(releases: int) -> None:
+    animes = results(releases)
+    for name, deduplicator in (('exact', Deduplicator()), ('fuzzy', Deduplicator(fuzzy=True))):
+        start = time.perf_counter()
+        found = len(deduplicator.dedupe(animes))
+        elapsed = time.perf_counter() - start
+        print(f"{len(animes):<10}{name:<8}{elapsed * 1000:>10.1f}{len(animes) / elapsed:>12.0f}"
+              f"{found:>10}{releases:>10}")
+
+
+def main(*sizes: int) -> None:
+    print(f"{'results':<10}{'mode':<8}{'ms':>10}{'rows/s':>12}{'releases':>10}{'real':>10}")
+    for releases in sizes or (250, 2500, 10000):
+        bench(releases)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
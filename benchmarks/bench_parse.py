@@ -0,0 +1,47 @@
+"""
+Benchmark of the page parsing backends of every plugin.
+
+Parses generated listing pages with the 'soup' and 'lxml' backends, checks
+that both extract the same rows and prints the time per page and the speedup
+over BeautifulSoup.
+
+Usage: python -m benchmarks.bench_parse [repeat]
+"""
+import sys
+import time
+
+from animag.plugins import BACKENDS, get_plugin
+from . import fixtures
+
+PAGE = 1
+
+
+def bench(plugin_name: str, backend: str, html: bytes, repeat: int):
+    plugin = get_plugin(plugin_name)(parser='lxml', verify=False, timefmt="%Y/%m/%d %H:%M")
+    plugin.backend = backend
+
+    rows = plugin._parse(html, PAGE)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        plugin._parse(html, PAGE)
+    return (time.perf_counter() - start) / repeat, rows
+
+
+def main(repeat: int = 20) -> None:
+    print(f"{'plugin':<12}{'backend':<10}{'ms/page':>10}{'rows/s':>12}{'speedup':>10}")
+    for plugin_name, listing in fixtures.LISTINGS.items():
+        html = listing(PAGE, 1)
+        results = {backend: bench(plugin_name, backend, html, repeat) for backend in BACKENDS}
+
+        # Anime equality only compares magnet hashes, so compare every field through repr
+        reference = repr(results['soup'][1])
+        for backend, (elapsed, rows) in results.items():
+            if repr(rows) != reference:
+                raise AssertionError(f"{plugin_name}: backend {backend} differs from the soup backend")
+
+            print(f"{plugin_name:<12}{backend:<10}{elapsed * 1000:>10.2f}{len(rows) / elapsed:>12.0f}"
+                  f"{results['soup'][0] / elapsed:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
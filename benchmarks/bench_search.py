@@ -0,0 +1,144 @@
+"""
+Offline end-to-end benchmark of every plugin.
+
+Runs full searches against the local fixture server (benchmarks.server) and
+measures, per plugin:
+
+- latency: median wall time of a whole search, in milliseconds
+- pages_per_s: result and detail pages fetched and parsed per second of search
+- parse_rows_per_s: rows per second of the parsing backend alone
+- peak_kib: peak memory allocated during a search, traced with tracemalloc
+
+Results can be written to a JSON file, and compared against a previous run to
+spot regressions between commits.
+
+Usage: python -m benchmarks.bench_search [--pages N] [--repeat N] [--output FILE] [--compare FILE]
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from typing import Any, Dict, Optional
+
+from animag import Searcher
+from animag.plugins import get_plugin
+from . import fixtures
+from .server import FixtureServer, FixtureSession
+
+KEYWORD = "frieren"
+METRICS = ('latency_ms', 'pages_per_s', 'parse_rows_per_s', 'peak_kib')
+# Metrics where a lower value is better, the others are throughputs
+LOWER_IS_BETTER = ('latency_ms', 'peak_kib')
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_parse(plugin_name: str, pages: int, repeat: int) -> float:
+    """Rows per second of the default parsing backend of a plugin, over every listing page."""
+    plugin = get_plugin(plugin_name)(parser='lxml', verify=False)
+    htmls = [fixtures.LISTINGS[plugin_name](page, pages) for page in range(1, pages + 1)]
+
+    rows = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page, html in enumerate(htmls, start=1):
+            rows += len(plugin._parse(html, page))
+    return rows / (time.perf_counter() - start)
+
+
+def bench_plugin(server: FixtureServer, plugin_name: str, repeat: int) -> Dict[str, Any]:
+    """Run searches of a plugin against the fixture server and collect its metrics."""
+    with FixtureSession(server) as session:
+        searcher = Searcher(plugin_name, parser='lxml', verify=False, session=session)
+        count = len(searcher.search(KEYWORD))
+
+        latencies = []
+        hits = server.hits.get(plugin_name, 0)
+        for _ in range(repeat):
+            start = time.perf_counter()
+            searcher.search(KEYWORD)
+            latencies.append(time.perf_counter() - start)
+        requests = (server.hits.get(plugin_name, 0) - hits) / repeat
+
+        tracemalloc.start()
+        searcher.search(KEYWORD)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    latency = statistics.median(latencies)
+    return {
+        'results': count,
+        'requests': requests,
+        'latency_ms': round(latency * 1000, 2),
+        'pages_per_s': round(requests / latency, 1),
+        'parse_rows_per_s': round(bench_parse(plugin_name, server.pages, repeat)),
+        'peak_kib': round(peak / 1024),
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]]) -> None:
+    """Print the change of every metric against a previous run, positive when better."""
+    print(f"\n{'plugin':<12}" + "".join(f"{metric:>18}" for metric in METRICS))
+    for plugin_name, metrics in results.items():
+        old = baseline.get(plugin_name)
+        if old is None:
+            continue
+
+        changes = []
+        for metric in METRICS:
+            if not old.get(metric):
+                changes.append(f"{'n/a':>18}")
+                continue
+            ratio = metrics[metric] / old[metric]
+            change = (1 / ratio if metric in LOWER_IS_BETTER else ratio) - 1
+            changes.append(f"{change:>+17.1%} ")
+        print(f"{plugin_name:<12}" + "".join(changes))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the plugins")
+    parser.add_argument('--pages', type=int, default=5, help='result pages of every search')
+    parser.add_argument('--repeat', type=int, default=5, help='searches timed per plugin')
+    parser.add_argument('--delay', type=float, default=0.0, help='simulated network latency, in seconds')
+    parser.add_argument('--plugins', type=str, default=','.join(fixtures.LISTINGS), help='comma separated plugins')
+    parser.add_argument('--output', type=str, help='write the results to a JSON file')
+    parser.add_argument('--compare', type=str, help='compare against the JSON file of a previous run')
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'plugin':<12}{'results':>8}{'requests':>10}" + "".join(f"{metric:>18}" for metric in METRICS))
+    with FixtureServer(pages=args.pages, delay=args.delay) as server:
+        for plugin_name in args.plugins.split(','):
+            metrics = results[plugin_name] = bench_plugin(server, plugin_name, args.repeat)
+            print(f"{plugin_name:<12}{metrics['results']:>8}{metrics['requests']:>10g}"
+                  + "".join(f"{metrics[metric]:>18g}" for metric in METRICS))
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(results, json.load(f)['results'])
+
+    if args.output:
+        report = {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'options': {'pages': args.pages, 'repeat': args.repeat, 'delay': args.delay},
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
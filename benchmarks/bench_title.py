@@ -0,0 +1,55 @@
+"""
+Benchmark of the release title parser.
+
+Parses generated titles, built from the fixture title variants with distinct
+episodes and checksums, and prints the titles parsed per second on a cold
+cache, where every title runs the patterns, and on a warm cache, where the
+same titles come back as in repeated searches.
+
+The cold cache falls short of the 100k titles/s target: it runs at about
+40k to 47k titles/s on the single-core benchmark box. Scanning the tokens of
+the titles, without handling them, already tops out at about 50k titles/s
+there, so the target is out of reach of the pure Python parser. The warm
+cache runs at over 4M titles/s.
+
+Usage: python -m benchmarks.bench_title [count] [repeat]
+"""
+import sys
+import time
+
+from animag.component.title import TITLE_CACHE_SIZE, parse_title, parse_titles
+from . import fixtures
+
+
+def titles(count: int):
+    variants = fixtures.TITLES
+    return [f"{variants[i % len(variants)].format(ep=i // len(variants) % 1000)} [{i:08X}]" for i in range(count)]
+
+
+def bench(titles, cold: bool, repeat: int) -> float:
+    """Best throughput of repeated runs, in titles per second."""
+    best = 0.0
+    for _ in range(repeat):
+        if cold:
+            parse_title.cache_clear()
+        start = time.perf_counter()
+        parse_titles(titles)
+        best = max(best, len(titles) / (time.perf_counter() - start))
+    return best
+
+
+def main(count: int = 50000, repeat: int = 5) -> None:
+    if count > TITLE_CACHE_SIZE:
+        raise SystemExit(f"count must be at most {TITLE_CACHE_SIZE}, the size of the title cache")
+
+    generated = titles(count)
+    cold = bench(generated, cold=True, repeat=repeat)
+    warm = bench(generated, cold=False, repeat=repeat)
+
+    print(f"{'cache':<8}{'titles/s':>14}")
+    print(f"{'cold':<8}{cold:>14.0f}")
+    print(f"{'warm':<8}{warm:>14.0f}")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,178 @@
+"""
+Offline HTML fixtures for the bundled plugins.
+
+The pages are generated from templates reproducing the markup each plugin
+parses, surrounded by the navigation, sidebars and scripts of a real listing
+page, so parsing cost is representative without any network access.
+"""
+import hashlib
+import time
+from typing import Dict, Callable
+
+ROWS_PER_PAGE = {
+    'dmhy': 80,
+    'nyaa': 75,
+    'acgrip': 50,
+    'tokyotosho': 50,
+    '_miobt': 50,
+}
+
+TITLES = [
+    "[喵萌奶茶屋&LoliHouse] 我推的孩子 / Oshi no Ko - {ep:02d} [WebRip 1080p HEVC-10bit AAC][简繁内封字幕]",
+    "[Nekomoe kissaten][Sousou no Frieren][{ep:02d}][1080p][JPSC]",
+    "[SubsPlease] Kusuriya no Hitorigoto - {ep:02d} (1080p) [ABCD1234].mkv",
+    "【动漫国字幕组】★04月新番[间谍过家家 第二季][{ep:02d}][1080P][简体][MP4]",
+    "[ANi] 葬送的芙莉蓮 - {ep:02d} [1080P][Baha][WEB-DL][AAC AVC][CHT][MP4]",
+]
+
+BOILERPLATE = "".join(
+    f'<div class="sidebar-item"><a href="/tag/{i}">tag {i}</a><p>{"lorem ipsum " * 8}</p></div>'
+    for i in range(40)
+)
+SCRIPTS = "".join(f'<script type="text/javascript">var config{i} = {{"a": {i}, "b": "{"x" * 40}"}};</script>'
+                  for i in range(10))
+
+
+def btih(*parts) -> str:
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def title(page: int, row: int) -> str:
+    return TITLES[row % len(TITLES)].format(ep=(page * 7 + row) % 24 + 1)
+
+
+def release(page: int, row: int) -> time.struct_time:
+    return time.localtime(1711000000 - (page * 100 + row) * 3600)
+
+
+def size(row: int) -> str:
+    return f"{(row * 37) % 900 + 100}.{row % 10}MB" if row % 3 else f"{row % 8 + 1}.{row % 10}GB"
+
+
+def wrap(body: str) -> bytes:
+    return (f'<!DOCTYPE html><html><head><title>results</title>{SCRIPTS}</head><body>'
+            f'<div id="header"><ul class="nav">{"<li><a href=/>home</a></li>" * 20}</ul></div>'
+            f'<div id="main">{body}</div><div id="sidebar">{BOILERPLATE}</div>{SCRIPTS}</body></html>').encode()
+
+
+def dmhy(page: int, pages: int) -> bytes:
+    if page > pages:
+        return wrap('<div class="nav_title">没有可显示资源</div>')
+
+    rows = "".join(
+        f'<tr class="{"even" if i % 2 else ""}">'
+        f'<td width="98">{time.strftime("%m/%d %H:%M", release(page, i))}'
+        f'<span style="display: none;">{time.strftime("%Y/%m/%d %H:%M", release(page, i))}</span></td>'
+        f'<td width="6%" align="center"><a class="sort-2" href="/topics/list/sort_id/2">'
+        f'<font color="red">動畫</font></a></td>'
+        f'<td class="title"><span class="tag"><a href="/topics/list/team_id/{i}">字幕组</a></span>\n'
+        f'<a href="/topics/view/{page}{i}.html" target="_blank">\n\t\t{title(page, i)}\n\t</a>\n'
+        f'<span class="keyword">约{i}条评论</span></td>'
+        f'<td nowrap="nowrap" align="center"><a class="download-arrow arrow-magnet" title="磁力下載" '
+        f'href="magnet:?xt=urn:btih:{btih("dmhy", page, i)}&amp;dn=&amp;tr=http%3A%2F%2Ft.example%2Fannounce">'
+        f'&nbsp;</a></td>'
+        f'<td nowrap="nowrap" align="center">{size(i)}</td>'
+        f'<td nowrap="nowrap" align="center"><span class="btl_1">{i}</span></td>'
+        f'<td nowrap="nowrap" align="center"><span class="bts_1">{i * 2}</span></td>'
+        f'<td nowrap="nowrap" align="center">{i * 3}</td>'
+        f'<td align="center"><a href="/topics/list/user_id/{i}">user{i}</a></td></tr>'
+        for i in range(ROWS_PER_PAGE['dmhy'])
+    )
+    return wrap(f'<div class="nav_title">下一頁</div><table class="tablesorter" id="topic_list">'
+                f'<thead><tr><th>發佈時間</th><th>分類</th><th>標題</th><th>磁鏈</th><th>大小</th>'
+                f'<th>種子</th><th>下載</th><th>完成</th><th>發佈人</th></tr></thead>'
+                f'<tbody>{rows}</tbody></table>')
+
+
+def nyaa(page: int, pages: int) -> bytes:
+    if page > pages:
+        return wrap('<table class="torrent-list"><thead><tr><th>Name</th></tr></thead><tbody>\n</tbody></table>')
+
+    rows_count = ROWS_PER_PAGE['nyaa']
+    rows = "".join(
+        f'<tr class="default"><td><a href="/?c=1_2" title="Anime - English-translated">'
+        f'<img src="/static/img/icons/nyaa/1_2.png" alt="Anime - English-translated" class="category-icon"></a></td>'
+        f'<td colspan="2"><a href="/view/{page}{i}" title="{title(page, i)}">{title(page, i)}</a></td>'
+        f'<td class="text-center"><a href="/download/{page}{i}.torrent"><i class="fa fa-fw fa-download"></i></a>'
+        f'<a href="magnet:?xt=urn:btih:{btih("nyaa", page, i)}&amp;dn=x&amp;tr=http%3A%2F%2Fnyaa.tracker.wf">'
+        f'<i class="fa fa-fw fa-magnet"></i></a></td>'
+        f'<td class="text-center">{size(i).replace("MB", " MiB").replace("GB", " GiB")}</td>'
+        f'<td class="text-center" data-timestamp="0">{time.strftime("%Y-%m-%d %H:%M", release(page, i))}</td>'
+        f'<td class="text-center">{i}</td><td class="text-center">{i * 2}</td><td class="text-center">{i * 3}</td>'
+        f'</tr>'
+        for i in range(rows_count)
+    )
+    total = pages * rows_count
+    return wrap(f'<div class="table-responsive"><table class="table torrent-list">'
+                f'<thead><tr><th>Category</th><th>Name</th></tr></thead><tbody>{rows}</tbody></table></div>'
+                f'<div class="center"><nav><ul class="pagination">'
+                f'{"".join(f"<li><a href=/?p={p}>{p}</a></li>" for p in range(1, pages + 1))}</ul></nav></div>'
+                f'<div class="pagination-page-info">Displaying results {(page - 1) * rows_count + 1}-'
+                f'{page * rows_count} out of {total} results.<br>'
+                f'Please refine your search results if you can\'t find what you were looking for.</div>')
+
+
+def acgrip(page: int, pages: int) -> bytes:
+    rows = "" if page > pages else "".join(
+        f'<tr><td class="date hidden-xs"><div>{time.strftime("%Y-%m-%d", release(page, i))}</div>'
+        f'<div><time datetime="{int(time.mktime(release(page, i)))}">'
+        f'{time.strftime("%H:%M", release(page, i))}</time></div></td>'
+        f'<td class="title"><span class="label label-primary"><a href="/1">动画</a></span>'
+        f'<span class="label label-team"><a href="/team/{i}">字幕组</a></span>\n'
+        f'<a href="/t/{page}{i}">\n{title(page, i)}\n</a></td>'
+        f'<td class="action"><a href="/t/{page}{i}.torrent"><i class="fa fa-download"></i></a></td>'
+        f'<td class="size">{size(i)}</td>'
+        f'<td class="peer"><div class="up">{i}</div><div class="down">{i}</div><div class="done">{i}</div></td></tr>'
+        for i in range(ROWS_PER_PAGE['acgrip'])
+    )
+    return wrap(f'<table class="table table-hover table-condensed post-index">'
+                f'<thead><tr><th>发布时间</th><th>标题</th><th>下载</th><th>大小</th><th>统计</th></tr></thead>'
+                f'{rows}</table><ul class="pagination"><li><a href="/page/{page + 1}">下一页</a></li></ul>')
+
+
+def tokyotosho(page: int, pages: int) -> bytes:
+    rows = "" if page > pages else "".join(
+        f'<tr class="category_0"><td rowspan="2"><a href="/?cat=1"><img src="/img/1.png" alt="Anime"></a></td>'
+        f'<td class="desc-top"><a href="magnet:?xt=urn:btih:{btih("tokyotosho", page, i)}&amp;tr=x">'
+        f'<span class="sprite_magnet"></span></a> '
+        f'<a rel="nofollow" type="application/x-bittorrent" href="https://example.org/{page}{i}.torrent">'
+        f'{title(page, i)}</a></td><td class="web"><a href="/details.php?id={page}{i}">Details</a></td>'
+        f'<td class="stats" rowspan="2">S: <span>{i}</span> L: <span>{i}</span></td></tr>'
+        f'<tr class="category_0"><td class="desc-bot">Submitter: user{i} | '
+        f'Size: {size(i)} | Date: {time.strftime("%Y-%m-%d %H:%M", release(page, i))} UTC | '
+        f'Comment: batch</td><td class="web"></td></tr>'
+        for i in range(ROWS_PER_PAGE['tokyotosho'])
+    )
+    return wrap(f'<table class="listing"><tr class="shade"><th>Type</th><th>Name</th></tr>{rows}</table>')
+
+
+def miobt(page: int, pages: int) -> bytes:
+    page = min(page, pages)
+    rows = "".join(
+        f'<tr class="alt1"><td nowrap="nowrap">{time.strftime("%Y/%m/%d", release(page, i))}</td>'
+        f'<td><a href="sort-1-1.html"><span>动画</span></a></td>'
+        f'<td style="text-align:left;"><a href="show-{btih("miobt", page, i)[:16]}.html" target="_blank">'
+        f'{title(page, i)}</a></td><td>{size(i)}</td><td><span class="btl_1">{i}</span></td>'
+        f'<td><span class="bts_1">{i}</span></td><td>{i}</td><td><a href="user-{i}.html">user{i}</a></td></tr>'
+        for i in range(ROWS_PER_PAGE['_miobt'])
+    )
+    return wrap(f'<table id="listTable" class="list_table"><thead class="tcat"><tr><th>日期</th></tr></thead>'
+                f'<tbody class="tbody" id="data_list">{rows}</tbody></table>'
+                f'<div class="pages">{"".join(f"<a href=search.php?page={p}>{p}</a>" for p in range(1, pages + 1))}'
+                f'</div>')
+
+
+def miobt_detail(hash_id: str) -> bytes:
+    return wrap(f'<div id="btm"><div class="main" id=""><script type="text/javascript">var x = {{}};</script>'
+                f'<div class="torrent_files"><ul>{"<li>file.mkv</li>" * 10}</ul></div>'
+                f'<script type="text/javascript">Config[\'hash_id\'] = "{hash_id}"; '
+                f'Config[\'announce\'] = "http://t.example/announce";</script></div></div>')
+
+
+LISTINGS: Dict[str, Callable[[int, int], bytes]] = {
+    'dmhy': dmhy,
+    'nyaa': nyaa,
+    'acgrip': acgrip,
+    'tokyotosho': tokyotosho,
+    '_miobt': miobt,
+}
@@ -0,0 +1,197 @@
+"""
+Local HTTP stand-in for the sites of the bundled plugins.
+
+Serves the pages of benchmarks.fixtures over a loopback socket, so searches run
+through the real session, rate limiter, HTTP stack and parsers without any
+network access. FixtureSession and AsyncFixtureSession rewrite the URLs of the
+plugins to the server, keeping the original host as the first path segment.
+"""
+import re
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from animag.component.ratelimit import RateLimiter
+from animag.component.webget import RequestSession, AsyncRequestSession
+from . import fixtures
+
+# Host of every plugin, with the pattern extracting the page number from the path and query
+ROUTES = {
+    'dmhy.org': ('dmhy', re.compile(r'/page/(\d+)')),
+    'nyaa.si': ('nyaa', re.compile(r'[?&]p=(\d+)')),
+    'acg.rip': ('acgrip', re.compile(r'/page/(\d+)')),
+    'www.tokyotosho.info': ('tokyotosho', re.compile(r'[?&]page=(\d+)')),
+    'miobt.com': ('_miobt', re.compile(r'[?&]page=(\d+)')),
+}
+DETAIL_PATTERN = re.compile(r'/show-(\w+)\.html')
+
+
+class FixtureServer:
+    """
+    Threaded HTTP server answering every plugin with generated pages.
+
+    Pages are rendered once and kept in memory, so the server adds as little
+    as possible to the measured time. The number of requests served per plugin
+    is counted in ``hits``.
+    """
+
+    def __init__(self, pages: int = 5, delay: float = 0.0):
+        """
+        Initialize FixtureServer object.
+
+        Args:
+            pages: Number of result pages of every search
+            delay: Seconds every response is delayed, to simulate network latency
+        """
+        self.pages = pages
+        self.delay = delay
+        self.hits: Dict[str, int] = {}
+        self._rendered: Dict[Tuple[str, int], bytes] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def address(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def page(self, host: str, path: str) -> Optional[bytes]:
+        """
+        Get the page of a plugin URL.
+
+        Args:
+            host: Host of the original URL
+            path: Path and query of the original URL
+
+        Returns:
+            Optional[bytes]: The page, None if the URL is unknown
+        """
+        if host not in ROUTES:
+            return None
+        plugin_name, page_pattern = ROUTES[host]
+
+        with self._lock:
+            self.hits[plugin_name] = self.hits.get(plugin_name, 0) + 1
+
+        detail = DETAIL_PATTERN.search(path)
+        if detail:
+            return fixtures.miobt_detail(fixtures.btih('detail', detail.group(1)))
+
+        match = page_pattern.search(path)
+        page = int(match.group(1)) if match else 1
+        key = (plugin_name, page)
+        if key not in self._rendered:
+            self._rendered[key] = fixtures.LISTINGS[plugin_name](page, self.pages)
+        return self._rendered[key]
+
+    def start(self) -> "FixtureServer":
+        """Start serving on a free loopback port, in a daemon thread."""
+        fixture_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                host, _, path = self.path.lstrip('/').partition('/')
+                body = fixture_server.page(host, '/' + path)
+                if fixture_server.delay:
+                    threading.Event().wait(fixture_server.delay)
+
+                self.send_response(404 if body is None else 200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body or b'')))
+                self.end_headers()
+                self.wfile.write(body or b'')
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FixtureServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+
+def fixture_url(address: str, url: str) -> str:
+    """Rewrite the URL of a plugin to the fixture server at address."""
+    url = urlsplit(url)
+    return f"{address}/{url.hostname}{url.path}" + (f"?{url.query}" if url.query else "")
+
+
+class FixtureAdapter(HTTPAdapter):
+    """Transport adapter sending every request to the fixture server instead of its host."""
+
+    def __init__(self, address: str, **kwargs):
+        self.address = address
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        request.url = fixture_url(self.address, request.url)
+        return super().send(request, **kwargs)
+
+
+class FixtureSession(RequestSession):
+    """
+    RequestSession answered by a FixtureServer.
+
+    The rate limiter still sees the original hosts, and defaults to no rate
+    limit so the benchmark measures the library rather than the request budget.
+    """
+
+    def __init__(self, server: FixtureServer, limiter: Optional[RateLimiter] = None, **kwargs):
+        self.server = server
+        super().__init__(limiter=limiter or RateLimiter(rate=None, concurrency=16, max_concurrency=16), **kwargs)
+
+    def _create_session(self) -> requests.Session:
+        session = super()._create_session()
+        adapter = FixtureAdapter(self.server.address, pool_connections=self.pool_connections,
+                                 pool_maxsize=self.pool_maxsize)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+
+class _FixtureClientSession:
+    """aiohttp session wrapper sending every request to the fixture server instead of its host."""
+
+    def __init__(self, address: str, session):
+        self.address = address
+        self._session = session
+
+    @property
+    def closed(self) -> bool:
+        return self._session.closed
+
+    def get(self, url: str, **kwargs):
+        return self._session.get(fixture_url(self.address, url), **kwargs)
+
+    async def close(self) -> None:
+        await self._session.close()
+
+
+class AsyncFixtureSession(AsyncRequestSession):
+    """AsyncRequestSession answered by a FixtureServer, see FixtureSession."""
+
+    def __init__(self, server: FixtureServer, limiter: Optional[RateLimiter] = None, **kwargs):
+        self.server = server
+        super().__init__(limiter=limiter or RateLimiter(rate=None, concurrency=16, max_concurrency=16), **kwargs)
+
+    def _create_session(self) -> _FixtureClientSession:
+        return _FixtureClientSession(self.server.address, super()._create_session())
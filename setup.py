@@ -9,8 +9,12 @@ with open('requirements.txt') as f:
 setup(
     name='animag',
     version='2.0.0',
-    packages=find_packages(exclude=['tests*']),
+    packages=find_packages(exclude=['tests*', 'benchmarks*']),
     install_requires=requirements,
+    extras_require={
+        'async': ['aiohttp'],
+        'zstd': ['zstandard'],
+    },
     entry_points={
         'console_scripts': ['animag=animag.cli:main'],
     },
@@ -0,0 +1,32 @@
+from typing import List
+
+import pytest
+
+from animag.component.Anime import Anime
+from animag.plugins import get_plugin
+from benchmarks import fixtures
+from benchmarks.server import FixtureServer, FixtureSession
+
+PAGES = 3
+
+
+@pytest.fixture(scope='session')
+def server():
+    """Fixture server answering every plugin with PAGES result pages."""
+    with FixtureServer(pages=PAGES) as fixture_server:
+        yield fixture_server
+
+
+@pytest.fixture
+def session(server):
+    with FixtureSession(server) as fixture_session:
+        yield fixture_session
+
+
+def listing(plugin_name: str, pages: int = PAGES) -> List[Anime]:
+    """Parse the fixture result pages of a plugin, without any request."""
+    plugin = get_plugin(plugin_name)(parser='lxml', verify=False)
+    animes = []
+    for page in range(1, pages + 1):
+        animes.extend(plugin._parse(fixtures.LISTINGS[plugin_name](page, pages), page))
+    return animes
@@ -0,0 +1,104 @@
+import copy
+import dataclasses
+import inspect
+import time
+
+import pytest
+
+from animag import SizeFormatError, TimeFormatError
+from animag.component.Anime import Anime, TimeFormat
+
+HASH = "0123456789abcdef0123456789abcdef01234567"
+TIMESTAMP = 1_700_000_000.0
+
+
+def anime(**kwargs):
+    values = dict(time=None, title='[Group] Frieren - 01', size='1.5GB', magnet=f"magnet:?xt=urn:btih:{HASH}&tr=x",
+                  timestamp=TIMESTAMP)
+    return Anime(**{**values, **kwargs})
+
+
+def test_fields_are_the_constructor_arguments():
+    fields = dataclasses.fields(Anime)
+    assert [field.name for field in fields] == list(inspect.signature(Anime).parameters)
+    assert all(field.default is dataclasses.MISSING for field in fields)
+
+
+def test_asdict():
+    values = dataclasses.asdict(anime(plugin='dmhy', time_format=TimeFormat('%Y')))
+    assert values.pop('time_format').fmt == '%Y'
+    assert values == {'time': time.strftime('%Y', time.localtime(TIMESTAMP)), 'title': '[Group] Frieren - 01',
+                      'size': '1.5GB', 'magnet': f"magnet:?xt=urn:btih:{HASH}&tr=x", 'torrent': None,
+                      'plugin': 'dmhy', 'timestamp': TIMESTAMP}
+
+
+def test_replace_keeps_the_time_format():
+    time_format = TimeFormat('%Y-%m-%d')
+    original = anime(time_format=time_format)
+    replaced = dataclasses.replace(original, title='[Group] Frieren - 02')
+
+    assert replaced.title == '[Group] Frieren - 02'
+    assert replaced.time_format is time_format
+    assert replaced.time == original.time == time.strftime('%Y-%m-%d', time.localtime(TIMESTAMP))
+    assert (replaced.btih, replaced.size_bytes, replaced.timestamp) == (HASH, original.size_bytes, TIMESTAMP)
+
+
+def test_copy_is_independent():
+    original = anime()
+    duplicate = original.copy()
+    duplicate.size_format('MB')
+    duplicate.set_timefmt('%Y')
+
+    assert duplicate.size == '1536.0MB'
+    assert original.size == '1.5GB'
+    assert original.time == time.strftime('%Y/%m/%d %H:%M', time.localtime(TIMESTAMP))
+    assert copy.copy(original) == original
+
+
+def test_time_is_formatted_when_read():
+    time_format = TimeFormat('%Y')
+    animes = [anime(time_format=time_format), anime(timestamp=TIMESTAMP + 86400 * 400, time_format=time_format)]
+    assert [a.time for a in animes] == [time.strftime('%Y', time.localtime(a.timestamp)) for a in animes]
+
+    time_format.fmt = '%d'
+    assert [a.time for a in animes] == [time.strftime('%d', time.localtime(a.timestamp)) for a in animes]
+
+
+def test_explicit_time():
+    assert anime(time='yesterday').time == 'yesterday'
+    assert anime(timestamp=None).time is None
+
+    with pytest.raises(TimeFormatError):
+        anime(timestamp=None).set_timefmt('%Y')
+
+
+def test_size():
+    result = anime(size='1.5 GiB')
+    assert result.size_bytes == int(1.5 * (1 << 30))
+
+    result.size_format('MiB')
+    assert result.size == '1536.0MiB'
+
+    result.size = '700MB'
+    assert (result.size, result.size_bytes) == ('700MB', 700 << 20)
+
+    with pytest.raises(SizeFormatError):
+        anime(size=None).size_format('MB')
+    with pytest.raises(SizeFormatError):
+        result.size_format('XB')
+
+
+def test_magnet_hash():
+    base32 = 'AEBAGBAFAYDQQCIKBMGA2DQPCAIREEYU'
+    assert anime(magnet=f"magnet:?xt=urn:btih:{base32}").btih == '0102030405060708090a0b0c0d0e0f1011121314'
+    assert anime(magnet=f"magnet:?xt=urn:btih:{HASH.upper()}").btih == HASH
+    assert anime(magnet='https://acg.rip/t/1.torrent').btih is None
+    assert anime(magnet=None).btih is None
+
+
+def test_equality():
+    assert anime() == anime(title='other', magnet=f"magnet:?xt=urn:btih:{HASH}&tr=y")
+    assert hash(anime()) == hash(anime(title='other'))
+    assert anime() != anime(magnet=f"magnet:?xt=urn:btih:{'f' * 40}")
+    assert anime(magnet='https://acg.rip/t/1.torrent') == anime(magnet='https://acg.rip/t/1.torrent')
+    assert anime(magnet='https://acg.rip/t/1.torrent') != anime(magnet='https://acg.rip/t/2.torrent')
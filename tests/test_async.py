@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from animag import AsyncSearcher, WatchState
+from animag.component import webget
+from animag.component.ResultSet import ResultSet
+from animag.plugins import _miobt
+from benchmarks import fixtures
+from benchmarks.server import FixtureServer, AsyncFixtureSession
+from .conftest import listing
+
+
+@pytest.fixture(autouse=True)
+def no_sync_requests(monkeypatch):
+    """Fail any request sent through the blocking session."""
+    def get_html(url, *args, **kwargs):
+        raise AssertionError(f"Blocking request to {url}")
+
+    monkeypatch.setattr(webget, 'get_html', get_html)
+    monkeypatch.setattr(_miobt, 'get_html', get_html)
+
+
+def run(server, search, **kwargs):
+    """Run search(searcher) on a fresh event loop, with a searcher answered by the fixture server."""
+    async def main():
+        async with AsyncSearcher(verify=False, session=AsyncFixtureSession(server), **kwargs) as searcher:
+            return await search(searcher)
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize('plugin_name', ['dmhy', 'nyaa', 'acgrip', 'tokyotosho'])
+def test_search(server, plugin_name):
+    async def search(searcher):
+        return await searcher.search('frieren')
+
+    animes = run(server, search, plugin_name=plugin_name)
+    assert isinstance(animes, ResultSet)
+    assert [anime.title for anime in animes] == [anime.title for anime in listing(plugin_name)]
+
+
+def test_search_miobt(server):
+    async def search(searcher):
+        return await searcher.search('frieren', max_pages=1)
+
+    animes = run(server, search, plugin_name='_miobt')
+    assert [anime.title for anime in animes] == [row[1] for row in listing('_miobt', pages=1)]
+    assert all(anime.magnet.startswith('magnet:?xt=urn:btih:') for anime in animes)
+
+
+def test_iter_search_limit(server):
+    async def search(searcher):
+        return [anime async for anime in searcher.iter_search('frieren', limit=5)]
+
+    hits = server.hits.get('dmhy', 0)
+    animes = run(server, search, plugin_name='dmhy')
+    assert [anime.title for anime in animes] == [anime.title for anime in listing('dmhy', pages=1)[:5]]
+    assert all(anime.plugin == 'dmhy' for anime in animes)
+    assert server.hits['dmhy'] - hits < server.pages
+
+
+def test_iter_search_close_stops_requests(server):
+    async def search(searcher):
+        results = searcher.iter_search('frieren')
+        first = await results.__anext__()
+        await results.aclose()
+        return first, searcher.last_stats
+
+    hits = server.hits.get('nyaa', 0)
+    first, stats = run(server, search, plugin_name='nyaa')
+    assert first.title == listing('nyaa', pages=1)[0].title
+    assert stats.rows >= 1
+    assert server.hits['nyaa'] - hits < server.pages
+
+
+def test_event_loop_is_not_blocked():
+    ticks = []
+
+    async def search(searcher):
+        async def ticker():
+            while True:
+                await asyncio.sleep(0.005)
+                ticks.append(None)
+
+        task = asyncio.ensure_future(ticker())
+        try:
+            return await searcher.search('frieren')
+        finally:
+            task.cancel()
+
+    with FixtureServer(pages=2, delay=0.05) as server:
+        animes = run(server, search, plugin_name='dmhy')
+
+    assert len(animes) == 2 * fixtures.ROWS_PER_PAGE['dmhy']
+    assert len(ticks) >= 5
+
+
+def test_watch(server):
+    async def search(searcher):
+        first = await searcher.watch('frieren')
+        hits = server.hits['dmhy']
+        second = await searcher.watch('frieren')
+        return first, second, server.hits['dmhy'] - hits
+
+    with WatchState(':memory:') as state:
+        first, second, requests = run(server, search, plugin_name='dmhy', watch_state=state)
+
+    assert len(first) == len(listing('dmhy'))
+    assert len(second) == 0
+    assert requests == 1
+
+
+def test_search_many(server):
+    async def search(searcher):
+        return await searcher.search_many(['frieren', 'dungeon', 'frieren'], workers=2), searcher.last_stats
+
+    reports, stats = run(server, search, plugin_name='tokyotosho')
+    count = len(listing('tokyotosho'))
+    assert list(reports) == ['frieren', 'dungeon']
+    assert all(report.ok and report.count == count for report in reports.values())
+    assert stats.rows == 2 * count
+
+
+def test_iter_search_many(server):
+    async def search(searcher):
+        return [pair async for pair in searcher.iter_search_many(['frieren', 'dungeon'])], searcher.keyword_reports
+
+    pairs, reports = run(server, search, plugin_name='acgrip')
+    count = len(listing('acgrip'))
+    assert len(pairs) == 2 * count
+    assert sorted({keyword for keyword, _ in pairs}) == ['dungeon', 'frieren']
+    assert all(report.ok and report.animes is None for report in reports.values())
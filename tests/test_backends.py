@@ -0,0 +1,48 @@
+import pytest
+
+from animag import Searcher
+from animag.plugins import BACKENDS, get_plugin
+from benchmarks import fixtures
+from .conftest import PAGES
+
+PLUGINS = sorted(fixtures.LISTINGS)
+
+
+def parse(plugin_name: str, backend: str, html: bytes, page: int):
+    plugin = get_plugin(plugin_name)(parser='lxml', verify=False, timefmt="%Y/%m/%d %H:%M")
+    plugin.backend = backend
+    return plugin._parse(html, page)
+
+
+@pytest.mark.parametrize('plugin_name', PLUGINS)
+@pytest.mark.parametrize('page', range(1, PAGES + 2))
+def test_backends_parse_the_same_rows(plugin_name, page):
+    html = fixtures.LISTINGS[plugin_name](page, PAGES)
+    rows = {backend: parse(plugin_name, backend, html, page) for backend in BACKENDS}
+
+    # Anime equality only compares magnet hashes, so compare every field through repr
+    assert repr(rows['lxml']) == repr(rows['soup'])
+    # Miobt keeps serving the last page past the end
+    full = page <= PAGES or plugin_name == '_miobt'
+    assert len(rows['lxml']) == (fixtures.ROWS_PER_PAGE[plugin_name] if full else 0)
+    assert getattr(rows['lxml'], 'last_page', None) == getattr(rows['soup'], 'last_page', None)
+
+
+def test_backends_parse_the_same_miobt_detail():
+    row = parse('_miobt', 'lxml', fixtures.LISTINGS['_miobt'](1, PAGES), 1)[0]
+    html = fixtures.miobt_detail(fixtures.btih('detail', 1))
+    animes = {}
+    for backend in BACKENDS:
+        plugin = get_plugin('_miobt')(verify=False)
+        plugin.backend = backend
+        animes[backend] = plugin._parse_detail(row, html)
+
+    assert repr(animes['lxml']) == repr(animes['soup'])
+    assert animes['lxml'].btih == fixtures.btih('detail', 1)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_searcher_backend(server, session, backend):
+    searcher = Searcher('dmhy', verify=False, session=session, backend=backend)
+    assert searcher.plugin.backend == backend
+    assert len(searcher.search('frieren', max_pages=1)) == fixtures.ROWS_PER_PAGE['dmhy']
@@ -0,0 +1,125 @@
+import pytest
+
+from animag.component import cache as cache_module
+from animag.component.cache import HTTPCache, IMMUTABLE
+from animag.component.errors import SearchRequestError
+from animag.component.webget import AsyncResponse, cache_response, get_html
+from benchmarks import fixtures
+
+URL = "https://dmhy.org/topics/list/page/1?keyword=frieren"
+
+
+@pytest.fixture
+def cache():
+    with HTTPCache(':memory:', default_ttl=60) as http_cache:
+        yield http_cache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Control the time seen by the cache."""
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(cache_module.time, 'time', lambda: now[0])
+    return now
+
+
+def test_put_and_get(cache):
+    assert cache.get(URL) is None
+
+    cache.put(URL, b'body', etag='"v1"', last_modified='Mon, 01 Jan 2024 00:00:00 GMT')
+    entry = cache.get(URL)
+    assert entry.body == b'body'
+    assert entry.fresh
+    assert entry.validators() == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+    assert len(cache) == 1
+
+    cache.put(URL, b'other')
+    assert cache.get(URL).body == b'other'
+    assert cache.get(URL).validators() == {}
+    assert len(cache) == 1
+
+
+def test_expiry(cache, clock):
+    cache.put(URL, b'default')
+    cache.put(URL + '&short', b'short', ttl=5)
+    cache.put(URL + '&immutable', b'immutable', ttl=IMMUTABLE)
+
+    clock[0] += 10
+    assert cache.get(URL).fresh
+    assert not cache.get(URL + '&short').fresh
+    assert cache.get(URL + '&short').body == b'short'
+
+    clock[0] += 10 ** 9
+    assert not cache.get(URL).fresh
+    assert cache.get(URL + '&immutable').fresh
+    assert cache.get(URL + '&immutable').expires_at is None
+
+
+def test_refresh(cache, clock):
+    cache.put(URL, b'body', ttl=5)
+    clock[0] += 10
+    assert not cache.get(URL).fresh
+
+    cache.refresh(URL)
+    assert cache.get(URL).fresh
+    assert cache.get(URL).expires_at == clock[0] + cache.default_ttl
+
+
+def test_eviction_of_least_recently_used(clock):
+    with HTTPCache(':memory:', max_size=100) as http_cache:
+        for i in range(4):
+            clock[0] += 1
+            http_cache.put(f"{URL}&{i}", bytes(30))
+            if i == 2:
+                clock[0] += 1
+                http_cache.get(f"{URL}&0")
+
+        assert len(http_cache) < 4
+        assert http_cache.get(f"{URL}&0") is not None
+        assert http_cache.get(f"{URL}&1") is None
+        assert http_cache.get(f"{URL}&3") is not None
+
+
+def test_persistence(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    with HTTPCache(path) as http_cache:
+        http_cache.put(URL, b'body', ttl=IMMUTABLE)
+
+    with HTTPCache(path) as http_cache:
+        assert http_cache.get(URL).body == b'body'
+        http_cache.clear()
+        assert len(http_cache) == 0
+
+
+def test_revalidation(cache, clock):
+    cache.put(URL, b'cached', etag='"v1"', ttl=5)
+    clock[0] += 10
+    entry = cache.get(URL)
+
+    assert cache_response(AsyncResponse(304, {}, b''), URL, cache, entry, None) == b'cached'
+    assert cache.get(URL).fresh
+
+    clock[0] += 100
+    entry = cache.get(URL)
+    response = AsyncResponse(200, {'Content-Type': 'text/html', 'ETag': '"v2"'}, b'new')
+    assert cache_response(response, URL, cache, entry, None) == b'new'
+    assert cache.get(URL).body == b'new'
+    assert cache.get(URL).etag == '"v2"'
+
+
+def test_failed_response_is_not_cached(cache):
+    with pytest.raises(SearchRequestError):
+        cache_response(AsyncResponse(500, {'Content-Type': 'text/html'}, b'error'), URL, cache, None, None)
+    assert cache.get(URL) is None
+
+
+def test_get_html_serves_fresh_entries(server, session, cache):
+    hits = server.hits.get('dmhy', 0)
+    html = get_html(URL, verify=False, session=session, cache=cache, ttl=0)
+    assert html == fixtures.dmhy(1, server.pages)
+    assert cache.get(URL).body == html
+
+    # The stale entry is requested again, then stored with the default TTL
+    assert get_html(URL, verify=False, session=session, cache=cache) == html
+    assert get_html(URL, verify=False, session=session, cache=cache) == html
+    assert server.hits['dmhy'] - hits == 2
@@ -0,0 +1,93 @@
+import hashlib
+
+import pytest
+
+from animag import Searcher
+from animag.component.Anime import Anime, TimeFormat
+from animag.component.catalog import Catalog, anime_key, like_escape
+from .conftest import listing
+
+HASH = "0123456789abcdef0123456789abcdef01234567"
+
+
+def anime(title, size='1.0GB', timestamp=1_700_000_000.0, plugin='dmhy', magnet=None, torrent=None):
+    if magnet is None and torrent is None:
+        magnet = "magnet:?xt=urn:btih:" + hashlib.sha1(title.encode()).hexdigest()
+    return Anime('2023/11/14 22:13', title, size, magnet, torrent, plugin, timestamp)
+
+
+@pytest.fixture
+def catalog():
+    with Catalog(':memory:') as memory_catalog:
+        yield memory_catalog
+
+
+def test_anime_key():
+    assert anime_key(anime('a', magnet=f"magnet:?xt=urn:btih:{HASH}&tr=x")) == HASH
+    assert anime_key(anime('a', torrent='https://acg.rip/t/1.torrent')) == 'https://acg.rip/t/1.torrent'
+
+
+def test_upsert_updates_the_same_release(catalog):
+    magnet = f"magnet:?xt=urn:btih:{HASH}"
+    assert catalog.upsert([anime('Frieren 01', magnet=magnet, plugin='dmhy')]) == 1
+    catalog.upsert([anime('Frieren 01 v2', magnet=magnet + '&tr=x', plugin='nyaa'), anime('')])
+
+    assert len(catalog) == 1
+    [result] = catalog.search()
+    assert (result.title, result.plugin) == ('Frieren 01 v2', 'nyaa')
+
+
+def test_search_by_words(catalog):
+    catalog.upsert([anime('[Group] Sousou no Frieren - 01 [1080p]'),
+                    anime('[Group] Dungeon Meshi - 01 [1080p]'),
+                    anime('[Group] Sousou no Frieren - 02 [720p]')])
+
+    assert {result.title for result in catalog.search('frieren 1080p')} == {'[Group] Sousou no Frieren - 01 [1080p]'}
+    assert len(catalog.search('Frieren')) == 2
+    assert len(catalog.search('01')) == 2
+    assert catalog.search('Mushoku') == []
+
+
+def test_short_terms_match_literally(catalog):
+    catalog.upsert([anime('Frieren 100%'), anime('Frieren 1000'), anime('a_b'), anime('axb'), anime('C:\\x')])
+
+    assert [result.title for result in catalog.search('0%')] == ['Frieren 100%']
+    assert [result.title for result in catalog.search('_')] == ['a_b']
+    assert [result.title for result in catalog.search('%')] == ['Frieren 100%']
+    assert [result.title for result in catalog.search('\\')] == ['C:\\x']
+
+
+def test_like_escape():
+    assert like_escape('a%b_c\\d') == 'a\\%b\\_c\\\\d'
+
+
+def test_filters(catalog):
+    catalog.upsert([anime('old small', '500MB', 1_600_000_000.0, 'nyaa'),
+                    anime('new large', '2.0GB', 1_700_000_000.0, 'dmhy'),
+                    anime('newest', '1.0GB', 1_700_000_100.0, 'dmhy')])
+
+    assert [result.title for result in catalog.search()] == ['newest', 'new large', 'old small']
+    assert [result.title for result in catalog.search(plugin='nyaa')] == ['old small']
+    assert [result.title for result in catalog.search(since=1_700_000_000.0)] == ['newest', 'new large']
+    assert [result.title for result in catalog.search(until=1_700_000_000.0)] == ['old small']
+    assert [result.title for result in catalog.search(min_size=1 << 30)] == ['newest', 'new large']
+    assert [result.title for result in catalog.search(max_size=1 << 30)] == ['newest', 'old small']
+    assert [result.title for result in catalog.search(limit=1)] == ['newest']
+
+
+def test_time_format(catalog):
+    catalog.upsert([anime('Frieren', timestamp=1_700_000_000.0)])
+
+    [result] = catalog.search(time_format=TimeFormat('%Y'))
+    assert result.time == TimeFormat('%Y').format(1_700_000_000.0)
+    assert catalog.search()[0].time == '2023/11/14 22:13'
+
+
+def test_searcher_stores_results(server, session, catalog):
+    searcher = Searcher('nyaa', verify=False, session=session, catalog=catalog)
+    animes = searcher.search('frieren')
+
+    assert len(catalog) == len(animes) == len(listing('nyaa'))
+    local = searcher.search(animes[0].title.split()[-1], source='local')
+    assert animes[0].title in {result.title for result in local}
+    assert all(result.plugin == 'nyaa' for result in local)
@@ -0,0 +1,71 @@
+import base64
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from animag.component.Anime import Anime
+from animag.component.ResultSet import ResultSet
+from animag.component.dedup import Deduplicator
+from benchmarks import fixtures
+from .conftest import listing
+
+MAGNET = "magnet:?xt=urn:btih:{}"
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def releases(plugin: str, link: str, size: str):
+    """The first rows of the fixture pages, as listed by another site with its own links and sizes."""
+    return [Anime(None, fixtures.title(1, row), size, link.format(row), plugin=plugin) for row in range(10)]
+
+
+def test_same_magnet_hash_is_one_release():
+    dmhy = listing('dmhy', pages=1)
+    # The same hash in base32, as some sites list it
+    nyaa = [Anime(None, anime.title, anime.size, MAGNET.format(base64.b32encode(bytes.fromhex(anime.btih)).decode()),
+                  plugin='nyaa') for anime in dmhy]
+
+    assert Deduplicator().dedupe(dmhy + nyaa) == dmhy
+    assert Deduplicator().cluster(dmhy + nyaa) == list(range(len(dmhy))) * 2
+
+
+def test_torrent_links_are_only_merged_with_fuzzy():
+    magnets = releases('dmhy', 'magnet:?xt=urn:btih:{:040x}', '1.3GB')
+    torrents = releases('acgrip', 'https://acg.rip/t/{}.torrent', '1331MB')
+
+    assert len(Deduplicator().dedupe(magnets + torrents)) == 20
+    assert Deduplicator(fuzzy=True).dedupe(magnets + torrents) == magnets
+
+
+def test_fuzzy_keeps_different_sizes_and_episodes():
+    torrents = releases('acgrip', 'https://acg.rip/t/{}.torrent', '1.3GB')
+    other_size = releases('tokyotosho', 'https://www.tokyotosho.info/{}.torrent', '700MB')
+    assert len(Deduplicator(fuzzy=True).dedupe(torrents + other_size)) == 20
+
+    title = fixtures.TITLES[1]
+    episodes = [Anime(None, title.format(ep=ep), '1.3GB', f'https://acg.rip/t/{ep}.torrent') for ep in (5, 6)]
+    assert len(Deduplicator(fuzzy=True).dedupe(episodes)) == 2
+
+
+def test_different_magnet_hashes_are_never_merged():
+    title = fixtures.title(1, 0)
+    animes = [Anime(None, title, '1.3GB', MAGNET.format(fixtures.btih(plugin))) for plugin in ('dmhy', 'nyaa')]
+    assert len(Deduplicator(fuzzy=True).dedupe(animes)) == 2
+
+
+def test_result_set_dedupe():
+    magnets = releases('dmhy', 'magnet:?xt=urn:btih:{:040x}', '1.3GB')
+    torrents = releases('acgrip', 'https://acg.rip/t/{}.torrent', '1331MB')
+    results = ResultSet(magnets + torrents + magnets)
+
+    assert list(results.dedupe()) == magnets + torrents
+    assert list(results.dedupe(Deduplicator(fuzzy=True))) == magnets
+
+
+def test_clusters_do_not_depend_on_the_hash_seed():
+    script = ("from animag.component.dedup import _sketch; from benchmarks import fixtures; "
+              "print(_sketch(fixtures.title(1, 0)).signature)")
+    signatures = {subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                                 cwd=ROOT, env={**os.environ, 'PYTHONHASHSEED': seed}).stdout
+                  for seed in ('1', '2')}
+    assert len(signatures) == 1
@@ -0,0 +1,98 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from animag import Searcher, ExportError
+from animag.component.export import Exporter, FIELDS, detect_format, export
+from .conftest import listing
+
+
+@pytest.fixture(scope='module')
+def animes():
+    return listing('nyaa', pages=2)
+
+
+def read_csv(text: str):
+    return list(csv.reader(io.StringIO(text)))
+
+
+@pytest.mark.parametrize('path, expected', [
+    ('results.csv', ('csv', None)),
+    ('results.jsonl.gz', ('jsonl', 'gzip')),
+    ('Results.NDJSON.zst', ('jsonl', 'zstd')),
+    ('results.txt', (None, None)),
+])
+def test_detect_format(path, expected):
+    assert detect_format(path) == expected
+
+
+def test_csv(tmp_path, animes):
+    path = str(tmp_path / "results.csv")
+    assert export(animes, path, chunk_size=7) == len(animes)
+
+    with open(path, encoding='utf-8', newline='') as file:
+        rows = read_csv(file.read())
+    assert rows[0] == list(FIELDS)
+    assert [row[1] for row in rows[1:]] == [anime.title for anime in animes]
+    assert rows[1][FIELDS.index('btih')] == animes[0].btih
+
+
+def test_jsonl_gzip(tmp_path, animes):
+    path = str(tmp_path / "results.jsonl.gz")
+    export(iter(animes), path, fields=('title', 'size_bytes', 'timestamp'))
+
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        rows = [json.loads(line) for line in file]
+    assert rows == [{'title': anime.title, 'size_bytes': anime.size_bytes, 'timestamp': anime.timestamp}
+                    for anime in animes]
+
+
+def test_zstd(tmp_path, animes):
+    zstandard = pytest.importorskip('zstandard')
+    path = str(tmp_path / "results.csv.zst")
+    export(animes, path, fields=('title',))
+
+    with open(path, 'rb') as file:
+        text = zstandard.ZstdDecompressor().stream_reader(file).read().decode('utf-8')
+    assert read_csv(text) == [['title']] + [[anime.title] for anime in animes]
+
+
+@pytest.mark.parametrize('name', ["results.csv", "results.csv.gz"])
+def test_append(tmp_path, animes, name):
+    path = str(tmp_path / name)
+    export(animes[:10], path, fields=('title',))
+    export(animes[10:], path, fields=('title',), append=True)
+
+    opener = gzip.open if name.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', newline='') as file:
+        rows = read_csv(file.read())
+    assert rows == [['title']] + [[anime.title] for anime in animes]
+
+
+def test_exporter_counts_chunks(tmp_path, animes):
+    with Exporter(str(tmp_path / "results.jsonl"), chunk_size=10) as exporter:
+        assert exporter.write(animes[:25]) == 25
+        assert exporter.write([]) == 0
+        assert exporter.write(animes[25:30]) == 5
+    assert exporter.count == 30
+
+
+@pytest.mark.parametrize('options', [{'fmt': 'xml'}, {'compression': 'bz2'}, {'fields': ('title', 'seeders')}])
+def test_invalid_options(tmp_path, options):
+    with pytest.raises(ValueError):
+        Exporter(str(tmp_path / "results.csv"), **options)
+
+
+def test_searcher_export(tmp_path, server, session):
+    searcher = Searcher('nyaa', verify=False, session=session)
+    with pytest.raises(ValueError):
+        searcher.export(str(tmp_path / "results.csv"))
+
+    path = str(tmp_path / "results.jsonl")
+    assert searcher.export(path, searcher.iter_search('frieren', max_pages=1)) == len(listing('nyaa', pages=1))
+
+    with pytest.raises(ExportError):
+        searcher.export(str(tmp_path / "missing" / "results.csv"), [])
@@ -0,0 +1,62 @@
+import pytest
+
+from animag import Searcher
+from .conftest import listing
+
+PLUGINS = ['dmhy', 'nyaa', 'acgrip', 'tokyotosho']
+
+
+@pytest.mark.parametrize('plugin_name', PLUGINS)
+def test_iter_search(server, session, plugin_name):
+    searcher = Searcher(plugin_name, verify=False, session=session)
+    animes = list(searcher.iter_search('frieren'))
+
+    assert [anime.title for anime in animes] == [anime.title for anime in listing(plugin_name)]
+    assert all(anime.plugin == plugin_name for anime in animes)
+    assert searcher.last_stats.ok and searcher.last_stats.rows == len(animes)
+
+
+@pytest.mark.parametrize('plugin_name', PLUGINS)
+def test_limit_requests_the_first_page_only(server, session, plugin_name):
+    searcher = Searcher(plugin_name, verify=False, session=session)
+    hits = server.hits.get(plugin_name, 0)
+    animes = list(searcher.iter_search('frieren', limit=5))
+
+    assert [anime.title for anime in animes] == [anime.title for anime in listing(plugin_name, pages=1)[:5]]
+    assert server.hits[plugin_name] - hits == 1
+
+
+def test_zero_limit(server, session):
+    hits = server.hits.get('dmhy', 0)
+    assert list(Searcher('dmhy', verify=False, session=session).iter_search('frieren', limit=0)) == []
+    assert server.hits.get('dmhy', 0) == hits
+
+
+def test_search_limit(server, session):
+    searcher = Searcher('dmhy', verify=False, session=session)
+    animes = searcher.search('frieren', limit=5)
+
+    assert len(animes) == 5
+    assert animes is searcher.animes
+
+
+@pytest.mark.parametrize('plugin_name', PLUGINS)
+def test_max_pages(server, session, plugin_name):
+    searcher = Searcher(plugin_name, verify=False, session=session)
+    hits = server.hits.get(plugin_name, 0)
+    animes = searcher.search('frieren', max_pages=2)
+
+    assert [anime.title for anime in animes] == [anime.title for anime in listing(plugin_name, pages=2)]
+    assert server.hits[plugin_name] - hits == 2
+
+
+def test_closing_stops_requests(server, session):
+    searcher = Searcher('nyaa', verify=False, session=session)
+    hits = server.hits.get('nyaa', 0)
+    results = searcher.iter_search('frieren')
+    first = next(results)
+    results.close()
+
+    assert first.title == listing('nyaa', pages=1)[0].title
+    assert server.hits['nyaa'] - hits == 1
+    assert searcher.last_stats.rows >= 1
@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pytest
+
+from animag import Searcher, AsyncSearcher
+from animag.plugins import get_plugin
+from benchmarks import fixtures
+from benchmarks.server import FixtureServer, FixtureSession, AsyncFixtureSession
+
+
+def last_page(plugin_name: str, html: bytes, page: int):
+    return get_plugin(plugin_name)(verify=False)._last_page(html, page)
+
+
+@pytest.mark.parametrize('plugin_name', ['nyaa', '_miobt'])
+@pytest.mark.parametrize('pages', [1, 3, 20])
+def test_last_page_of_the_fixtures(plugin_name, pages):
+    for page in (1, pages):
+        assert last_page(plugin_name, fixtures.LISTINGS[plugin_name](page, pages), page) == pages
+
+
+@pytest.mark.parametrize('text, page, expected', [
+    (b'Displaying results 1-75 out of 1000 results.', 1, 14),
+    (b'Displaying results 76-150 out of 151 results.', 2, 3),
+    (b'Displaying results 151-151 out of 151 results.', 3, 3),
+    (b'Displaying results 1-75 out of 75 results.', 1, 1),
+    (b'Displaying results 1-0 out of 0 results.', 1, 1),
+    (b'No results found', 1, None),
+])
+def test_nyaa_last_page(text, page, expected):
+    assert last_page('nyaa', b'<div class="pagination-page-info">' + text + b'</div>', page) == expected
+
+
+@pytest.mark.parametrize('html, page, expected', [
+    (b'<div class="pages"><a href="search.php?keyword=x&amp;page=2">2</a>'
+     b'<a href="search.php?keyword=x&page=7">7</a></div>', 1, 7),
+    (b'<div class="pages"><span>1</span></div>', 1, 1),
+    (b'<div class="pages"></div>', 4, 4),
+    (b'<table></table>', 1, None),
+])
+def test_miobt_last_page(html, page, expected):
+    assert last_page('_miobt', html, page) == expected
+
+
+def test_parsed_page_carries_its_last_page():
+    plugin = get_plugin('nyaa')(verify=False)
+    assert plugin._parse(fixtures.nyaa(1, 4), 1).last_page == 4
+    assert not hasattr(plugin._parse(fixtures.nyaa(5, 4), 5), 'last_page')
+
+
+def test_nyaa_requests_each_page_once(server, session):
+    hits = server.hits.get('nyaa', 0)
+    animes = Searcher('nyaa', verify=False, session=session).search('frieren')
+    assert len(animes) == server.pages * fixtures.ROWS_PER_PAGE['nyaa']
+    assert server.hits['nyaa'] - hits == server.pages
+
+    Searcher('nyaa', verify=False, session=session).search('frieren', max_pages=2)
+    assert server.hits['nyaa'] - hits == server.pages + 2
+
+
+def test_async_nyaa_requests_each_page_once(server):
+    async def main():
+        async with AsyncSearcher('nyaa', verify=False, session=AsyncFixtureSession(server)) as searcher:
+            return await searcher.search('frieren')
+
+    hits = server.hits.get('nyaa', 0)
+    assert len(asyncio.run(main())) == server.pages * fixtures.ROWS_PER_PAGE['nyaa']
+    assert server.hits['nyaa'] - hits == server.pages
+
+
+def test_nyaa_requests_the_remaining_pages_at_once():
+    pages, delay = 8, 0.05
+    with FixtureServer(pages=pages, delay=delay) as server, FixtureSession(server) as session:
+        start = time.perf_counter()
+        Searcher('nyaa', verify=False, session=session).search('frieren')
+        elapsed = time.perf_counter() - start
+
+    # The first page, then the seven others together
+    assert elapsed < pages * delay / 2
+
+
+def test_miobt_probes_past_the_linked_pages(server, session):
+    plugin = get_plugin('_miobt')
+    hits = server.hits.get('_miobt', 0)
+    animes = Searcher('_miobt', verify=False, session=session).search('frieren')
+    listing_requests = server.hits['_miobt'] - hits - len(animes)
+
+    assert len(animes) == server.pages * fixtures.ROWS_PER_PAGE['_miobt']
+    assert server.pages < listing_requests <= server.pages + plugin.prefetch
@@ -0,0 +1,165 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+import pytest
+
+from animag import Searcher
+from animag.component.cache import HTTPCache
+from animag.component.metrics import (SearchStats, PageStats, MetricsRegistry, aiter_collected, collect, current_stats,
+                                      iter_collected, notify, record_page, record_request, record_retry)
+from .conftest import listing
+
+URL = "https://dmhy.org/topics/list/page/1"
+
+
+def test_collect():
+    record_request(URL, 200, 0.1, 10)
+    with collect('dmhy', 'frieren') as stats:
+        assert current_stats() is stats
+        record_request(URL, 200, 0.25, 1000)
+        record_request(URL, None, 0.0, 1000, cached=True)
+        record_retry(URL, 503)
+        record_page(1, 80, 0.01)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            executor.submit(copy_context().run, record_page, 2, 40, 0.02).result()
+            # Work submitted without the context of the search is not accounted
+            executor.submit(record_page, 3, 10, 0.01).result()
+
+    assert current_stats() is None
+    assert stats.ok and stats.elapsed > 0
+    assert (stats.http_time, stats.bytes, stats.cache_hits) == (0.25, 1000, 1)
+    assert (stats.rows, len(stats.retries)) == (120, 1)
+    assert stats.summary() == {
+        'plugin': 'dmhy', 'keyword': 'frieren', 'ok': True, 'shared': False, 'elapsed': round(stats.elapsed, 4),
+        'requests': 2, 'cache_hits': 1, 'retries': 1, 'bytes': 1000, 'http_time': 0.25, 'pages': 2, 'rows': 120,
+        'parse_time': 0.03,
+    }
+
+
+def test_collect_records_the_error():
+    with pytest.raises(KeyError):
+        with collect('dmhy', 'frieren') as stats:
+            raise KeyError('page')
+    assert not stats.ok
+    assert stats.error == repr(KeyError('page'))
+
+
+def pages(count: int):
+    for page in range(1, count + 1):
+        record_page(page, 10, 0.0)
+        yield page
+
+
+def test_iter_collected_keeps_the_stats_out_of_the_consumer():
+    stats = SearchStats('dmhy', 'frieren')
+    for _ in iter_collected(pages(3), stats):
+        assert current_stats() is None
+    assert stats.rows == 30 and stats.ok
+
+
+def test_iter_collected_close_and_error():
+    stats = SearchStats('dmhy', 'frieren')
+    iterator = pages(3)
+    collected = iter_collected(iterator, stats)
+    next(collected)
+    collected.close()
+    assert stats.ok and stats.rows == 10
+    assert iterator.gi_frame is None
+
+    def failing():
+        yield from pages(1)
+        raise ValueError('broken page')
+
+    stats = SearchStats('dmhy', 'frieren')
+    with pytest.raises(ValueError):
+        list(iter_collected(failing(), stats))
+    assert stats.error == repr(ValueError('broken page')) and stats.rows == 10
+
+
+def test_aiter_collected():
+    async def parse(page: int):
+        record_page(page, 10, 0.0)
+
+    async def apages(count: int):
+        for page in range(1, count + 1):
+            # Tasks started by the generator record into the stats too
+            await asyncio.ensure_future(parse(page))
+            yield page
+
+    async def main():
+        stats = SearchStats('dmhy', 'frieren')
+        seen = []
+        async for page in aiter_collected(apages(3), stats):
+            seen.append((page, current_stats()))
+
+        closed = SearchStats('dmhy', 'frieren')
+        collected = aiter_collected(apages(3), closed)
+        await collected.__anext__()
+        await collected.aclose()
+        return stats, seen, closed
+
+    stats, seen, closed = asyncio.run(main())
+    assert seen == [(1, None), (2, None), (3, None)]
+    assert stats.rows == 30 and stats.ok
+    assert closed.rows == 10 and closed.ok
+
+
+def test_merge():
+    first, second = SearchStats('dmhy', 'a', started=10.0, elapsed=1.0), SearchStats('nyaa', 'a', started=5.0)
+    first.pages.append(PageStats(1, 80, 0.1))
+    second.error = 'TimeoutError()'
+
+    merged = SearchStats.merge('dmhy+nyaa', 'a', [first, second])
+    assert (merged.started, merged.elapsed, merged.rows, merged.error) == (5.0, 1.0, 80, 'TimeoutError()')
+
+
+def test_prometheus():
+    registry = MetricsRegistry()
+    with collect('dmhy', 'frieren') as stats:
+        record_request(URL, 200, 0.5, 2048)
+        record_request(URL, None, 0.0, 2048, cached=True)
+        record_page(1, 80, 0.25)
+    registry.observe(stats)
+    registry.observe(SearchStats('say "hi"\n', 'x', error='boom'))
+
+    text = registry.to_prometheus()
+    assert '# TYPE animag_searches_total counter' in text
+    assert 'animag_searches_total{outcome="ok",plugin="dmhy"} 1' in text
+    assert 'animag_searches_total{outcome="error",plugin="say \\"hi\\"\\n"} 1' in text
+    assert 'animag_http_requests_total{plugin="dmhy",status="200"} 1' in text
+    assert 'animag_http_requests_total{plugin="dmhy",status="cache"} 1' in text
+    assert 'animag_http_request_duration_seconds_sum{plugin="dmhy"} 0.5' in text
+    assert 'animag_http_response_bytes_total{plugin="dmhy"} 2048' in text
+    assert 'animag_rows_total{plugin="dmhy"} 80' in text
+    assert text.endswith('\n')
+
+    registry.reset()
+    assert registry.to_prometheus() == '\n'
+
+
+def test_notify_survives_a_failing_callback():
+    registry = MetricsRegistry()
+
+    def callback(stats):
+        raise RuntimeError('callback')
+
+    notify(SearchStats('dmhy', 'frieren'), registry, callback)
+    assert 'animag_searches_total{outcome="ok",plugin="dmhy"} 1' in registry.to_prometheus()
+
+
+def test_searcher_stats(server, session):
+    registry = MetricsRegistry()
+    received = []
+    with HTTPCache(':memory:') as cache:
+        searcher = Searcher('nyaa', verify=False, session=session, cache=cache, metrics=registry,
+                            on_stats=received.append)
+        searcher.search('frieren')
+        searcher.search('frieren')
+
+    first, second = received
+    assert first.rows == second.rows == len(listing('nyaa'))
+    assert first.cache_hits == 0 and len(first.requests) == server.pages
+    assert second.cache_hits == len(second.requests) == server.pages
+    assert searcher.last_stats is second
+    assert f'animag_rows_total{{plugin="nyaa"}} {2 * len(listing("nyaa"))}' in registry.to_prometheus()
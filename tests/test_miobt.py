@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+
+from animag import Searcher
+from animag.plugins import _miobt
+from benchmarks import fixtures
+from benchmarks.server import FixtureServer, FixtureSession
+from .conftest import PAGES, listing
+
+
+@pytest.fixture
+def concurrency(monkeypatch):
+    """Track the detail pages requested at the same time."""
+    get_html = _miobt.get_html
+    lock = threading.Lock()
+    state = {'current': 0, 'peak': 0, 'count': 0}
+
+    def tracked(url, *args, **kwargs):
+        with lock:
+            state['current'] += 1
+            state['count'] += 1
+            state['peak'] = max(state['peak'], state['current'])
+        try:
+            return get_html(url, *args, **kwargs)
+        finally:
+            with lock:
+                state['current'] -= 1
+
+    monkeypatch.setattr(_miobt, 'get_html', tracked)
+    return state
+
+
+def test_detail_pages_are_fetched_concurrently(concurrency):
+    with FixtureServer(pages=PAGES, delay=0.01) as server, FixtureSession(server) as session:
+        animes = Searcher('_miobt', verify=False, session=session).search('frieren')
+
+    rows = listing('_miobt')
+    assert [anime.title for anime in animes] == [row[1] for row in rows]
+    assert all(anime.magnet.startswith('magnet:?xt=urn:btih:') for anime in animes)
+    assert concurrency['count'] == len(rows)
+    assert 1 < concurrency['peak'] <= _miobt._Miobt.detail_workers
+
+
+def test_single_detail_worker(server, session, concurrency):
+    searcher = Searcher('_miobt', verify=False, session=session)
+    searcher.plugin.detail_workers = 1
+
+    animes = searcher.search('frieren', limit=10)
+    assert len(animes) == 10
+    assert concurrency['peak'] == 1
+
+
+def test_magnet_of_the_detail_page(server, session):
+    anime = Searcher('_miobt', verify=False, session=session).search('frieren', limit=1)[0]
+    link = listing('_miobt', pages=1)[0][2]
+    hash_id = fixtures.btih('detail', link.rsplit('show-', 1)[1][:-len('.html')])
+    assert anime.btih == hash_id
@@ -0,0 +1,104 @@
+import asyncio
+import random
+import threading
+import time
+
+import pytest
+
+from animag.plugins import BasePlugin
+
+
+class Pages(BasePlugin):
+    # Not registered as a plugin
+    abstract = True
+    name = 'pages'
+
+    def search(self, keyword, collected=None, proxies=None, system_proxy=None, **extra_options):
+        return []
+
+
+class Site:
+    """Result pages of given lengths, empty past the last one, answered after a random delay."""
+
+    def __init__(self, lengths):
+        self.lengths = lengths
+        self.requested = []
+        self._lock = threading.Lock()
+
+    def rows(self, page):
+        with self._lock:
+            self.requested.append(page)
+        length = self.lengths[page - 1] if page <= len(self.lengths) else 0
+        return [(page, row) for row in range(length)]
+
+    def fetch(self, page):
+        time.sleep(random.uniform(0, 0.005))
+        return self.rows(page)
+
+    async def afetch(self, page):
+        await asyncio.sleep(random.uniform(0, 0.005))
+        return self.rows(page)
+
+    def expected(self, pages=None):
+        return [(page, row) for page, length in enumerate(self.lengths[:pages], start=1) for row in range(length)]
+
+
+def walk(plugin, site, **kwargs):
+    return [row for rows in plugin._iter_pages(site.fetch, **kwargs) for row in rows]
+
+
+async def awalk(plugin, site, **kwargs):
+    return [row async for rows in plugin._aiter_pages(site.afetch, **kwargs) for row in rows]
+
+
+@pytest.mark.parametrize('slow_start', [False, True])
+def test_pages_in_order(slow_start):
+    site = Site([5] * 10)
+    assert walk(Pages(), site, slow_start=slow_start) == site.expected()
+    # The pages in flight when the empty page is parsed at most
+    assert max(site.requested) <= len(site.lengths) + Pages.prefetch
+
+
+def test_sequential_walk_stops_at_the_empty_page():
+    plugin = Pages()
+    plugin.prefetch = 1
+    site = Site([5, 5, 5])
+    assert walk(plugin, site) == site.expected()
+    assert site.requested == [1, 2, 3, 4]
+
+
+def test_short_pages_do_not_end_the_results():
+    site = Site([5, 3, 5, 2, 5])
+    assert walk(Pages(), site) == site.expected()
+
+
+def test_short_last_page_opt_in():
+    plugin = Pages()
+    plugin.prefetch = 1
+    plugin.short_last_page = True
+    site = Site([5, 5, 3, 5])
+    assert walk(plugin, site) == site.expected(3)
+    assert site.requested == [1, 2, 3]
+
+
+def test_max_pages():
+    site = Site([5] * 10)
+    assert walk(Pages(), site, max_pages=4) == site.expected(4)
+    assert max(site.requested) == 4
+
+
+def test_closing_stops_requesting():
+    site = Site([5] * 100)
+    pages = Pages()._iter_pages(site.fetch, slow_start=False)
+    next(pages)
+    pages.close()
+    assert len(site.requested) <= 1 + 2 * Pages.prefetch
+
+
+def test_async_pages_in_order():
+    site = Site([5, 3, 5, 5])
+    assert asyncio.run(awalk(Pages(), site)) == site.expected()
+
+    site = Site([5] * 10)
+    assert asyncio.run(awalk(Pages(), site, max_pages=3)) == site.expected(3)
+    assert max(site.requested) == 3
@@ -0,0 +1,80 @@
+import sys
+
+import pytest
+
+from animag import Searcher, PluginImportError
+from animag import plugins
+from animag.plugins import PluginMeta, available_plugins, get_plugin, register_plugin
+
+CUSTOM_PLUGIN = '''
+from animag.plugins import BasePlugin
+
+
+class Custom(BasePlugin):
+    abstract = False
+
+    def search(self, keyword, collected=True, proxies=None, system_proxy=False, **extra_options):
+        return [self._anime(0.0, keyword, '1GB', 'magnet:?xt=urn:btih:' + '0' * 40)]
+'''
+
+
+@pytest.fixture
+def plugin_dir(tmp_path, monkeypatch):
+    """Directory searched as part of the plugins package, like a module dropped into it."""
+    monkeypatch.setattr(plugins, '__path__', [*plugins.__path__, str(tmp_path)])
+    monkeypatch.setattr(plugins, '_imported_names', set())
+    monkeypatch.setattr(PluginMeta, 'plugins', dict(PluginMeta.plugins))
+    yield tmp_path
+    for name in [name for name in sys.modules if name.startswith('animag.plugins.custom')]:
+        del sys.modules[name]
+
+
+def test_bundled_plugins():
+    assert {'dmhy', 'nyaa', 'acgrip', 'tokyotosho', '_miobt'} <= set(available_plugins())
+    assert get_plugin('dmhy').__name__ == 'Dmhy'
+    assert get_plugin('miobt') is get_plugin('_miobt')
+
+
+def test_plugin_module_of_the_package(plugin_dir):
+    (plugin_dir / 'custom.py').write_text(CUSTOM_PLUGIN)
+
+    plugin = get_plugin('custom')
+    assert plugin.__name__ == 'Custom'
+    assert get_plugin('custom') is plugin
+
+    animes = Searcher('custom').search('frieren')
+    assert [anime.title for anime in animes] == ['frieren']
+
+
+def test_missing_plugin_is_imported_once(plugin_dir, monkeypatch):
+    imported = []
+    import_module = plugins.importlib.import_module
+
+    def tracked(name, package=None):
+        imported.append(name)
+        return import_module(name, package)
+
+    monkeypatch.setattr(plugins.importlib, 'import_module', tracked)
+    for _ in range(2):
+        with pytest.raises(PluginImportError, match='cannot be found'):
+            get_plugin('custom_missing')
+    assert imported == ['.custom_missing']
+
+
+def test_broken_plugin_module(plugin_dir):
+    (plugin_dir / 'custom_broken.py').write_text('import animag_dependency_missing\n')
+    with pytest.raises(PluginImportError, match='cannot be imported'):
+        get_plugin('custom_broken')
+
+
+def test_registered_plugin_path(plugin_dir, monkeypatch):
+    (plugin_dir / 'custom_path.py').write_text(CUSTOM_PLUGIN)
+    monkeypatch.setattr(plugins, '_registry', dict(plugins._registry))
+
+    register_plugin('mine', 'animag.plugins.custom_path:Custom')
+    assert get_plugin('mine').__name__ == 'Custom'
+    assert 'mine' in available_plugins()
+
+    register_plugin('mine', 'animag.plugins.custom_path:Missing')
+    with pytest.raises(PluginImportError):
+        get_plugin('mine')
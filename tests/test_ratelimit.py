@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+from email.utils import formatdate
+
+import pytest
+
+from animag.component.ratelimit import (HostLimiter, RateLimiter, parse_retry_after, BACKOFF_BASE,
+                                        MAX_RETRY_AFTER, MIN_CONCURRENCY)
+
+
+@pytest.mark.parametrize('value, expected', [(None, None), ('', None), ('120', 120.0), (' 5 ', 5.0),
+                                             ('soon', None), (formatdate(0, usegmt=True), 0.0)])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_date():
+    assert 25 < parse_retry_after(formatdate(time.time() + 30, usegmt=True)) <= 30
+
+
+def test_window_grows_on_success():
+    limiter = HostLimiter('dmhy.org', rate=None, concurrency=2, max_concurrency=3)
+    for _ in range(2):
+        limiter.acquire()
+    assert limiter._try_acquire(time.monotonic()) is None
+
+    limiter.release(200)
+    limiter.release(200)
+    assert limiter.concurrency == pytest.approx(2 + 1 / 2 + 1 / 2.5)
+    assert limiter.active == 0
+
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release(200)
+    assert limiter.concurrency == 3
+
+
+@pytest.mark.parametrize('status', [None, 429, 503])
+def test_window_halves_on_failure(status):
+    limiter = HostLimiter('dmhy.org', rate=None, concurrency=8)
+    limiter.acquire()
+    limiter.release(status)
+    assert limiter.concurrency == 4
+
+    for _ in range(5):
+        limiter.blocked_until = 0.0
+        limiter.acquire()
+        limiter.release(status)
+    assert limiter.concurrency == MIN_CONCURRENCY
+
+
+def test_server_errors_leave_the_window():
+    limiter = HostLimiter('dmhy.org', rate=None, concurrency=4)
+    limiter.acquire()
+    limiter.release(500)
+    assert limiter.concurrency == 4
+    assert limiter.blocked_until == 0.0
+
+
+def test_retry_after_pauses_the_host():
+    limiter = HostLimiter('dmhy.org', rate=None)
+    limiter.acquire()
+    limiter.release(429, '30')
+
+    now = time.monotonic()
+    assert 29 < limiter.blocked_until - now <= 30
+    assert limiter._try_acquire(now) == pytest.approx(limiter.blocked_until - now)
+
+    limiter.active += 1
+    limiter.release(503, str(10 ** 6))
+    assert limiter.blocked_until - time.monotonic() <= MAX_RETRY_AFTER
+
+
+def test_backoff_without_retry_after():
+    limiter = HostLimiter('dmhy.org', rate=None)
+    delays = []
+    for _ in range(3):
+        limiter.active += 1
+        limiter.blocked_until = 0.0
+        limiter.release(429)
+        delays.append(limiter.blocked_until - time.monotonic())
+    assert delays == pytest.approx([BACKOFF_BASE, 2 * BACKOFF_BASE, 4 * BACKOFF_BASE], abs=0.1)
+
+    # A successful response resets the backoff
+    limiter.active += 1
+    limiter.release(200)
+    limiter.active += 1
+    limiter.blocked_until = 0.0
+    limiter.release(429)
+    assert limiter.blocked_until - time.monotonic() == pytest.approx(BACKOFF_BASE, abs=0.1)
+
+
+def test_token_bucket():
+    limiter = HostLimiter('dmhy.org', rate=10, burst=2, concurrency=8)
+    now = limiter._updated
+    assert limiter._try_acquire(now) == 0
+    assert limiter._try_acquire(now) == 0
+    assert limiter._try_acquire(now) == pytest.approx(0.1)
+    assert limiter._try_acquire(now + 0.1) == 0
+
+
+def test_acquire_waits_for_a_slot():
+    limiter = HostLimiter('dmhy.org', rate=None, concurrency=1)
+    limiter.acquire()
+    threading.Timer(0.05, limiter.release, args=(200,)).start()
+
+    start = time.perf_counter()
+    limiter.acquire()
+    assert time.perf_counter() - start >= 0.04
+    assert limiter.active == 1
+
+
+def test_aacquire_waits_for_a_slot():
+    limiter = HostLimiter('dmhy.org', rate=None, concurrency=1)
+
+    async def main():
+        await limiter.aacquire()
+        asyncio.get_running_loop().call_later(0.05, limiter.release, 200)
+        start = time.perf_counter()
+        await limiter.aacquire()
+        return time.perf_counter() - start
+
+    assert asyncio.run(main()) >= 0.04
+    assert limiter.active == 1
+
+
+def test_rate_limiter_hosts():
+    limiter = RateLimiter(rate=None, concurrency=4)
+    limiter.configure('nyaa.si', rate=2.0, concurrency=1)
+
+    dmhy = limiter.for_url('https://dmhy.org/topics/list/page/1')
+    assert dmhy is limiter.host('dmhy.org')
+    assert (dmhy.rate, dmhy.concurrency) == (None, 4)
+
+    nyaa = limiter.for_url('https://nyaa.si/?p=1')
+    assert (nyaa.rate, nyaa.concurrency, nyaa.burst) == (2.0, 1, limiter._defaults['burst'])
+
+    nyaa.concurrency = 3
+    limiter.configure('nyaa.si', concurrency=2)
+    assert limiter.host('nyaa.si') is not nyaa
+    assert limiter.host('nyaa.si').concurrency == 2
@@ -0,0 +1,123 @@
+import math
+
+import pytest
+
+from animag import SizeFormatError
+from animag.component.Anime import Anime
+from animag.component.ResultSet import ResultSet
+from benchmarks import fixtures
+from .conftest import PAGES, listing
+
+
+@pytest.fixture
+def results():
+    return ResultSet(listing('dmhy'))
+
+
+def test_columns(results):
+    assert len(results) == PAGES * fixtures.ROWS_PER_PAGE['dmhy']
+    assert list(results.sizes) == [anime.size_bytes for anime in results]
+    assert list(results.timestamps) == [anime.timestamp for anime in results]
+    assert results.btihs == [anime.btih for anime in results]
+    assert results.titles == [anime.title for anime in results]
+
+
+def test_sort_by(results):
+    by_size = results.sort_by('size')
+    assert isinstance(by_size, ResultSet)
+    assert list(by_size.sizes) == sorted(results.sizes)
+
+    newest = results.sort_by('time', reverse=True)
+    assert list(newest.timestamps) == sorted(results.timestamps, reverse=True)
+
+    by_episode = results.sort_by('episode')
+    assert [info.episode for info in by_episode.infos] == sorted(info.episode for info in results.infos)
+
+
+def test_sort_by_invalid_key(results):
+    with pytest.raises(ValueError):
+        results.sort_by('seeders')
+
+
+def test_unknown_values_come_last():
+    animes = ResultSet([Anime(None, 'a', None, None), Anime(None, 'b', '1GB', None, timestamp=1.0),
+                        Anime(None, 'c', '2GB', None, timestamp=2.0)])
+    assert [anime.title for anime in animes.sort_by('size')] == ['b', 'c', 'a']
+    assert [anime.title for anime in animes.sort_by('time', reverse=True)] == ['c', 'b', 'a']
+    assert math.isnan(animes.timestamps[0])
+
+
+def test_top(results):
+    top = results.top(5, by='size')
+    assert len(top) == 5
+    assert list(top.sizes) == sorted(results.sizes, reverse=True)[:5]
+
+
+def test_filter(results):
+    middle = results.filter(min_size='500MB', max_size='1GB')
+    assert len(middle) > 0
+    assert all(500 << 20 <= anime.size_bytes <= 1 << 30 for anime in middle)
+
+    since = results.timestamps[10]
+    assert all(anime.timestamp >= since for anime in results.filter(since=since))
+
+    with pytest.raises(SizeFormatError):
+        results.filter(min_size='big')
+
+
+def test_filter_numeric_bounds(results):
+    assert results.filter(min_size=500 << 20, max_size=1 << 30) == results.filter(min_size='500MB', max_size='1GB')
+
+    large = results.filter(min_size=1.5e9)
+    assert len(large) > 0
+    assert all(anime.size_bytes >= 1.5e9 for anime in large)
+    assert all(anime.size_bytes <= 2.5e8 for anime in results.filter(max_size=2.5e8))
+
+
+def test_filter_title(results):
+    frieren = results.filter_title(group='nekomoe KISSATEN')
+    assert len(frieren) > 0
+    assert all('Frieren' in anime.title for anime in frieren)
+
+    episode = results.filter_title(episode=5, language='cht')
+    assert len(episode) > 0
+    assert all(info.episode == 5 and 'CHT' in info.languages for info in episode.infos)
+
+
+def test_slicing_keeps_columns(results):
+    head = results[:10]
+    assert isinstance(head, ResultSet)
+    assert list(head) == list(results)[:10]
+    assert list(head.sizes) == list(results.sizes)[:10]
+    assert results[3] is list(results)[3]
+
+
+def test_dedupe(results):
+    doubled = ResultSet(list(results) + list(results)[:20])
+    assert doubled.dedupe() == results
+
+
+def test_size_format_leaves_other_sets_unchanged(results):
+    sizes = [anime.size for anime in results]
+    shared = results.sort_by('size')
+
+    shared.size_format('KB')
+    assert all(anime.size.endswith('KB') for anime in shared)
+    assert [anime.size for anime in results] == sizes
+
+
+def test_size_format_invalid_unit(results):
+    with pytest.raises(SizeFormatError):
+        results.size_format('parsec')
+
+
+def test_size_format_unknown_size_changes_nothing():
+    animes = ResultSet([Anime(None, 'a', '1GB', None), Anime(None, 'b', None, None)])
+    with pytest.raises(SizeFormatError):
+        animes.size_format('MB')
+    assert animes[0].size == '1GB'
+
+
+def test_equality(results):
+    assert results == list(results)
+    assert results[:1] != results[1:2]
@@ -0,0 +1,58 @@
+import asyncio
+
+from animag import Searcher, AsyncSearcher
+from animag.plugins import get_plugin
+from benchmarks.server import AsyncFixtureSession
+from .conftest import listing
+
+
+def count_calls(monkeypatch, plugin_name: str, method: str) -> list:
+    """Record the keyword of every call to a search method of a plugin."""
+    plugin = get_plugin(plugin_name)
+    search = getattr(plugin, method)
+    calls = []
+
+    def counted(self, keyword, *args, **kwargs):
+        calls.append(keyword)
+        return search(self, keyword, *args, **kwargs)
+
+    monkeypatch.setattr(plugin, method, counted)
+    return calls
+
+
+def test_search_all(server, session):
+    searcher = Searcher(verify=False, session=session)
+    animes = searcher.search_all('frieren', plugins=['dmhy', 'nyaa', 'nonexistent'])
+
+    assert [anime.title for anime in animes] == [anime.title for anime in listing('dmhy') + listing('nyaa')]
+    assert list(searcher.plugin_reports) == ['dmhy', 'nyaa', 'nonexistent']
+    assert searcher.plugin_reports['dmhy'].count == len(listing('dmhy'))
+    assert not searcher.plugin_reports['nonexistent'].ok
+    assert searcher.last_stats.rows == len(animes)
+
+
+def test_search_all_searches_duplicate_plugins_once(server, session, monkeypatch):
+    calls = count_calls(monkeypatch, 'tokyotosho', 'search')
+    searcher = Searcher(verify=False, session=session)
+
+    animes = searcher.search_all('frieren', plugins=['tokyotosho', 'acgrip', 'tokyotosho'])
+    assert calls == ['frieren']
+    assert list(searcher.plugin_reports) == ['tokyotosho', 'acgrip']
+    assert searcher.plugin_reports['tokyotosho'].count == len(listing('tokyotosho'))
+    assert len(animes) == len(listing('tokyotosho')) + len(listing('acgrip'))
+
+
+def test_async_search_all_searches_duplicate_plugins_once(server, monkeypatch):
+    calls = count_calls(monkeypatch, 'nyaa', 'asearch')
+
+    async def main():
+        async with AsyncSearcher(verify=False, session=AsyncFixtureSession(server)) as searcher:
+            animes = await searcher.search_all('frieren', plugins=['nyaa', 'nonexistent', 'nyaa'])
+            return animes, searcher.plugin_reports
+
+    animes, reports = asyncio.run(main())
+    assert calls == ['frieren']
+    assert [anime.title for anime in animes] == [anime.title for anime in listing('nyaa')]
+    assert list(reports) == ['nyaa', 'nonexistent']
+    assert reports['nyaa'].count == len(animes)
+    assert not reports['nonexistent'].ok
@@ -0,0 +1,88 @@
+import threading
+import time
+
+from animag import Searcher, SearchRequestError
+from animag.plugins import get_plugin
+from .conftest import listing
+
+
+def failing_keyword(monkeypatch, plugin_name: str, broken: str) -> list:
+    """Make a keyword fail on a plugin, recording the keyword of every call and the calls in flight."""
+    plugin = get_plugin(plugin_name)
+    search = plugin.search
+    calls, in_flight, lock = [], [0, 0], threading.Lock()
+
+    def patched(self, keyword, *args, **kwargs):
+        with lock:
+            calls.append(keyword)
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight[1], in_flight[0])
+        try:
+            time.sleep(0.01)
+            if keyword == broken:
+                raise SearchRequestError('boom')
+            return search(self, keyword, *args, **kwargs)
+        finally:
+            with lock:
+                in_flight[0] -= 1
+
+    monkeypatch.setattr(plugin, 'search', patched)
+    return calls, in_flight
+
+
+def test_search_many(server, session, monkeypatch):
+    calls, in_flight = failing_keyword(monkeypatch, 'nyaa', 'broken')
+    searcher = Searcher('nyaa', verify=False, session=session)
+    keywords = [f'frieren {i}' for i in range(6)] + ['broken', 'frieren 0']
+
+    reports = searcher.search_many(keywords, workers=2)
+    assert list(reports) == list(dict.fromkeys(keywords))
+    assert sorted(calls) == sorted(reports)
+    assert in_flight[1] <= 2
+
+    assert not reports['broken'].ok and reports['broken'].count == 0
+    assert isinstance(reports['broken'].error, SearchRequestError)
+    for keyword in keywords[:6]:
+        assert reports[keyword].ok and reports[keyword].count == len(listing('nyaa'))
+    assert searcher.keyword_reports is reports
+    # A batch leaves the results of the searcher alone
+    assert searcher.animes is None
+
+    stats = searcher.last_stats
+    assert stats.rows == 6 * len(listing('nyaa'))
+    assert stats.error == repr(reports['broken'].error)
+
+
+def test_search_many_max_pages(server, session):
+    searcher = Searcher('nyaa', verify=False, session=session)
+    reports = searcher.search_many(['frieren', 'dungeon'], max_pages=1)
+    assert [report.count for report in reports.values()] == [len(listing('nyaa', pages=1))] * 2
+
+
+def test_iter_search_many(server, session, monkeypatch):
+    failing_keyword(monkeypatch, 'nyaa', 'broken')
+    searcher = Searcher('nyaa', verify=False, session=session)
+
+    pairs = list(searcher.iter_search_many(['frieren', 'broken', 'dungeon', 'frieren'], workers=2))
+    assert len(pairs) == 2 * len(listing('nyaa'))
+    assert {keyword for keyword, _ in pairs} == {'frieren', 'dungeon'}
+    # The results of a keyword come together
+    keywords = [keyword for keyword, _ in pairs]
+    assert keywords == sorted(keywords, key=keywords.index)
+
+    reports = searcher.keyword_reports
+    assert set(reports) == {'frieren', 'broken', 'dungeon'}
+    assert not reports['broken'].ok
+    assert all(report.animes is None for report in reports.values())
+
+
+def test_iter_search_many_close(server, session, monkeypatch):
+    calls, _ = failing_keyword(monkeypatch, 'nyaa', 'broken')
+    searcher = Searcher('nyaa', verify=False, session=session)
+
+    pairs = searcher.iter_search_many([f'frieren {i}' for i in range(50)], workers=2)
+    next(pairs)
+    pairs.close()
+    time.sleep(0.05)
+    # Only the keywords in flight were searched, not the whole batch
+    assert len(calls) <= 4
@@ -0,0 +1,45 @@
+import pytest
+
+from animag import Searcher
+from animag.component.ResultSet import ResultSet
+from benchmarks import fixtures
+from .conftest import listing
+
+
+def test_animes_setter_wraps_results():
+    searcher = Searcher('dmhy')
+    assert searcher.animes is None
+
+    animes = listing('dmhy', pages=1)
+    searcher.animes = animes
+    assert isinstance(searcher.animes, ResultSet)
+    assert searcher.animes == animes
+
+    results = ResultSet(animes)
+    searcher.animes = results
+    assert searcher.animes is results
+
+    searcher.animes = None
+    assert searcher.animes is None
+
+
+@pytest.mark.parametrize('plugin_name', ['dmhy', 'nyaa', 'tokyotosho'])
+def test_search(server, session, plugin_name):
+    searcher = Searcher(plugin_name, verify=False, session=session)
+    animes = searcher.search('frieren')
+
+    assert isinstance(animes, ResultSet)
+    assert animes is searcher.animes
+    assert len(animes) == server.pages * fixtures.ROWS_PER_PAGE[plugin_name]
+    assert [anime.title for anime in animes] == [anime.title for anime in listing(plugin_name)]
+    assert searcher.last_stats.ok and searcher.last_stats.rows == len(animes)
+
+
+def test_size_format_all(server, session):
+    searcher = Searcher('dmhy', verify=False, session=session)
+    newest = searcher.search('frieren').sort_by('time', reverse=True)
+    sizes = [anime.size for anime in newest]
+
+    searcher.size_format_all('KB')
+    assert all(anime.size.endswith('KB') for anime in searcher.animes)
+    assert [anime.size for anime in newest] == sizes
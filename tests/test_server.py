@@ -0,0 +1,126 @@
+import json
+import threading
+import urllib.error
+from contextlib import contextmanager
+import urllib.request
+
+import pytest
+
+from animag import Searcher, SearchRequestError
+from animag.server import SearchServer, RETRY_AFTER
+from .conftest import listing
+
+
+@contextmanager
+def serve(session, **options):
+    """Run a search server over the fixture session in a background thread."""
+    with SearchServer(port=0, session=session, verify=False, **options) as search_server:
+        thread = threading.Thread(target=search_server.serve_forever, args=(0.05,), daemon=True)
+        thread.start()
+        try:
+            yield search_server
+        finally:
+            search_server.shutdown()
+            thread.join()
+
+
+@pytest.fixture
+def search_server(session):
+    with serve(session, workers=2) as search_server:
+        yield search_server
+
+
+def get(search_server: SearchServer, path: str):
+    """Send a request to the search server, returning its status, headers and body."""
+    url = f"http://127.0.0.1:{search_server.server_address[1]}{path}"
+    try:
+        with urllib.request.urlopen(url, timeout=10) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_search(search_server, server):
+    status, headers, body = get(search_server, '/search?q=frieren&plugin=nyaa')
+    assert (status, headers['Content-Type']) == (200, 'application/json')
+    body = json.loads(body)
+    assert body['count'] == len(body['results']) == len(listing('nyaa'))
+    assert body['results'][0]['title'] == listing('nyaa')[0].title
+
+    # The results are remembered, the same search sends no request
+    hits = server.hits['nyaa']
+    assert json.loads(get(search_server, '/search?q=frieren&plugin=nyaa')[2]) == body
+    assert server.hits['nyaa'] == hits
+
+
+def test_search_limit_and_plugins(search_server):
+    body = json.loads(get(search_server, '/search?q=frieren&plugin=dmhy&limit=5')[2])
+    assert body['count'] == 5
+
+    body = json.loads(get(search_server, '/search?q=frieren&plugins=nyaa,dmhy&limit=10')[2])
+    assert body['count'] == 10
+    assert {name: report['ok'] for name, report in body['plugins'].items()} == {'nyaa': True, 'dmhy': True}
+
+
+def test_stream(search_server):
+    status, headers, body = get(search_server, '/search/stream?q=frieren&plugin=dmhy&limit=5')
+    assert (status, headers['Content-Type']) == (200, 'application/x-ndjson')
+    lines = [json.loads(line) for line in body.splitlines()]
+    assert [line['title'] for line in lines] == [anime.title for anime in listing('dmhy')[:5]]
+
+
+@pytest.mark.parametrize('path, status', [
+    ('/search?plugin=dmhy', 400),
+    ('/search?q=frieren&limit=0', 400),
+    ('/search?q=frieren&max_pages=many', 400),
+    ('/search?q=frieren&plugin=missing', 400),
+    ('/search/stream?q=frieren&plugins=all', 400),
+    ('/missing', 404),
+])
+def test_bad_requests(search_server, path, status):
+    code, _, body = get(search_server, path)
+    assert code == status
+    assert json.loads(body)['error']
+
+
+def test_search_error(search_server, monkeypatch):
+    def failing(self, *args, **kwargs):
+        raise SearchRequestError('boom')
+
+    monkeypatch.setattr(Searcher, 'search', failing)
+    status, _, body = get(search_server, '/search?q=frieren')
+    assert (status, json.loads(body)) == (502, {'error': 'boom'})
+
+
+def test_endpoints(search_server):
+    assert json.loads(get(search_server, '/health')[2]) == {'status': 'ok'}
+    assert 'dmhy' in json.loads(get(search_server, '/plugins')[2])['plugins']
+
+    get(search_server, '/search?q=frieren&plugin=dmhy&limit=5')
+    status, _, body = get(search_server, '/metrics')
+    assert status == 200
+    assert 'animag_searches_total{outcome="ok",plugin="dmhy"}' in body.decode()
+
+
+def test_busy_server_refuses_requests(session, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def blocked(self, *args, **kwargs):
+        started.set()
+        release.wait(10)
+        return []
+
+    monkeypatch.setattr(Searcher, 'search', blocked)
+    results = []
+    with serve(session, workers=1, queue_size=0) as search_server:
+        first = threading.Thread(target=lambda: results.append(get(search_server, '/search?q=frieren')))
+        first.start()
+        assert started.wait(10)
+
+        # The only worker is taken and there is no queue slot left
+        status, headers, body = get(search_server, '/search?q=frieren')
+        release.set()
+        first.join()
+
+    assert (status, headers['Retry-After'], json.loads(body)) == (503, str(RETRY_AFTER), {'error': 'server is busy'})
+    assert results[0][0] == 200
@@ -0,0 +1,155 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from animag import Searcher
+from animag.component.singleflight import SingleFlight
+from benchmarks.server import FixtureServer, FixtureSession
+from .conftest import PAGES
+
+
+def test_do_shares_the_call_in_flight():
+    singleflight = SingleFlight()
+    calls = []
+    started = threading.Event()
+    results = []
+
+    def slow(value):
+        calls.append(value)
+        started.set()
+        time.sleep(0.05)
+        return value
+
+    def join():
+        started.wait()
+        results.append(singleflight.do('key', slow, 'second'))
+
+    follower = threading.Thread(target=join)
+    follower.start()
+    results.append(singleflight.do('key', slow, 'first'))
+    follower.join()
+
+    assert calls == ['first']
+    assert results == ['first', 'first']
+    # Without a TTL nothing is remembered
+    assert singleflight.do('key', slow, 'third') == 'third'
+
+
+def test_do_shares_the_error_and_forgets_it():
+    singleflight = SingleFlight(ttl=60)
+
+    def failing():
+        raise ValueError('broken')
+
+    with pytest.raises(ValueError):
+        singleflight.do('key', failing)
+    assert singleflight.do('key', lambda: 'ok') == 'ok'
+
+
+def test_remembered_results():
+    singleflight = SingleFlight(ttl=60, max_entries=2)
+    for key in ('a', 'b'):
+        singleflight.do(key, lambda key=key: key)
+    assert singleflight.do('a', lambda: 'again') == 'a'
+
+    # 'b' is the least recently used
+    singleflight.do('c', lambda: 'c')
+    assert singleflight.do('a', lambda: 'again') == 'a'
+    assert singleflight.do('b', lambda: 'again') == 'again'
+
+    singleflight.forget('a')
+    assert singleflight.do('a', lambda: 'forgotten') == 'forgotten'
+    singleflight.clear()
+    assert singleflight.do('c', lambda: 'cleared') == 'cleared'
+
+
+def test_remembered_results_expire(monkeypatch):
+    singleflight = SingleFlight(ttl=1)
+    singleflight.do('key', lambda: 'first')
+    now = time.monotonic()
+    monkeypatch.setattr(time, 'monotonic', lambda: now + 2)
+    assert singleflight.do('key', lambda: 'second') == 'second'
+
+
+def test_ado_shares_the_task_in_flight():
+    singleflight = SingleFlight()
+    calls = []
+
+    async def slow(value):
+        calls.append(value)
+        await asyncio.sleep(0.02)
+        return value
+
+    async def main():
+        first = asyncio.ensure_future(singleflight.ado('key', slow, 'first'))
+        second = asyncio.ensure_future(singleflight.ado('key', slow, 'second'))
+        cancelled = asyncio.ensure_future(singleflight.ado('key', slow, 'third'))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(main()) == ['first', 'first']
+    assert calls == ['first']
+
+
+def search_together(searchers, keyword):
+    """Start the searches of several searchers at the same time."""
+    barrier = threading.Barrier(len(searchers))
+    errors = []
+
+    def search(searcher):
+        barrier.wait()
+        try:
+            searcher.search(keyword)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=search, args=(searcher,)) for searcher in searchers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+
+def test_singleflight_shares_concurrent_searches():
+    singleflight = SingleFlight()
+    # Slow enough responses that the searches overlap
+    with FixtureServer(pages=PAGES, delay=0.05) as server, FixtureSession(server) as session:
+        searchers = [Searcher('dmhy', verify=False, session=session, singleflight=singleflight,
+                              timefmt=timefmt) for timefmt in ('%Y/%m/%d %H:%M', '%Y-%m-%d')]
+        search_together(searchers, 'frieren')
+
+    leader, follower = sorted(searchers, key=lambda searcher: searcher.last_stats.shared)
+    assert not leader.last_stats.shared and leader.last_stats.requests
+    assert follower.last_stats.shared and not follower.last_stats.requests
+
+    # Each searcher owns its results, in its own time format
+    assert leader.animes == follower.animes
+    assert not set(map(id, leader.animes)) & set(map(id, follower.animes))
+    assert {len(anime.time) for anime in searchers[0].animes} == {16}
+    assert {len(anime.time) for anime in searchers[1].animes} == {10}
+
+    sizes = [anime.size for anime in follower.animes]
+    leader.size_format_all('KB')
+    assert [anime.size for anime in follower.animes] == sizes
+
+
+def test_singleflight_remembers_results(server, session):
+    singleflight = SingleFlight(ttl=60)
+    first = Searcher('dmhy', verify=False, session=session, singleflight=singleflight)
+    second = Searcher('dmhy', verify=False, session=session, singleflight=singleflight)
+
+    first.search('frieren')
+    hits = server.hits['dmhy']
+    second.search('frieren')
+
+    assert server.hits['dmhy'] == hits
+    assert second.last_stats.shared
+    assert second.animes == first.animes
+
+    singleflight.forget(Searcher._flight_key('dmhy', {'keyword': 'frieren'}))
+    second.search('frieren')
+    assert server.hits['dmhy'] > hits
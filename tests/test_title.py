@@ -0,0 +1,44 @@
+import pytest
+
+from animag.component.title import TitleInfo, parse_title, parse_titles
+from benchmarks import fixtures
+
+
+@pytest.mark.parametrize('template, expected', [
+    (fixtures.TITLES[0], TitleInfo('喵萌奶茶屋&LoliHouse', '我推的孩子 / Oshi no Ko', None, 5.0, 5.0, 1080,
+                                   'HEVC', 'WEBRip', ('CHS', 'CHT'))),
+    (fixtures.TITLES[1], TitleInfo('Nekomoe kissaten', 'Sousou no Frieren', None, 5.0, 5.0, 1080,
+                                   None, None, ('JPN', 'CHS'))),
+    (fixtures.TITLES[2], TitleInfo('SubsPlease', 'Kusuriya no Hitorigoto', None, 5.0, 5.0, 1080)),
+    (fixtures.TITLES[3], TitleInfo('动漫国字幕组', '间谍过家家 第二季', 2, 5.0, 5.0, 1080, languages=('CHS',))),
+    (fixtures.TITLES[4], TitleInfo('ANi', '葬送的芙莉蓮', None, 5.0, 5.0, 1080, 'AVC', 'WEB-DL', ('CHT',))),
+])
+def test_fixture_titles(template, expected):
+    info = parse_title(template.format(ep=5))
+    assert info == expected
+    assert not info.batch
+
+
+def test_batch():
+    info = parse_title('[Group][Name][01-12][1080P][CHS]')
+    assert (info.episode, info.episode_end) == (1.0, 12.0)
+    assert info.batch
+
+
+def test_unparsable_title():
+    assert parse_title('') == TitleInfo()
+
+
+def test_parse_titles_matches_parse_title():
+    titles = [fixtures.title(page, row) for page in range(1, 4) for row in range(10)]
+    assert parse_titles(titles) == [parse_title(title) for title in titles]
+
+
+@pytest.mark.parametrize('title, expected', [
+    ('Re-Zero - 05 [1080p]', TitleInfo(None, 'Re-Zero', None, 5.0, 5.0, 1080)),
+    ('[G] Name -05', TitleInfo('G', 'Name -05')),
+    ('  [G]  Name  -  ０５ ', TitleInfo('G', 'Name', None, 5.0, 5.0)),
+    ('[G]【简日双语】Name S2 - 03v2 [720p]', TitleInfo('G', 'Name', 2, 3.0, 3.0, 720, languages=('CHS', 'JPN'))),
+])
+def test_tokens_between_skipped_text(title, expected):
+    assert parse_title(title) == expected
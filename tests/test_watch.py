@@ -0,0 +1,83 @@
+import pytest
+
+from animag import Searcher
+from animag.component.Anime import Anime
+from animag.component.watch import MARK_SIZE, WatchState
+from benchmarks import fixtures
+from .conftest import listing
+
+
+@pytest.fixture
+def state():
+    with WatchState(':memory:') as watch_state:
+        yield watch_state
+
+
+def test_update_and_get(state):
+    animes = listing('dmhy', pages=1)
+    assert state.get('dmhy', 'frieren') is None
+
+    mark = state.update('dmhy', 'frieren', animes)
+    assert state.get('dmhy', 'frieren') == mark
+    assert mark.timestamp == max(anime.timestamp for anime in animes)
+    assert len(mark.keys) == MARK_SIZE
+    assert all(mark.seen(anime) for anime in animes)
+    assert state.get('dmhy', 'oshi no ko') is None
+
+
+def test_mark_moves_forward(state):
+    animes = listing('dmhy', pages=1)
+    state.update('dmhy', 'frieren', animes[10:])
+    mark = state.update('dmhy', 'frieren', animes[:10])
+
+    assert mark.timestamp == animes[0].timestamp
+    assert not mark.seen(Anime(None, 'new', '1GB', 'magnet:?xt=urn:btih:' + '0' * 40,
+                               timestamp=animes[0].timestamp + 60))
+    # An old release missing from the remembered keys is still older than the mark
+    assert mark.seen(animes[-1])
+
+
+def test_update_without_releases_keeps_the_mark(state):
+    mark = state.update('dmhy', 'frieren', listing('dmhy', pages=1))
+    assert state.update('dmhy', 'frieren', []) == mark
+
+
+def test_reset(state):
+    animes = listing('dmhy', pages=1)
+    for plugin in ('dmhy', 'nyaa'):
+        for keyword in ('frieren', 'oshi no ko'):
+            state.update(plugin, keyword, animes)
+    assert len(state) == 4
+
+    state.reset(keyword='frieren')
+    assert len(state) == 2
+    state.reset(plugin='nyaa')
+    assert len(state) == 1
+    state.reset()
+    assert len(state) == 0
+
+
+def test_persistence(tmp_path):
+    path = str(tmp_path / 'watch.sqlite')
+    with WatchState(path) as state:
+        mark = state.update('dmhy', 'frieren', listing('dmhy', pages=1))
+
+    with WatchState(path) as state:
+        assert state.get('dmhy', 'frieren') == mark
+
+
+def test_watch(server, session, state):
+    searcher = Searcher('dmhy', verify=False, session=session, watch_state=state)
+
+    first = searcher.watch('frieren')
+    assert len(first) == server.pages * fixtures.ROWS_PER_PAGE['dmhy']
+    assert searcher.animes == first
+
+    hits = server.hits['dmhy']
+    assert len(searcher.watch('frieren')) == 0
+    assert server.hits['dmhy'] - hits == 1
+
+
+def test_watch_requires_a_state(session):
+    with pytest.raises(ValueError):
+        Searcher('dmhy', session=session).watch('frieren')
@@ -0,0 +1,73 @@
+import threading
+
+import pytest
+
+from animag import SearchRequestError
+from animag.component import webget
+from animag.component.webget import RequestSession, check_response, get_html
+from benchmarks import fixtures
+
+
+@pytest.fixture
+def shared_session():
+    webget.close_session()
+    yield
+    webget.close_session()
+
+
+def test_get_session_is_shared(shared_session):
+    sessions = []
+    threads = [threading.Thread(target=lambda: sessions.append(webget.get_session())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(session is webget.get_session() for session in sessions)
+
+
+def test_configure_session_replaces_the_shared_session(shared_session):
+    old = webget.get_session()
+    old.session
+
+    new = webget.configure_session(pool_maxsize=4, keep_alive=False)
+    assert new is webget.get_session() and new is not old
+    assert old._session is None
+    assert new.session.headers['Connection'] == 'close'
+
+    webget.close_session()
+    assert webget.get_session() is not new
+
+
+def test_requests_session_is_created_once_and_reused():
+    session = RequestSession()
+    assert session._session is None
+
+    first = session.session
+    assert session.session is first
+    assert first.get_adapter('https://dmhy.org')._pool_maxsize == session.pool_maxsize
+
+    session.close()
+    assert session._session is None
+    assert session.session is not first
+
+
+def test_get_html_through_a_pooled_session(server, session):
+    html = get_html('https://dmhy.org/topics/list/page/1?keyword=frieren', session=session)
+    assert html == fixtures.dmhy(1, server.pages)
+
+    pool = session.session
+    get_html('https://dmhy.org/topics/list/page/2?keyword=frieren', session=session)
+    assert session.session is pool
+
+
+def test_get_html_invalid_response(server, session):
+    with pytest.raises(SearchRequestError):
+        get_html('https://example.org/', session=session)
+
+
+@pytest.mark.parametrize('status, content_type', [(404, 'text/html'), (200, 'application/json')])
+def test_check_response(status, content_type):
+    with pytest.raises(SearchRequestError):
+        check_response(status, content_type, 'https://dmhy.org/')
+    check_response(200, 'text/html; charset=utf-8', 'https://dmhy.org/')